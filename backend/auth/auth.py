@@ -1,15 +1,25 @@
 import os
-import requests
+import time
+import hashlib
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, Column, Integer, String, DateTime, func
-from sqlalchemy.orm import sessionmaker, declarative_base, Session, relationship
-from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import inspect as sa_inspect, insert
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker, declarative_base, Session, relationship, make_transient_to_detached
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from typing import Dict, List, Optional
+from backend.core.cache import TTLCache
+from backend.core.db import DBExecutor, PoolMetrics
+from backend.core.metrics import instrument_engine, registry
+from backend.core.process_pool import PoolSaturated
+from backend.auth.hashing import hash_password, verify_password, needs_rehash
+from backend.services.kakao_client import get_kakao_profile, KakaoAuthError
+from backend.services.image_pipeline import variant_urls
 
 # --- 1. 데이터베이스 설정 및 연결 (Foundation) ---
 # DB = 창고, 엔진 = 창고의 중앙 전력 시스템, 세션 = 창고 안 물품을 가져와서 작업하는 공간, 베이스 = 창고의 지도
@@ -22,12 +32,44 @@ DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME")
 
-DATABASE_URL = f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}" #  SQLAlchemy에게 DB의 위치와 구조 전달
+DATABASE_URL = os.getenv("DATABASE_URL") or f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}" #  SQLAlchemy에게 DB의 위치와 구조 전달
+
+# 연결 풀 설정
+# - DB_POOL_SIZE: 항상 유지하는 연결 수, DB_MAX_OVERFLOW: 부하가 몰릴 때 추가로 여는 연결 수
+# - DB_POOL_PRE_PING: 대여 전에 연결이 살아 있는지 확인 (MySQL wait_timeout으로 끊긴 연결 재사용 방지)
+# - DB_POOL_RECYCLE: 이 시간(초)보다 오래된 연결은 새로 연결
+# - DB_POOL_TIMEOUT: 풀이 모두 사용 중일 때 연결을 기다리는 최대 시간(초)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+
+def _engine_options(url: str) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if not url.startswith("sqlite"):  # SQLite는 QueuePool 옵션을 쓰지 않음
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    return options
 
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# async 핸들러의 DB 작업은 run_db로 전용 스레드 풀에서 실행 (스레드 수 = 연결 풀 최대 크기)
+pool_metrics = PoolMetrics(engine)
+db_executor = DBExecutor(max_workers=DB_POOL_SIZE + DB_MAX_OVERFLOW)
+run_db = db_executor.run
+
+# 쿼리 수/시간을 /metrics와 요청별 Server-Timing에 기록
+instrument_engine(engine)
+registry.gauge("db_pool_checked_out", "현재 대여 중인 DB 연결 수", lambda: pool_metrics.checked_out)
+registry.gauge("db_executor_running", "DB 실행 스레드에서 실행 중인 작업 수", lambda: db_executor.running)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -35,6 +77,9 @@ def get_db():
     finally:
         db.close()
 
+def read_db_stats() -> dict:
+    return {"pool": pool_metrics.stats(), "executor": db_executor.stats()}
+
 # --- 2. 데이터베이스 모델 정의 (Foundation) ---
 
 class User(Base):
@@ -56,6 +101,11 @@ class User(Base):
 
     tips = relationship("RecipeTip", back_populates="owner")
 
+    @property
+    def profile_image_variants(self) -> Dict[str, str]:
+        # 크기별 프로필 이미지 URL ({"64": ..., "256": ..., "512": ..., "jpeg": ...}). 예전 방식으로 올린 이미지는 빈 dict
+        return variant_urls(self.profile_image_url)
+
 
 # --- 3. 데이터 스키마 정의 (Schemas) ---
 
@@ -75,6 +125,7 @@ class UserInDB(UserBase):
     created_at: datetime
     updated_at: datetime
     profile_image_url: Optional[str] = None
+    profile_image_variants: Dict[str, str] = {}
     class Config:
         orm_mode = True
 
@@ -107,14 +158,60 @@ KAKAO_CLIENT_ID = os.getenv("KAKAO_CLIENT_ID")
 KAKAO_REDIRECT_URI = os.getenv("KAKAO_REDIRECT_URI")
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+# 비밀번호 해싱/검증은 backend/auth/hashing.py의 프로세스 풀에서 실행 (hash_password, verify_password)
+# 풀이 가득 차 있으면 요청을 쌓아두지 않고 503 + Retry-After로 응답
+def _hashing_busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent password requests. Please retry shortly.",
+        headers={"Retry-After": "1"},
+    )
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# --- 인증 캐시 ---
+# 인증이 필요한 모든 요청이 get_current_user를 거치므로, 매번 JWT 서명 검증 + users 테이블 조회를 하지 않도록 캐시합니다.
+# - token_cache: 서명 검증이 끝난 토큰(해시) -> 이메일. 토큰 만료 시각까지만 보관
+# - user_cache: 이메일 -> 사용자 컬럼 값 스냅샷. 닉네임/프로필 이미지 변경, 가입 시 해당 항목 삭제
+#   비밀번호 해시는 스냅샷에 넣지 않음 (로그인은 항상 DB에서 읽고, 스냅샷으로 만든 객체는 필요할 때 DB에서 읽어 옴)
+# 캐시는 워커 프로세스마다 따로 있으므로, 다른 워커의 변경은 USER_CACHE_TTL 이내에 반영됩니다.
+
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 60))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", 10000))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", 10000))
+
+user_cache = TTLCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL)
+token_cache = TTLCache(TOKEN_CACHE_MAX_ENTRIES, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+def decode_access_token(token: str) -> Optional[str]:
+    # 토큰의 subject(이메일) 반환. 서명이 잘못되었거나 만료되었으면 JWTError
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    email = token_cache.get(key)
+    if email is not None:
+        return email
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    email = payload.get("sub")
+    if email is None:
+        return None
+    expires_in = payload["exp"] - time.time() if payload.get("exp") else ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    if expires_in > 0:
+        token_cache.set(key, email, ttl=expires_in)
+    return email
+
+_SNAPSHOT_EXCLUDED = {"password"}
+
+def _user_snapshot(user: "User") -> dict:
+    return {attr.key: getattr(user, attr.key) for attr in sa_inspect(User).column_attrs if attr.key not in _SNAPSHOT_EXCLUDED}
+
+def _user_from_snapshot(db: Session, snapshot: dict) -> "User":
+    # 스냅샷으로 만든 객체를 DB 조회 없이 현재 세션에 연결 (이후 수정/commit도 기존처럼 동작)
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+def invalidate_user(email: str):
+    user_cache.delete(email)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -132,8 +229,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
-def create_user(db: Session, user: UserCreate):
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: UserCreate, hashed_password: str):
     db_user = User(
         email=user.email,
         password=hashed_password,
@@ -142,25 +238,72 @@ def create_user(db: Session, user: UserCreate):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    invalidate_user(db_user.email)
     return db_user
 
-def create_social_user(db: Session, user_info: SocialUserCreate):
-    db_user = User(
+def save_user(db: Session, user: User):
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    invalidate_user(user.email)
+    return user
+
+def upsert_social_user(db: Session, user_info: SocialUserCreate):
+    # 조회 후 없으면 insert하는 대신 INSERT 한 번으로 처리 (이미 있는 이메일이면 아무것도 바꾸지 않음)
+    # 같은 계정으로 동시에 로그인해도 중복 키 오류가 나지 않습니다.
+    # - PostgreSQL/SQLite: ON CONFLICT DO UPDATE(값은 그대로) + RETURNING으로 새 계정이든 기존 계정이든 한 번에 행을 받아 옴
+    #   (DO NOTHING은 충돌한 행을 RETURNING하지 않으므로 같은 값으로 덮어씀. onupdate 컬럼은 건드리지 않음)
+    # - MySQL은 INSERT ... RETURNING이 없어서 ON DUPLICATE KEY UPDATE 뒤에 다시 조회합니다.
+    values = dict(
         email=user_info.email,
         social_provider=user_info.social_provider,
         social_id=user_info.social_id,
         name=""
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = dialect_insert(User).values(**values)
+        stmt = stmt.on_conflict_do_update(index_elements=[User.email], set_={"email": stmt.excluded.email})
+        user = db.scalars(stmt.returning(User), execution_options={"populate_existing": True}).one()
+        db.expunge(user)  # commit이 속성을 만료시켜 다시 SELECT하지 않도록 세션에서 분리
+        db.commit()
+        # 새 계정인지 구분할 수 없으므로 항상 무효화 (로그인에서 바로 다시 채움)
+        invalidate_user(user_info.email)
+        return user
+
+    if dialect == "mysql":
+        stmt = mysql.insert(User).values(**values)
+        stmt = stmt.on_duplicate_key_update(email=stmt.inserted.email)
+    else:
+        stmt = insert(User).values(**values)
+    try:
+        inserted = db.execute(stmt).rowcount == 1
+        db.commit()
+    except IntegrityError:  # upsert를 지원하지 않는 DB에서 이미 가입된 경우
+        db.rollback()
+        inserted = False
+    if inserted:
+        invalidate_user(user_info.email)
+    return get_user_by_email(db, email=user_info.email)
 
 
 # --- 6. API 라우터 및 엔드포인트 구현 (API Layer) ---
 
 router = APIRouter()
 
+async def get_request_subject(request: Request, token: Optional[str] = Depends(optional_oauth2_scheme)) -> str:
+    # 로그인 없이도 쓰는 엔드포인트에서 요청한 사람을 구분하는 키 (사용자별 공정 대기열 등)
+    # 유효한 토큰이면 토큰의 subject, 없거나 잘못된 토큰이면 클라이언트 IP
+    if token:
+        try:
+            email = decode_access_token(token)
+            if email:
+                return f"user:{email}"
+        except JWTError:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -168,35 +311,54 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
+        email = decode_access_token(token)
         if email is None:
             raise credentials_exception
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
-    
-    user = get_user_by_email(db, email=token_data.email)
+
+    snapshot = user_cache.get(token_data.email)
+    if snapshot is not None:
+        return _user_from_snapshot(db, snapshot)
+
+    user = await run_db(get_user_by_email, db, email=token_data.email)
     if user is None:
         raise credentials_exception
+    user_cache.set(token_data.email, _user_snapshot(user))
     return user
 
 @router.post("/register", response_model=UserInDB, status_code=status.HTTP_201_CREATED, summary="회원가입")
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = get_user_by_email(db, email=user.email)
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_db(get_user_by_email, db, email=user.email)
     if db_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-    return create_user(db=db, user=user)
+    try:
+        hashed_password = await hash_password(user.password)
+    except PoolSaturated:
+        raise _hashing_busy_exception()
+    return await run_db(create_user, db, user, hashed_password)
 
 @router.post("/login", response_model=TokenResponse, summary="로그인")
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = get_user_by_email(db, email=form_data.username)
-    if not user or not user.password or not verify_password(form_data.password, user.password):
+    user = await run_db(get_user_by_email, db, email=form_data.username)
+    try:
+        verified = bool(user and user.password) and await verify_password(form_data.password, user.password)
+    except PoolSaturated:
+        raise _hashing_busy_exception()
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    # 예전 cost로 저장된 해시는 로그인에 성공한 김에 현재 cost로 다시 저장 (풀이 바쁘면 다음 로그인으로 미룸)
+    if needs_rehash(user.password):
+        try:
+            user.password = await hash_password(form_data.password)
+            user = await run_db(save_user, db, user)
+        except PoolSaturated:
+            pass
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
@@ -209,46 +371,35 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 
 @router.post("/login/kakao", response_model=TokenResponse, summary="카카오 소셜 로그인")
 async def login_kakao(kakao_access_token: KakaoAccessToken, db: Session = Depends(get_db)):
-    access_token = kakao_access_token.access_token
-
-    # 1. 액세스 토큰으로 사용자 정보 요청
-    user_info_url = "https://kapi.kakao.com/v2/user/me"
-    user_info_headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-type": "application/x-www-form-urlencoded;charset=utf-8",
-    }
-    user_info_res = requests.get(user_info_url, headers=user_info_headers)
-    user_info_json = user_info_res.json()
-
-    if user_info_res.status_code != 200:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="카카오 사용자 정보 조회 실패")
-
-    kakao_account = user_info_json.get("kakao_account")
-    if not kakao_account or "email" not in kakao_account:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="카카오 계정에 이메일 정보가 없습니다. (사용자 동의 필요)")
-
-    email = kakao_account.get("email")
-    social_id = str(user_info_json.get("id"))
-
-    # 2. 사용자 조회 및 생성
-    user = get_user_by_email(db, email=email)
-    if not user:
+    # 1. 액세스 토큰으로 사용자 정보 요청 (같은 토큰의 재시도는 캐시에서 응답)
+    try:
+        profile = await get_kakao_profile(kakao_access_token.access_token)
+    except KakaoAuthError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # 2. 사용자 조회 및 생성 (인증 캐시에 있으면 DB를 거치지 않음)
+    snapshot = user_cache.get(profile.email)
+    if snapshot is not None:
+        email, name = snapshot["email"], snapshot["name"]
+    else:
         user_info = SocialUserCreate(
-            email=email,
+            email=profile.email,
             social_provider="kakao",
-            social_id=social_id
+            social_id=profile.social_id
         )
-        user = create_social_user(db, user_info)
-    
+        user = await run_db(upsert_social_user, db, user_info)
+        user_cache.set(user.email, _user_snapshot(user))
+        email, name = user.email, user.name
+
     # 3. 서비스 JWT 토큰 발급
     service_access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     service_access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=service_access_token_expires
+        data={"sub": email}, expires_delta=service_access_token_expires
     )
     return {
         "access_token": service_access_token,
         "token_type": "bearer",
-        "nickname_required": user.name == ""
+        "nickname_required": name == ""
     }
 
 @router.put("/me/nickname", response_model=UserInDB, summary="닉네임 설정")
@@ -257,14 +408,11 @@ async def update_nickname(nickname_data: NicknameUpdate, current_user: User = De
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nickname cannot be empty")
     
     current_user.name = nickname_data.name
-    db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+    return await run_db(save_user, db, current_user)
 
 @router.post("/dev-login", response_model=Token, summary="개발용 로그인", include_in_schema=False)
 async def dev_login_for_access_token(request: DevLoginRequest, db: Session = Depends(get_db)):
-    user = get_user_by_email(db, email=request.email)
+    user = await run_db(get_user_by_email, db, email=request.email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
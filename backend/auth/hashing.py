@@ -0,0 +1,95 @@
+import os
+import time
+import bcrypt
+from typing import Optional
+from backend.core.process_pool import BoundedProcessPool
+
+# --- 비밀번호 해싱 (bcrypt) ---
+# bcrypt 한 번에 100~300ms의 CPU를 쓰므로, 이벤트 루프에서 직접 돌리면 그동안 같은 워커의 다른 요청이 모두 멈춥니다.
+# 해싱/검증은 전용 프로세스 풀에서 실행해 코어 수만큼 병렬로 처리하고, 밀려 있는 작업이 많으면 PoolSaturated로 바로 거절합니다.
+# - cost(rounds)는 서버 시작 시 calibrate()가 워커에서 직접 재서 BCRYPT_TARGET_MS에 맞춰 정합니다. (BCRYPT_ROUNDS로 고정 가능)
+#   빠른 서버에서도 기존 passlib 기본값(12)보다 낮추지 않으므로, calibration은 cost를 올리는 방향으로만 움직입니다.
+# - 저장된 해시의 cost가 현재 cost보다 낮으면 로그인 성공 시 새 cost로 다시 해싱해서 저장합니다. (cost를 낮추는 방향으로는 다시 해싱하지 않음)
+# - 기존 passlib bcrypt 해시($2b$/$2a$/$2y$)와 그대로 호환되며, passlib처럼 72바이트를 넘는 비밀번호는 앞 72바이트만 사용합니다.
+
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS")  # 지정하면 calibration 없이 이 값을 사용
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", 250))
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", 12))
+BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", 14))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", PASSWORD_HASH_WORKERS * 8))
+
+BCRYPT_DEFAULT_ROUNDS = 12  # calibration 전 기본값 (passlib 기본값과 같음)
+BCRYPT_MAX_BYTES = 72
+
+hash_pool = BoundedProcessPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, name="password-hash")
+current_rounds = int(BCRYPT_ROUNDS) if BCRYPT_ROUNDS else BCRYPT_DEFAULT_ROUNDS
+
+
+def _secret(password: str) -> bytes:
+    return password.encode("utf-8")[:BCRYPT_MAX_BYTES]
+
+
+# --- 워커 프로세스에서 실행되는 함수 (모듈 최상위여야 pickle 가능) ---
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(_secret(password), bcrypt.gensalt(rounds)).decode("ascii")
+
+
+def _verify(password: str, hashed: str) -> bool:
+    try:
+        return bcrypt.checkpw(_secret(password), hashed.encode("ascii"))
+    except ValueError:  # bcrypt 형식이 아닌 해시
+        return False
+
+
+def _measure(rounds: int) -> float:
+    salt = bcrypt.gensalt(rounds)
+    sample = b"calibration-password"
+    bcrypt.hashpw(sample, salt)  # 워커 첫 실행 비용 제외
+    started = time.perf_counter()
+    bcrypt.hashpw(sample, salt)
+    return (time.perf_counter() - started) * 1000
+
+
+# --- 이벤트 루프에서 쓰는 함수 ---
+
+def hash_rounds(hashed: str) -> Optional[int]:
+    # "$2b$12$..." -> 12
+    parts = hashed.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(hashed: str) -> bool:
+    rounds = hash_rounds(hashed)
+    return rounds is None or rounds < current_rounds
+
+
+async def hash_password(password: str) -> str:
+    return await hash_pool.run(_hash, password, current_rounds)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await hash_pool.run(_verify, password, hashed)
+
+
+async def calibrate() -> int:
+    # BCRYPT_MIN_ROUNDS에서 한 번 재고, cost가 1 오를 때마다 시간이 2배가 되는 것으로 계산해
+    # BCRYPT_TARGET_MS를 넘지 않는 가장 큰 cost를 고릅니다.
+    global current_rounds
+    if BCRYPT_ROUNDS:
+        print(f"bcrypt cost 고정: {current_rounds}")
+        return current_rounds
+    elapsed_ms = await hash_pool.run(_measure, BCRYPT_MIN_ROUNDS)
+    rounds = BCRYPT_MIN_ROUNDS
+    while rounds < BCRYPT_MAX_ROUNDS and elapsed_ms * 2 ** (rounds + 1 - BCRYPT_MIN_ROUNDS) <= BCRYPT_TARGET_MS:
+        rounds += 1
+    current_rounds = rounds
+    print(f"bcrypt cost calibration: cost {BCRYPT_MIN_ROUNDS} = {elapsed_ms:.1f}ms -> cost {rounds} 사용 (목표 {BCRYPT_TARGET_MS:.0f}ms)")
+    return rounds
+
+
+def stats() -> dict:
+    return {"rounds": current_rounds, **hash_pool.stats()}
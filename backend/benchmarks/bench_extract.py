@@ -0,0 +1,88 @@
+import argparse
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from backend.benchmarks.sample_pages import PAGES_DIR, load_pages
+from backend.services.recipe_extractor import extract_recipe_fields
+
+# --- 레시피 추출 벤치마크 ---
+# 기존 BeautifulSoup(html.parser) 전체 파싱과 새 lxml target 파서의 파싱 시간/최대 메모리를 비교하고,
+# 두 방식의 출력이 바이트 단위로 같은지도 확인합니다.
+# 메모리는 tracemalloc으로 측정한 파이썬 객체 할당의 최대치입니다. (libxml2 내부 버퍼는 포함되지 않음)
+# 실행: python -m backend.benchmarks.bench_extract [--pages DIR] [--repeat N]
+
+# 잘못된 마크업에서의 출력 비교: (HTML, 출력이 같아야 하는지)
+# False인 항목은 recipe_extractor 상단에 적어 둔 알려진 차이 (libxml2의 암묵적 태그 닫기 등)
+MALFORMED_FIXTURES = {
+    "cdata": (b"<h3>x<![CDATA[y]]>z</h3>", True),
+    "cdata-lowercase-spaces": (b"<h3>x <![cdata[ y ]]> z</h3>", True),
+    "cdata-in-ingredients": (b"<div class='ready_ingre3'>a<![CDATA[b]]>c</div>", True),
+    "stray-end-tag": (b"<h3>a</b>c</h3>", True),
+    "unclosed-step": (b"<div class='view_step_cont'>a<p>b</div>c</p>d<div class='view_step_cont'>e", True),
+    "unclosed-title": (b"<h3>a<span>b", True),
+    "nested-steps": (b"<div class='view_step_cont'>a<div class='view_step_cont'>b</div>c</div>", True),
+    "h3-closes-p": (b"<p><h3>x</p>y</h3>", False),
+    "p-closes-h3": (b"<h3>a<p>b</h3>c", False),
+    "cdata-with-gt": (b"<h3>x<![CDATA[a>b]]>z</h3>", False),
+}
+
+
+def legacy_extract(content: bytes):
+    # 변경 전 crawl_recipe의 추출 코드 (response.text -> BeautifulSoup)
+    soup = BeautifulSoup(content.decode("utf-8"), 'html.parser')
+    title = soup.find('h3').get_text(strip=True) if soup.find('h3') else "제목 없음"
+    ingredients = soup.find('div', class_='ready_ingre3')
+    ingredients_text = ingredients.get_text('\n', strip=True) if ingredients else "재료 정보 없음"
+    recipe_steps = soup.find_all('div', class_='view_step_cont')
+    steps_text = "\n".join([f"{i+1}. {step.get_text(strip=True)}" for i, step in enumerate(recipe_steps)])
+    return title, ingredients_text, steps_text
+
+def measure(func, content: bytes, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(content)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak
+
+def main():
+    parser = argparse.ArgumentParser(description="레시피 HTML 추출 벤치마크")
+    parser.add_argument("--pages", type=Path, default=PAGES_DIR, help="저장된 레시피 페이지(*.html) 폴더")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    print(f"{'page':<28}{'KB':>8}{'bs4 ms':>10}{'lxml ms':>10}{'speedup':>9}{'bs4 peak KB':>13}{'lxml peak KB':>14}  same")
+    totals = [0.0, 0.0]
+    mismatches = 0
+    for name, content in pages.items():
+        same = legacy_extract(content) == extract_recipe_fields(content)
+        mismatches += not same
+        legacy_time, legacy_peak = measure(legacy_extract, content, args.repeat)
+        new_time, new_peak = measure(extract_recipe_fields, content, args.repeat)
+        totals[0] += legacy_time
+        totals[1] += new_time
+        print(f"{name[:27]:<28}{len(content) / 1024:>8.0f}{legacy_time * 1000:>10.2f}{new_time * 1000:>10.2f}"
+              f"{legacy_time / new_time:>8.1f}x{legacy_peak / 1024:>13.0f}{new_peak / 1024:>14.0f}  {'yes' if same else 'NO'}")
+    print(f"total: bs4 {totals[0] * 1000:.1f} ms, lxml {totals[1] * 1000:.1f} ms ({totals[0] / totals[1]:.1f}x), "
+          f"output mismatches: {mismatches}")
+
+    print(f"\n{'malformed fixture':<28}{'same':>6}  expected")
+    unexpected = 0
+    for name, (content, expected) in MALFORMED_FIXTURES.items():
+        same = legacy_extract(content) == extract_recipe_fields(content)
+        unexpected += same != expected
+        print(f"{name:<28}{'yes' if same else 'NO':>6}  {'yes' if expected else 'NO (known difference)'}")
+    print(f"unexpected results: {unexpected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# --- 서버 시작 시간 벤치마크 ---
+# uvicorn 워커 여러 개가 동시에 뜨는 상황처럼, 자식 프로세스 N개를 동시에 띄워서 각각
+#   import_ms: backend.main import에 걸린 시간
+#   ready_ms: lifespan 시작(스키마 확인, 클라이언트 초기화 등)이 끝나 요청을 받을 수 있게 될 때까지의 시간
+#   total_ms: 프로세스 생성부터 준비 완료까지의 시간 (인터프리터 시작 포함, 부모 프로세스에서 측정)
+# 을 재고 중앙값을 출력합니다.
+# DB는 기본으로 임시 SQLite 파일을 사용합니다. (--database-url로 실제 DB 지정 가능)
+# 실행: python -m backend.benchmarks.bench_startup [--workers N] [--repeat N] [--database-url URL]
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+CHILD_SNIPPET = """
+import asyncio, json, time
+start = time.perf_counter()
+import backend.main as main
+imported = time.perf_counter()
+
+async def start_app():
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        print(json.dumps({"import_ms": (imported - start) * 1000, "ready_ms": (ready - imported) * 1000}), flush=True)
+
+asyncio.run(start_app())
+"""
+
+
+def child_env(database_url: str) -> dict:
+    env = dict(os.environ)
+    env["DATABASE_URL"] = database_url
+    env.setdefault("JWT_SECRET_KEY", "bench")
+    env.setdefault("JWT_ALGORITHM", "HS256")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT_DIR), env.get("PYTHONPATH")]))
+    return env
+
+
+def start_workers(count: int, env: dict) -> list:
+    # 한 번에 count개의 프로세스를 띄우고 모두 준비될 때까지 기다림
+    started = time.perf_counter()
+    processes = [
+        subprocess.Popen([sys.executable, "-c", CHILD_SNIPPET], cwd=ROOT_DIR, env=env,
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        for _ in range(count)
+    ]
+    results = []
+    for process in processes:
+        stdout, stderr = process.communicate()
+        finished = time.perf_counter()
+        lines = [line for line in stdout.splitlines() if line.startswith("{")]
+        if process.returncode != 0 or not lines:
+            raise RuntimeError(f"워커 시작 실패 (exit {process.returncode}):\n{stderr[-2000:]}")
+        result = json.loads(lines[-1])
+        # 프로세스 종료 시각 기준이라 종료 정리 시간이 조금 포함됨
+        result["total_ms"] = (finished - started) * 1000
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="서버 시작 시간 벤치마크")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 띄울 워커 프로세스 수")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--database-url", default=None, help="기본값: 임시 SQLite 파일")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database_url = args.database_url or f"sqlite:///{Path(tmp_dir) / 'bench_startup.sqlite3'}"
+        env = child_env(database_url)
+        runs = []
+        for i in range(args.repeat):
+            results = start_workers(args.workers, env)
+            runs += results
+            print(f"run {i + 1}: " + ", ".join(f"{r['ready_ms'] + r['import_ms']:.0f}" for r in results) + " ms (import+ready)")
+
+    print(f"{'':<10}{'median ms':>11}{'max ms':>10}")
+    for key in ("import_ms", "ready_ms", "total_ms"):
+        values = [r[key] for r in runs]
+        print(f"{key:<10}{statistics.median(values):>11.1f}{max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
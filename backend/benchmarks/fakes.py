@@ -0,0 +1,239 @@
+import asyncio
+import hashlib
+import http.server
+import json
+import random
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from backend.benchmarks.sample_pages import load_pages
+
+# --- 벤치마크용 외부 서비스 대역 ---
+# 유료 API와 외부 사이트 없이 추천 파이프라인 전체를 돌릴 수 있도록, 같은 인터페이스를 가진 가짜 구현을 제공합니다.
+# - FakeGeminiModel: generate_content_async(stream 포함)와 usage_metadata를 흉내 내고, 지연 시간은 로그정규분포로 흔들림
+#   generation_config에 JSON mime type이 있으면 코드 펜스 없는 JSON을, malformed_rate 비율로 잘린 JSON을 응답
+# - FakeSearchService: customsearch의 cse().list(...).execute(http=...) 형태, 검색어마다 항상 같은 로컬 페이지 URL을 반환
+# - RecipePageServer: 저장된 만개의 레시피 페이지(없으면 합성 페이지)를 ETag/304와 함께 응답하는 로컬 HTTP 서버
+# 지연 시간 인자는 모두 초 단위 중앙값입니다. (0이면 지연 없음)
+
+
+def _jittered(rng: random.Random, median: float, sigma: float) -> float:
+    return median * rng.lognormvariate(0, sigma) if median > 0 else 0.0
+
+
+class FakeUsage:
+    def __init__(self, prompt_token_count: int, candidates_token_count: int):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class FakeResponse:
+    def __init__(self, text: str, prompt: str):
+        self.text = text
+        self.usage_metadata = FakeUsage(len(prompt) // 2, len(text) // 2)
+
+
+class FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeStream:
+    # 스트리밍 응답: 정해진 크기의 조각을 일정 간격으로 내보내고, 다 읽은 뒤 usage_metadata 제공
+    def __init__(self, text: str, prompt: str, chunk_size: int, chunk_delay: float):
+        self._text = text
+        self._prompt = prompt
+        self._chunk_size = chunk_size
+        self._chunk_delay = chunk_delay
+        self.usage_metadata = None
+
+    async def __aiter__(self):
+        for start in range(0, len(self._text), self._chunk_size):
+            if self._chunk_delay:
+                await asyncio.sleep(self._chunk_delay)
+            yield FakeChunk(self._text[start:start + self._chunk_size])
+        self.usage_metadata = FakeUsage(len(self._prompt) // 2, len(self._text) // 2)
+
+
+class FakeGeminiModel:
+    KEYWORD_MARKER = "검색 키워드 3개"
+    REPAIR_MARKER = "[이전 응답]"
+    _URL_LINE = re.compile(r"^URL: (\S+)", re.MULTILINE)
+    _TITLE_LINE = re.compile(r"^제목: (.+)$", re.MULTILINE)
+
+    def __init__(self, keyword_latency: float = 0.5, ranking_latency: float = 2.0, sigma: float = 0.3,
+                 error_rate: float = 0.0, malformed_rate: float = 0.0, seed: int = 0):
+        self.keyword_latency = keyword_latency
+        self.ranking_latency = ranking_latency
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.calls = {"keywords": 0, "ranking": 0, "repair": 0}
+        self._rng = random.Random(seed)
+
+    def _keywords(self, prompt: str) -> str:
+        # 요청 블록이 같으면 같은 키워드 (검색/크롤링 캐시가 실제처럼 동작하도록)
+        digest = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest(), 16)
+        return "\n".join(f"벤치 레시피 {(digest >> (8 * i)) % 40}" for i in range(3))
+
+    def _recipes(self, prompt: str, structured: bool) -> str:
+        urls = self._URL_LINE.findall(prompt) or [None]
+        titles = self._TITLE_LINE.findall(prompt) or ["벤치 레시피"]
+        recipes = [
+            {
+                "name": titles[i % len(titles)].strip(),
+                "description": "벤치마크용 가짜 추천 결과",
+                "ingredients": ["김치 1컵", "돼지고기 200g", "두부 1/2모"],
+                "cooking_time": 20 + 5 * i,
+                "cost": 8000 + 1000 * i,
+                "tags": ["벤치마크", "한식"],
+                "instructions": ["재료를 손질한다.", "냄비에 볶는다.", "물을 붓고 끓인다."],
+                "source_url": urls[i % len(urls)],
+            }
+            for i in range(3)
+        ]
+        text = json.dumps(recipes, ensure_ascii=False)
+        return text if structured else "```json\n" + text + "\n```"
+
+    async def generate_content_async(self, prompt: str, request_options: Optional[dict] = None, stream: bool = False, **kwargs):
+        if self.KEYWORD_MARKER in prompt:
+            stage = "keywords"
+        else:
+            stage = "repair" if self.REPAIR_MARKER in prompt else "ranking"
+        self.calls[stage] += 1
+        latency = self.keyword_latency if stage != "ranking" else self.ranking_latency
+        delay = _jittered(self._rng, latency, self.sigma)
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            raise asyncio.TimeoutError()
+        if self._rng.random() < self.error_rate:
+            await asyncio.sleep(delay / 2)
+            raise RuntimeError("fake gemini: 503 overloaded")
+
+        config = kwargs.get("generation_config") or {}
+        structured = config.get("response_mime_type") == "application/json"
+        if stage == "keywords":
+            text = self._keywords(prompt)
+        else:
+            text = self._recipes(prompt, structured)
+            if stage == "ranking" and self._rng.random() < self.malformed_rate:
+                text = text[:len(text) // 3]  # 첫 객체 중간에서 잘린 응답 (복구 단계 측정용)
+        if stream:
+            # 첫 조각까지는 지연의 1/3, 나머지는 조각마다 나눠서
+            await asyncio.sleep(delay / 3)
+            chunk_size = 200
+            chunks = max(len(text) // chunk_size, 1)
+            return FakeStream(text, prompt, chunk_size, delay * 2 / 3 / chunks)
+        await asyncio.sleep(delay)
+        return FakeResponse(text, prompt)
+
+
+class _FakeSearchRequest:
+    def __init__(self, service: "FakeSearchService", query: str, num: int):
+        self.service = service
+        self.query = query
+        self.num = num
+
+    def execute(self, http=None):
+        # 실제 클라이언트처럼 블로킹 호출 (recommend.py에서 스레드로 실행됨)
+        with self.service._lock:
+            self.service.calls += 1
+            delay = _jittered(self.service._rng, self.service.latency, self.service.sigma)
+        time.sleep(delay)
+        return {"items": [{"link": link} for link in self.service.links(self.query, self.num)]}
+
+
+class _FakeCse:
+    def __init__(self, service: "FakeSearchService"):
+        self.service = service
+
+    def list(self, q: str, num: int = 1, **kwargs):
+        return _FakeSearchRequest(self.service, q, num)
+
+
+class FakeSearchService:
+    def __init__(self, base_url: str, page_count: int, latency: float = 0.15, sigma: float = 0.3, seed: int = 0):
+        self.base_url = base_url.rstrip("/")
+        self.page_count = page_count
+        self.latency = latency
+        self.sigma = sigma
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def links(self, query: str, num: int) -> List[str]:
+        digest = int(hashlib.sha1(query.encode("utf-8")).hexdigest(), 16)
+        return [f"{self.base_url}/recipe/{(digest + i) % self.page_count}" for i in range(num)]
+
+    def cse(self) -> _FakeCse:
+        return _FakeCse(self)
+
+
+class RecipePageServer:
+    # /recipe/<번호> -> 저장된 페이지 중 하나 (번호는 페이지 수로 나눈 나머지)
+    def __init__(self, latency: float = 0.1, sigma: float = 0.3, seed: int = 0, pages: Optional[Dict[str, bytes]] = None):
+        self.pages = list((pages or load_pages()).values())
+        self.etags = [f'"{hashlib.sha1(page).hexdigest()[:16]}"' for page in self.pages]
+        self.latency = latency
+        self.sigma = sigma
+        self.requests = 0
+        self.not_modified = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_GET(self):
+                match = re.fullmatch(r"/recipe/(\d+)", self.path)
+                if not match:
+                    self.send_error(404)
+                    return
+                index = int(match.group(1)) % len(server.pages)
+                with server._lock:
+                    server.requests += 1
+                    delay = _jittered(server._rng, server.latency, server.sigma)
+                time.sleep(delay)
+                etag = server.etags[index]
+                if self.headers.get("If-None-Match") == etag:
+                    with server._lock:
+                        server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = server.pages[index]
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "RecipePageServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="recipe-pages", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
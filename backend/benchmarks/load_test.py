@@ -0,0 +1,421 @@
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import platform
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from backend.benchmarks.fakes import FakeGeminiModel, FakeSearchService, RecipePageServer
+
+# --- 오프라인 부하 테스트 ---
+# 실제 FastAPI 앱(backend/main.py)을 uvicorn으로 띄우고, 외부 의존성은 로컬 대역으로 바꿔서 섞인 트래픽을 보냅니다.
+#   Gemini -> FakeGeminiModel, Custom Search -> FakeSearchService, 만개의 레시피 -> RecipePageServer (backend/benchmarks/fakes.py)
+#   MySQL -> 임시 SQLite 파일 (--database-url로 실제 DB 지정 가능)
+# 가상 사용자(--users)마다 계정을 만들어 로그인한 뒤, --mix 비율대로 로그인, /mypage/me, 팁 피드/조회/검색/작성,
+# 레시피 추천, 프로필 업로드를 반복하고 엔드포인트별 처리량과 p50/p95/p99를 출력합니다. (--warmup 동안의 결과는 제외)
+# 결과를 기준선으로 저장해 두고(--save-baseline), 다음 실행에서 비교할 수 있습니다(--compare).
+# 실행: python -m backend.benchmarks.load_test [--users 20] [--duration 30] [--save-baseline NAME] [--compare NAME]
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+DEFAULT_MIX = "feed=30,me=20,tip_read=15,tip_write=8,search=7,login=8,recommend=8,upload=4"
+SEARCH_WORDS = ["김치", "된장", "계란", "두부", "볶음", "찌개", "간단", "자취", "다이어트", "반찬"]
+MEAL_GOALS = ["다이어트", "자취생 간단요리", "손님 초대", "아이 반찬", "야식", "술안주", "아침 식사", "도시락"]
+INGREDIENTS = ["김치", "돼지고기", "두부", "계란", "대파", "양파", "닭가슴살", "애호박", "감자", "참치"]
+
+
+def configure_environment(work_dir: Path, args):
+    # backend 모듈을 import하기 전에 호출해야 함 (설정은 import 시점에 읽힘)
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{work_dir / 'bench.sqlite3'}"
+    os.environ["QUOTA_DB_PATH"] = str(work_dir / "quota.sqlite3")
+    os.environ["CRAWL_CACHE_PATH"] = str(work_dir / "crawl_cache.sqlite3")
+    os.environ.setdefault("JWT_SECRET_KEY", "load-test")
+    os.environ.setdefault("JWT_ALGORITHM", "HS256")
+    os.environ.setdefault("CSE_DAILY_QUOTA", str(10 ** 9))
+    os.environ.setdefault("WARMUP_ENABLED", "0")  # 측정 중에 백그라운드 미리 데우기가 끼어들지 않도록
+    if args.bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise SystemExit(f"알 수 없는 작업: {name} (가능: {', '.join(OPERATIONS)})")
+        mix[name.strip()] = int(weight)
+    return mix
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    # nearest-rank
+    if not ordered:
+        return 0.0
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+def make_images(count: int) -> List[bytes]:
+    from PIL import Image
+
+    images = []
+    rng = random.Random(0)
+    for i in range(count):
+        image = Image.new("RGB", (1200, 900), tuple(rng.randrange(256) for _ in range(3)))
+        for _ in range(40):  # 단색이면 압축/리사이즈가 너무 가벼워서 무늬를 넣음
+            x, y = rng.randrange(1100), rng.randrange(800)
+            image.paste(tuple(rng.randrange(256) for _ in range(3)), (x, y, x + 100, y + 100))
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=90)
+        images.append(buffer.getvalue())
+    return images
+
+
+# --- 가상 사용자 ---
+
+class VirtualUser:
+    def __init__(self, index: int, seed: int):
+        self.email = f"bench{index}@example.com"
+        self.password = f"bench-password-{index}"
+        self.token: Optional[str] = None
+        self.my_tips: List[int] = []
+        self.feed_cursor: Optional[str] = None
+        self.rng = random.Random(seed * 1000 + index)
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, args, images: List[bytes]):
+        self.client = client
+        self.args = args
+        self.images = images
+        self.tip_ids: List[int] = []
+        self.recommend_requests = [self._recommend_request(random.Random(i)) for i in range(args.recommend_variety)]
+        self.recording = False
+        self.latencies: Dict[str, List[float]] = {name: [] for name in OPERATIONS}
+        self.statuses: Dict[str, Dict[str, int]] = {name: {} for name in OPERATIONS}
+
+    @staticmethod
+    def _recommend_request(rng: random.Random) -> dict:
+        return {
+            "meal_goal": rng.choice(MEAL_GOALS),
+            "cooking_time": rng.choice([15, 30, 60]),
+            "cost": rng.choice([5000, 10000, 20000]),
+            "include_ingredients": rng.sample(INGREDIENTS, 2),
+        }
+
+    async def login(self, user: VirtualUser) -> httpx.Response:
+        response = await self.client.post("/auth/login", data={"username": user.email, "password": user.password})
+        if response.status_code == 200:
+            user.token = response.json()["access_token"]
+        return response
+
+    async def _with_retry(self, send) -> httpx.Response:
+        # 준비 단계에서는 503(해싱 풀 포화 등)이면 Retry-After만큼 기다렸다가 다시 시도
+        for _ in range(30):
+            response = await send()
+            if response.status_code != 503:
+                return response
+            await asyncio.sleep(float(response.headers.get("retry-after", 1)))
+        return response
+
+    async def setup_user(self, user: VirtualUser):
+        response = await self._with_retry(
+            lambda: self.client.post("/auth/register", json={"email": user.email, "password": user.password}))
+        if response.status_code not in (201, 400):  # 400: 이미 가입됨 (--database-url로 같은 DB 재사용)
+            raise RuntimeError(f"회원가입 실패: {response.status_code} {response.text}")
+        response = await self._with_retry(lambda: self.login(user))
+        response.raise_for_status()
+
+    async def seed_tips(self, user: VirtualUser, count: int):
+        for i in range(count):
+            response = await self.tip_write(user, title=f"{user.rng.choice(SEARCH_WORDS)} 팁 {i}", update_ratio=0)
+            response.raise_for_status()
+
+    # --- 작업별 요청 ---
+
+    async def op_login(self, user: VirtualUser) -> httpx.Response:
+        return await self.login(user)
+
+    async def op_me(self, user: VirtualUser) -> httpx.Response:
+        return await self.client.get("/mypage/me", headers=user.headers)
+
+    async def op_feed(self, user: VirtualUser) -> httpx.Response:
+        # 30%는 이전 페이지에 이어서 (무한 스크롤)
+        params = {"limit": 20}
+        if user.feed_cursor and user.rng.random() < 0.3:
+            params["cursor"] = user.feed_cursor
+        response = await self.client.get("/api/tips/feed", params=params)
+        if response.status_code == 200:
+            user.feed_cursor = response.json().get("next_cursor")
+        return response
+
+    async def op_tip_read(self, user: VirtualUser) -> httpx.Response:
+        tip_id = user.rng.choice(self.tip_ids) if self.tip_ids else 1
+        return await self.client.get(f"/api/tips/{tip_id}")
+
+    async def tip_write(self, user: VirtualUser, title: Optional[str] = None, update_ratio: float = 0.3) -> httpx.Response:
+        body = {"title": title or f"{user.rng.choice(SEARCH_WORDS)} 팁", "content": " ".join(user.rng.choices(SEARCH_WORDS, k=30))}
+        if user.my_tips and user.rng.random() < update_ratio:
+            return await self.client.put(f"/api/tips/{user.rng.choice(user.my_tips)}", json=body, headers=user.headers)
+        response = await self.client.post("/api/tips/", json=body, headers=user.headers)
+        if response.status_code == 200:
+            tip_id = response.json()["id"]
+            user.my_tips.append(tip_id)
+            self.tip_ids.append(tip_id)
+        return response
+
+    async def op_tip_write(self, user: VirtualUser) -> httpx.Response:
+        return await self.tip_write(user)
+
+    async def op_search(self, user: VirtualUser) -> httpx.Response:
+        return await self.client.get("/api/tips/search", params={"q": user.rng.choice(SEARCH_WORDS)})
+
+    async def op_recommend(self, user: VirtualUser) -> httpx.Response:
+        return await self.client.post("/recipes/recommend", json=user.rng.choice(self.recommend_requests))
+
+    async def op_upload(self, user: VirtualUser) -> httpx.Response:
+        image = user.rng.choice(self.images)
+        return await self.client.post("/mypage/me/profile-image", headers=user.headers,
+                                      files={"file": ("profile.jpg", image, "image/jpeg")})
+
+    # --- 실행 ---
+
+    async def run_user(self, user: VirtualUser, mix: Dict[str, int], stop_at: float):
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        while time.monotonic() < stop_at:
+            name = user.rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await OPERATIONS[name](self, user)
+                outcome = str(response.status_code)
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            elapsed = time.perf_counter() - started
+            if self.recording:
+                self.latencies[name].append(elapsed)
+                self.statuses[name][outcome] = self.statuses[name].get(outcome, 0) + 1
+            if self.args.think_ms:
+                await asyncio.sleep(user.rng.expovariate(1000 / self.args.think_ms))
+
+    def summary(self, measured_seconds: float) -> dict:
+        results = {}
+        for name in OPERATIONS:
+            latencies = sorted(self.latencies[name])
+            if not latencies:
+                continue
+            errors = sum(count for status, count in self.statuses[name].items() if not status.startswith(("2", "3")))
+            results[name] = {
+                "count": len(latencies),
+                "rps": round(len(latencies) / measured_seconds, 2),
+                "error_rate": round(errors / len(latencies), 4),
+                "statuses": dict(sorted(self.statuses[name].items())),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+                "max_ms": round(latencies[-1] * 1000, 2),
+            }
+        total = sum(result["count"] for result in results.values())
+        results["total"] = {"count": total, "rps": round(total / measured_seconds, 2)}
+        return results
+
+
+OPERATIONS = {
+    "login": LoadTest.op_login,
+    "me": LoadTest.op_me,
+    "feed": LoadTest.op_feed,
+    "tip_read": LoadTest.op_tip_read,
+    "tip_write": LoadTest.op_tip_write,
+    "search": LoadTest.op_search,
+    "recommend": LoadTest.op_recommend,
+    "upload": LoadTest.op_upload,
+}
+
+
+# --- 서버 ---
+
+class ServerThread:
+    # 실제 앱을 uvicorn으로 별도 스레드/이벤트 루프에서 실행 (부하 생성기와 루프를 나눠 씀)
+    def __init__(self, app):
+        import uvicorn
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # 미리 만든 소켓을 넘기면 Nagle이 켜진 채로 accept되어 keep-alive 요청마다 ~40ms(delayed ACK)가 더해짐
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(app, log_level="warning", access_log=False, lifespan="on"))
+        self.thread = threading.Thread(target=self.server.run, kwargs={"sockets": [self.sock]}, name="uvicorn", daemon=True)
+
+    def start(self, timeout: float = 60):
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("서버 시작 실패")
+            time.sleep(0.05)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=30)
+
+
+# --- 출력 / 기준선 ---
+
+def print_results(results: dict):
+    print(f"\n{'endpoint':<11}{'count':>8}{'rps':>9}{'err%':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}  statuses")
+    for name, result in results.items():
+        if name == "total":
+            continue
+        print(f"{name:<11}{result['count']:>8}{result['rps']:>9.1f}{result['error_rate'] * 100:>7.1f}"
+              f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['max_ms']:>10.1f}  "
+              + " ".join(f"{status}:{count}" for status, count in result["statuses"].items()))
+    print(f"{'total':<11}{results['total']['count']:>8}{results['total']['rps']:>9.1f}")
+
+
+def baseline_path(name: str) -> Path:
+    path = Path(name)
+    return path if path.suffix == ".json" else BASELINE_DIR / f"{name}.json"
+
+
+def save_baseline(name: str, results: dict, args):
+    path = baseline_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    meta = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "args": {key: value for key, value in vars(args).items() if key not in ("save_baseline", "compare")},
+    }
+    path.write_text(json.dumps({"meta": meta, "results": results}, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"기준선 저장: {path}")
+
+
+LOAD_SHAPE_ARGS = ("users", "mix", "think_ms", "recommend_variety", "gemini_ms", "gemini_ranking_ms", "gemini_malformed_rate", "cse_ms", "page_ms", "bcrypt_rounds")
+
+
+def compare_baseline(name: str, results: dict, args) -> List[str]:
+    # p95/p99가 threshold% 넘게 늘거나, 처리량이 threshold% 넘게 줄거나, 오류율이 1%p 넘게 늘면 회귀로 표시
+    threshold = args.threshold
+    baseline = json.loads(baseline_path(name).read_text(encoding="utf-8"))
+    print(f"\n기준선 비교: {baseline_path(name)} ({baseline['meta']['created_at']})")
+    changed = [key for key in LOAD_SHAPE_ARGS if baseline["meta"]["args"].get(key) != getattr(args, key)]
+    if changed:
+        print(f"주의: 기준선과 부하 조건이 다릅니다 ({', '.join(changed)}). 비교 결과를 그대로 믿기 어렵습니다.")
+    print(f"{'endpoint':<11}{'rps':>16}{'p50 ms':>18}{'p95 ms':>18}{'p99 ms':>18}")
+    regressions = []
+    for name_, current in results.items():
+        before = baseline["results"].get(name_)
+        if name_ == "total" or before is None:
+            continue
+
+        def delta(key: str) -> float:
+            return (current[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+
+        cells = "".join(f"{current[key]:>9.1f}{delta(key):>+8.1f}%" for key in ("rps", "p50_ms", "p95_ms", "p99_ms"))
+        problems = [key for key in ("p95_ms", "p99_ms") if delta(key) > threshold]
+        if delta("rps") < -threshold:
+            problems.append("rps")
+        if current["error_rate"] - before["error_rate"] > 0.01:
+            problems.append("error_rate")
+        print(f"{name_:<11}{cells}  {'REGRESSION: ' + ', '.join(problems) if problems else ''}")
+        regressions += [f"{name_}.{problem}" for problem in problems]
+    return regressions
+
+
+# --- main ---
+
+async def drive(base_url: str, args, images: List[bytes]) -> dict:
+    limits = httpx.Limits(max_connections=args.users + 5, max_keepalive_connections=args.users + 5)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        test = LoadTest(client, args, images)
+        users = [VirtualUser(i, args.seed) for i in range(args.users)]
+        await asyncio.gather(*(test.setup_user(user) for user in users))
+        for user in users[:max(1, min(len(users), 10))]:
+            await test.seed_tips(user, args.seed_tips // min(len(users), 10))
+        print(f"준비 완료: 사용자 {len(users)}명, 팁 {len(test.tip_ids)}개")
+
+        mix = parse_mix(args.mix)
+        stop_at = time.monotonic() + args.warmup + args.duration
+        runners = [asyncio.ensure_future(test.run_user(user, mix, stop_at)) for user in users]
+        await asyncio.sleep(args.warmup)
+        test.recording = True
+        measured_from = time.monotonic()
+        await asyncio.gather(*runners)
+        return test.summary(time.monotonic() - measured_from)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 부하 테스트 (가짜 Gemini/CSE/레시피 사이트 + SQLite)")
+    parser.add_argument("--users", type=int, default=20, help="동시에 요청하는 가상 사용자 수")
+    parser.add_argument("--duration", type=float, default=30, help="측정 시간(초)")
+    parser.add_argument("--warmup", type=float, default=5, help="측정 전 워밍업 시간(초)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"작업별 비중 (기본: {DEFAULT_MIX})")
+    parser.add_argument("--think-ms", type=float, default=0, help="요청 사이 평균 대기 시간(ms, 지수분포)")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--seed-tips", type=int, default=200, help="시작 전에 만들어 둘 팁 수")
+    parser.add_argument("--recommend-variety", type=int, default=30, help="서로 다른 추천 요청 수 (작을수록 캐시 적중이 많음)")
+    parser.add_argument("--images", type=int, default=5, help="업로드에 돌려 쓸 서로 다른 이미지 수")
+    parser.add_argument("--gemini-ms", type=float, default=500, help="가짜 Gemini 키워드 생성 지연 중앙값")
+    parser.add_argument("--gemini-ranking-ms", type=float, default=2000, help="가짜 Gemini 순위화 지연 중앙값")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-malformed-rate", type=float, default=0.0, help="순위화 응답이 중간에 잘리는 비율 (복구 단계 측정)")
+    parser.add_argument("--cse-ms", type=float, default=150, help="가짜 Custom Search 지연 중앙값")
+    parser.add_argument("--page-ms", type=float, default=100, help="로컬 레시피 페이지 서버 지연 중앙값")
+    parser.add_argument("--bcrypt-rounds", type=int, default=None, help="지정하지 않으면 서버가 직접 calibration")
+    parser.add_argument("--database-url", default=None, help="기본값: 임시 SQLite 파일")
+    parser.add_argument("--save-baseline", metavar="NAME", help=f"결과를 기준선으로 저장 ({BASELINE_DIR}/NAME.json 또는 .json 경로)")
+    parser.add_argument("--compare", metavar="NAME", help="저장된 기준선과 비교")
+    parser.add_argument("--threshold", type=float, default=10, help="회귀로 볼 변화율(%%)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="회귀가 있으면 종료 코드 1")
+    args = parser.parse_args()
+    parse_mix(args.mix)
+
+    with tempfile.TemporaryDirectory(prefix="load-test-") as tmp_dir:
+        configure_environment(Path(tmp_dir), args)
+        import backend.main
+        from backend.services.google_clients import reset_google_clients
+
+        pages = RecipePageServer(latency=args.page_ms / 1000, seed=args.seed).start()
+        reset_google_clients(
+            FakeGeminiModel(args.gemini_ms / 1000, args.gemini_ranking_ms / 1000, error_rate=args.gemini_error_rate,
+                            malformed_rate=args.gemini_malformed_rate, seed=args.seed),
+            FakeSearchService(pages.base_url, len(pages.pages), latency=args.cse_ms / 1000, seed=args.seed),
+        )
+        server = ServerThread(backend.main.app)
+        server.start()
+        try:
+            results = asyncio.run(drive(f"http://127.0.0.1:{server.port}", args, make_images(args.images)))
+        finally:
+            server.stop()
+            pages.stop()
+
+    print_results(results)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results, args)
+    if args.compare:
+        regressions = compare_baseline(args.compare, results, args)
+        if regressions and args.fail_on_regression:
+            print(f"회귀 발견: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import random
+from pathlib import Path
+from typing import Dict
+
+# --- 벤치마크용 레시피 페이지 ---
+# 실제 만개의 레시피 페이지를 benchmarks/pages/*.html 로 저장해 두면 그것을 사용하고,
+# 없으면 구조가 비슷한(스크립트/스타일/광고가 많은) 합성 페이지를 만들어 씁니다.
+# 실제 페이지 저장 예: curl -A "Mozilla/5.0" -o backend/benchmarks/pages/6903394.html https://www.10000recipe.com/recipe/6903394
+
+PAGES_DIR = Path(__file__).parent / "pages"
+
+_INGREDIENTS = ["김치", "돼지고기", "두부", "대파", "양파", "계란", "간장", "고춧가루", "설탕", "참기름", "마늘", "애호박"]
+_UNITS = ["1컵", "200g", "1/2모", "1대", "1개", "2큰술", "1작은술", "약간", "3쪽"]
+
+
+def generate_page(seed: int, steps: int = 12, ingredients: int = 10, script_kb: int = 120) -> str:
+    rng = random.Random(seed)
+    scripts = "".join(
+        f"<script>window.__ad{i} = {{slot: 'ad-{i}', data: '{'x' * 1000}'}}; if (a < b && c > d) {{ run(); }}</script>\n"
+        for i in range(script_kb)
+    )
+    styles = "".join(f".c{i} {{ margin: {i}px; }}\n" for i in range(300))
+    nav = "".join(f"<li class='menu'><a href='/m/{i}'>메뉴 {i}</a></li>" for i in range(80))
+    ingredient_items = "".join(
+        f"<li>{rng.choice(_INGREDIENTS)}<span class='ingre_unit'>{rng.choice(_UNITS)}</span>"
+        f"<!-- 구매 링크 --><a href='/shop' class='buy'>구매</a></li>\n"
+        for _ in range(ingredients)
+    )
+    step_items = "".join(
+        f"<div id='stepDiv{i}' class='view_step_cont media step{i}'>"
+        f"<div id='stepdescr{i}' class='media-body'>{rng.choice(_INGREDIENTS)}를(을) 넣고 &amp; {rng.randint(1, 10)}분간 볶아 주세요."
+        f"<br> 불은 중불로 유지합니다.</div><div id='stepimg{i}'><img src='/img/{i}.jpg'></div></div>\n"
+        for i in range(1, steps + 1)
+    )
+    comments = "".join(f"<div class='reply'><p>맛있어요 {i}</p><script>like({i})</script></div>" for i in range(60))
+    return (
+        "<!DOCTYPE html><html lang='ko'><head><meta charset='utf-8'><title>레시피</title>"
+        f"<style>{styles}</style>{scripts}</head><body>"
+        f"<div id='gnb'><ul>{nav}</ul></div>"
+        f"<div class='view2_summary'><h3>집밥 레시피 {seed}번 <em>초간단</em></h3><p>설명</p></div>"
+        "<div class='ready_ingre3' id='divConfirmedMaterialArea'>"
+        f"<ul><b class='ready_ingre3_tt'>[재료]</b>{ingredient_items}</ul></div>"
+        f"<div class='view_step'>{step_items}</div>"
+        f"<div class='view_reply'>{comments}</div>"
+        f"{scripts[:len(scripts) // 4]}</body></html>"
+    )
+
+def load_pages(pages_dir: Path = PAGES_DIR, synthetic: int = 5) -> Dict[str, bytes]:
+    pages = {path.name: path.read_bytes() for path in sorted(pages_dir.glob("*.html"))}
+    if not pages:
+        pages = {f"synthetic-{seed}.html": generate_page(seed).encode("utf-8") for seed in range(synthetic)}
+    return pages
@@ -0,0 +1,165 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+
+# --- 동시 실행 제한 + 공정 대기열 (admission control) ---
+# 비싼 작업(외부 API를 여러 번 부르는 추천 등)이 한 워커에 한없이 쌓이지 않도록 동시에 실행되는 수를 제한합니다.
+# - 한도를 넘는 요청은 키(사용자)별 대기열에 들어가고, 자리가 나면 키를 돌아가며 하나씩 꺼냅니다. (한 사용자가 몰아서
+#   보내도 다른 사용자의 차례를 뺏지 못함)
+# - 전체 대기열이나 그 키의 대기열이 가득 찼거나, 대기 시간이 queue_timeout을 넘으면 기다리지 않고 AdmissionRejected.
+#   retry_after는 현재 대기열 길이와 최근 처리 시간으로 계산한 예상 대기 시간(초)입니다.
+# - 한도는 처리 시간에 맞춰 움직입니다. 최근 처리 시간이 평소(부하가 없을 때)의 tolerance배를 넘으면 줄이고,
+#   그 안이면서 한도를 거의 다 쓰고 있을 때만 늘립니다. 과부하 신호(is_overload, 예: 시간 초과)면 바로 10% 줄입니다.
+# 이벤트 루프 하나에서만 쓰므로 잠금이 없고, 한도/대기열은 워커 프로세스마다 따로입니다.
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, initial_limit: int, min_limit: int, max_limit: int, max_queue: int, max_queue_per_key: int,
+                 queue_timeout: float, tolerance: float = 1.5, smoothing: float = 0.2,
+                 is_overload: Callable[[BaseException], bool] = lambda e: isinstance(e, asyncio.TimeoutError)):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.max_queue_per_key = max_queue_per_key
+        self.queue_timeout = queue_timeout
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.is_overload = is_overload
+        self.running = 0
+        self._queues: "OrderedDict[str, deque[asyncio.Future]]" = OrderedDict()
+        self._queued = 0
+        self._baseline: Optional[float] = None  # 부하가 없을 때의 처리 시간 추정 (느리게 올라가고 바로 내려감)
+        self._recent: Optional[float] = None    # 최근 처리 시간 (빠르게 따라감)
+        self.admitted = 0
+        self.queued_total = 0
+        self.rejected = {"queue_full": 0, "key_queue_full": 0, "queue_timeout": 0}
+        self.overloads = 0
+        self.max_wait = 0.0
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def retry_after(self) -> int:
+        # 지금 줄을 서면 기다릴 시간: (앞에 있는 요청 수 / 동시 실행 수) x 최근 처리 시간
+        latency = self._recent or 1.0
+        return max(1, min(60, math.ceil((self._queued + 1) / max(self.limit, 1) * latency)))
+
+    def _reject(self, reason: str):
+        self.rejected[reason] += 1
+        raise AdmissionRejected(reason, self.retry_after())
+
+    async def _acquire(self, key: str):
+        if self.running < int(self.limit) and not self._queued:
+            self.running += 1
+            self.admitted += 1
+            return
+        if self._queued >= self.max_queue:
+            self._reject("queue_full")
+        queue = self._queues.get(key)
+        if queue is not None and len(queue) >= self.max_queue_per_key:
+            self._reject("key_queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(key, deque()).append(waiter)
+        self._queued += 1
+        self.queued_total += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # 기다리는 중에 요청이 취소됨: 이미 자리를 받았으면 돌려주고, 아니면 대기열에서 뺌
+            if waiter.done():
+                self._release_slot()
+            else:
+                self._remove(key, waiter)
+            raise
+        self.max_wait = max(self.max_wait, time.monotonic() - started)
+        if not waiter.done():
+            self._remove(key, waiter)
+            self._reject("queue_timeout")
+        self.admitted += 1
+
+    def _remove(self, key: str, waiter: asyncio.Future):
+        queue = self._queues.get(key)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self._queued -= 1
+            if not queue:
+                del self._queues[key]
+        waiter.cancel()
+
+    def _dispatch(self):
+        # 자리가 나는 만큼 키를 돌아가며 한 명씩 입장
+        while self._queued and self.running < int(self.limit):
+            key, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            self._queued -= 1
+            if queue:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            self.running += 1
+            waiter.set_result(None)
+
+    def _release_slot(self):
+        self.running -= 1
+        self._dispatch()
+
+    def _adapt(self, latency: float, limit_in_use: bool):
+        self._recent = latency if self._recent is None else self._recent * 0.8 + latency * 0.2
+        if self._baseline is None or self._recent < self._baseline:
+            self._baseline = self._recent
+        else:
+            self._baseline = self._baseline * 0.995 + self._recent * 0.005
+        gradient = max(0.5, min(1.0, self.tolerance * self._baseline / self._recent))
+        # 한도의 절반도 안 쓰고 있으면 처리 시간이 좋아도 늘리지 않음 (쓰지도 않는 한도가 커지는 것 방지)
+        headroom = math.sqrt(self.limit) if limit_in_use else 0.0
+        target = self.limit * gradient + headroom
+        self.limit = max(self.min_limit, min(self.max_limit, self.limit * (1 - self.smoothing) + target * self.smoothing))
+
+    @asynccontextmanager
+    async def slot(self, key: str) -> AsyncIterator[None]:
+        # async with controller.slot(user_key): ...  (자리를 못 받으면 AdmissionRejected)
+        await self._acquire(key)
+        limit_in_use = self.running >= self.limit / 2
+        started = time.monotonic()
+        try:
+            yield
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            if self.is_overload(e):
+                self.overloads += 1
+                self.limit = max(self.min_limit, self.limit * 0.9)
+            raise
+        else:
+            self._adapt(time.monotonic() - started, limit_in_use)
+        finally:
+            self._release_slot()
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "running": self.running,
+            "queued": self._queued,
+            "queued_keys": len(self._queues),
+            "admitted": self.admitted,
+            "queued_total": self.queued_total,
+            "rejected": dict(self.rejected),
+            "overloads": self.overloads,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "baseline_latency_ms": round(self._baseline * 1000, 1) if self._baseline else None,
+            "recent_latency_ms": round(self._recent * 1000, 1) if self._recent else None,
+        }
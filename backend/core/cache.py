@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# --- 메모리 캐시 (TTL + LRU) ---
+# 프로세스 안에서 쓰는 단순한 캐시입니다. 스레드에서 호출해도 안전하도록 lock으로 보호합니다.
+# - 항목마다 만료 시간(TTL)을 따로 줄 수 있습니다. (예: 빈 결과는 짧게 저장하는 negative caching)
+# - 최대 개수를 넘으면 가장 오래 사용되지 않은 항목(LRU)부터 버립니다.
+# - 만료된 항목은 바로 지우지 않고 남겨 두어서, 필요하면 allow_stale=True로 꺼내 쓸 수 있습니다.
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict() # key -> (만료 시각, 값)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None, allow_stale: bool = False) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                if not allow_stale:
+                    self.misses += 1
+                    return default
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def expires_in(self, key: Hashable) -> Optional[float]:
+        # 남은 유효 시간(초, 만료됐으면 음수), 없는 키는 None. 적중/실패 통계에는 넣지 않음
+        with self._lock:
+            item = self._data.get(key)
+        return None if item is None else item[0] - time.monotonic()
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "max_entries": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "evictions": self.evictions,
+        }
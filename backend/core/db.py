@@ -0,0 +1,147 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# --- DB 작업 실행기 ---
+# SQLAlchemy 세션은 동기 API이므로 async 핸들러에서 바로 호출하면 DB 왕복 동안 이벤트 루프 전체가 멈춥니다.
+# DB 작업은 전용 스레드 풀에서 실행하고, 스레드 수를 연결 풀 크기(pool_size + max_overflow)에 맞춰
+# 연결을 기다리며 노는 스레드가 다른 요청의 스레드 풀 자리를 차지하지 않도록 합니다.
+# - 호출한 쪽이 취소되어도 세션을 쓰는 작업이 끝날 때까지 기다린 뒤 취소를 전파합니다.
+#   (그 사이에 get_db가 세션을 닫으면 실행 중인 쿼리와 충돌하므로)
+
+T = TypeVar("T")
+
+
+class DBExecutor:
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = None  # 첫 호출 때 생성 (shutdown 이후 다시 쓰면 새로 생성)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.running = 0
+        self.peak_running = 0
+        self.errors = 0
+        self.total_wait = 0.0  # 실행 스레드를 기다린 시간 합
+        self.total_run = 0.0   # 실제 DB 작업 시간 합
+        self.max_wait = 0.0
+
+    def _call(self, queued_at: float, func: Callable[..., T]) -> T:
+        started = time.perf_counter()
+        with self._lock:
+            waited = started - queued_at
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self.running += 1
+            self.peak_running = max(self.peak_running, self.running)
+        try:
+            return func()
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.total_run += time.perf_counter() - started
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db")
+            executor = self._executor
+            self.calls += 1
+        future = asyncio.get_running_loop().run_in_executor(
+            executor, self._call, time.perf_counter(), call
+        )
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            await asyncio.wait([future])
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = self.calls
+            return {
+                "max_workers": self.max_workers,
+                "calls": calls,
+                "running": self.running,
+                "peak_running": self.peak_running,
+                "errors": self.errors,
+                "avg_wait_ms": round(self.total_wait / calls * 1000, 2) if calls else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+                "avg_run_ms": round(self.total_run / calls * 1000, 2) if calls else 0.0,
+            }
+
+
+# --- 연결 풀 사용량 ---
+# 풀 이벤트로 연결 생성/대여/반납/무효화 횟수를 세고, 현재 대여 중인 연결 수의 최고치를 기록합니다.
+
+
+class PoolMetrics:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        pool = self.engine.pool
+        with self._lock:
+            stats = {
+                "pool_class": type(pool).__name__,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+            }
+        # QueuePool 계열만 크기/오버플로 정보를 제공
+        for name in ("size", "checkedin", "overflow"):
+            method = getattr(pool, name, None)
+            if callable(method):
+                stats[f"pool_{name}"] = method()
+        return stats
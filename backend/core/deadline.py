@@ -0,0 +1,76 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+# --- 요청 마감 시간(deadline)과 헤징(hedging) ---
+# Deadline: 요청 전체에 허용된 시간. 각 단계는 '단계 예산'과 '남은 시간' 중 작은 값만큼만 기다립니다.
+# LatencyTracker: 최근 호출 시간들로 p95를 계산합니다.
+# hedged: 첫 시도가 p95보다 오래 걸리면 두 번째 시도를 시작하고, 먼저 성공한 결과를 사용합니다.
+
+T = TypeVar("T")
+
+
+class Deadline:
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def budget(self, stage_seconds: float) -> float:
+        return min(stage_seconds, self.remaining())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class LatencyTracker:
+    def __init__(self, default: float, window: int = 200, min_samples: int = 20):
+        self.default = default # 표본이 적을 때 사용할 p95 추정값
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def p95(self) -> float:
+        if len(self._samples) < self.min_samples:
+            return self.default
+        ordered = sorted(self._samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+
+async def hedged(primary: Callable[[], Awaitable[T]], backup: Optional[Callable[[], Awaitable[T]]],
+                 delay: float, is_success: Callable[[T], bool] = lambda result: result is not None) -> Optional[T]:
+    # primary가 delay 안에 끝나지 않거나 실패하면 backup을 시작해서, 먼저 성공한 쪽을 반환 (나머지는 취소)
+    # 둘 다 실패하면 마지막 결과를 반환하고, 모두 예외였다면 마지막 예외를 다시 발생시킴
+    tasks = [asyncio.ensure_future(primary())]
+    pending = set(tasks)
+    backup_started = backup is None
+    errors = []
+    result = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=None if backup_started else delay, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is not None:
+                    errors.append(task.exception())
+                elif is_success(task.result()):
+                    return task.result()
+                else:
+                    result = task.result()
+            if not backup_started and (not done or not pending): # 느리거나 실패함
+                backup_task = asyncio.ensure_future(backup())
+                tasks.append(backup_task)
+                pending.add(backup_task)
+                backup_started = True
+        if len(errors) == len(tasks):
+            raise errors[-1]
+        return result
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,63 @@
+import json
+from typing import Any, List
+
+# --- 점진적 JSON 배열 파서 ---
+# LLM이 '[{...}, {...}, ...]' 형태의 JSON 배열을 조금씩 생성할 때,
+# 배열의 원소(객체) 하나가 완전히 닫히는 즉시 꺼낼 수 있도록 문자 단위로 상태를 추적합니다.
+# '```json' 같은 앞부분 텍스트는 첫 '['가 나올 때까지 무시합니다.
+# 괄호는 맞지만 JSON으로 읽을 수 없는 원소는 건너뛰고 errors에 남깁니다. (같은 조각 안의 앞뒤 원소는 그대로 반환)
+
+
+class JsonArrayStreamParser:
+    def __init__(self):
+        self._started = False    # 최상위 '['를 만났는지
+        self._finished = False   # 최상위 ']'를 만났는지
+        self._depth = 0          # 현재 원소 안에서의 중첩 깊이
+        self._in_string = False
+        self._escape = False
+        self._current: List[str] = []
+        self.errors: List[ValueError] = []
+
+    def feed(self, text: str) -> List[Any]:
+        completed = []
+        for ch in text:
+            if self._finished:
+                break
+            if not self._started:
+                if ch == "[":
+                    self._started = True
+                continue
+            if self._depth == 0:
+                # 원소 사이의 공백, 쉼표 등은 건너뜀
+                if ch == "{":
+                    self._depth = 1
+                    self._current = [ch]
+                elif ch == "]":
+                    self._finished = True
+                continue
+
+            self._current.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        completed.append(json.loads("".join(self._current)))
+                    except ValueError as e:
+                        self.errors.append(e)
+                    self._current = []
+        return completed
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
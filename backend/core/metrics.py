@@ -0,0 +1,310 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# --- 요청/단계별 계측 ---
+# Prometheus 텍스트 형식(/metrics)으로 내보내는 카운터/히스토그램과, 응답마다 붙이는 Server-Timing 헤더를 제공합니다.
+# - 요청마다 RequestMetrics 하나를 contextvar에 두고, 같은 요청에서 실행되는 코드(스레드 포함, to_thread/run_db는
+#   context를 복사함)가 단계 시간과 DB 쿼리 수/시간을 여기에 더합니다.
+# - 단계 시간은 route 라벨과 함께 히스토그램에도 기록됩니다. route는 실제 경로가 아닌 라우트 템플릿이라 라벨 수가 늘지 않습니다.
+# - 값 하나를 기록하는 비용은 잠금 한 번 + 버킷 이분 탐색 정도라서 운영에서 켜 두어도 됩니다.
+# Server-Timing은 응답 헤더를 보내는 순간까지의 값입니다. (스트리밍 응답은 헤더 이후의 단계가 빠짐)
+# 동시에 실행되는 단계(키워드별 검색/크롤링 등)는 시간을 합산하므로 요청 전체 시간보다 클 수 있습니다.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}" for labels, value in items]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # 라벨 값 -> [버킷별 개수(누적 아님)..., +Inf 개수, 합계]
+        self._values: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def count(self, *labels: str) -> int:
+        counts = self._values.get(labels)
+        return int(sum(counts[:-1])) if counts else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, list(counts)) for labels, counts in self._values.items())
+        lines = []
+        for labels, counts in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts[:-1]):
+                cumulative += count
+                le = _format_labels(self.label_names, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class GaugeCallback:
+    # 값을 따로 저장하지 않고 /metrics를 읽을 때 callback으로 현재 값을 가져옴 (풀 사용량 등)
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, callback: Callable[[], float]):
+        self.name = name
+        self.help = help
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        try:
+            return [f"{self.name} {_format_value(self.callback())}"]
+        except Exception as e:
+            print(f"metrics gauge 오류 ({self.name}): {e}")
+            return []
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, callback: Callable[[], float]) -> GaugeCallback:
+        return self.register(GaugeCallback(name, help, callback))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP 요청 처리 시간", ("route", "method", "status"))
+stage_seconds = registry.histogram(
+    "pipeline_stage_duration_seconds", "요청 안의 단계별 처리 시간", ("route", "stage"))
+upstream_requests = registry.counter(
+    "upstream_requests_total", "외부 API/사이트 호출 결과별 횟수", ("upstream", "outcome"))
+upstream_retries = registry.counter(
+    "upstream_retries_total", "느리거나 실패한 호출의 재시도(헤징) 횟수", ("upstream",))
+db_query_seconds = registry.histogram(
+    "db_query_duration_seconds", "DB 쿼리 실행 시간", ("route",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+db_queries_per_request = registry.histogram(
+    "db_queries_per_request", "요청 하나가 실행한 DB 쿼리 수", ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50))
+
+
+# --- 요청 단위 기록 ---
+
+class RequestMetrics:
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self._route: Optional[str] = None
+        self._lock = threading.Lock()  # DB 쿼리는 실행 스레드에서 기록됨
+
+    @property
+    def route(self) -> str:
+        # 라우팅이 끝난 뒤에는 바뀌지 않으므로 한 번만 계산
+        if self._route is None:
+            if "route" not in self.scope:
+                return route_label(self.scope)
+            self._route = route_label(self.scope)
+        return self._route
+
+    def add_stage(self, name: str, seconds: float):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_query(self, seconds: float):
+        with self._lock:
+            self.db_queries += 1
+            self.db_seconds += seconds
+
+    def server_timing(self) -> str:
+        with self._lock:
+            entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+            if self.db_queries:
+                entries.append(f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries"')
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current: contextvars.ContextVar[Optional[RequestMetrics]] = contextvars.ContextVar("request_metrics", default=None)
+
+
+def current_request() -> Optional[RequestMetrics]:
+    return _current.get()
+
+
+def route_label(scope: Scope) -> str:
+    # 매칭된 라우트 템플릿(/api/tips/{tip_id}), 매칭되지 않은 요청은 하나로 묶음
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    # FastAPI 버전에 따라 include_router가 prefix를 붙인 라우트 복사본을 등록하기도 하고(route.path = /api/tips/{tip_id}),
+    # 원래 라우트를 그대로 두고 prefix는 라우터에서 처리하기도 함(route.path = /{tip_id}).
+    # 뒤의 경우에는 템플릿이 실제 경로 전체와 맞지 않으므로, 템플릿과 맞는 뒷부분을 찾아 그 앞(prefix)을 붙임
+    path = scope.get("path", "")
+    regex = getattr(route, "path_regex", None)
+    if regex is not None and not regex.match(path):
+        for i in range(1, len(path)):
+            if path[i] == "/" and regex.match(path[i:]):
+                return path[:i] + template
+    return template
+
+
+def observe_stage(name: str, seconds: float):
+    request = _current.get()
+    stage_seconds.observe(seconds, request.route if request else "background", name)
+    if request is not None:
+        request.add_stage(name, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    # with stage("crawl"): ...  (async 코드 안에서도 그대로 사용, 예외로 끝나도 시간은 기록)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - started)
+
+
+def record_upstream(upstream: str, outcome: str):
+    upstream_requests.inc(upstream, outcome)
+
+
+# --- DB 쿼리 계측 ---
+
+def instrument_engine(engine: Engine):
+    # 쿼리마다 실행 시간을 기록하고, 요청 안에서 실행된 쿼리는 요청별 수/시간에도 더함
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_started"].pop()
+        request = _current.get()
+        db_query_seconds.observe(seconds, request.route if request else "background")
+        if request is not None:
+            request.add_query(seconds)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+
+
+# --- ASGI 미들웨어 ---
+
+class MetricsMiddleware:
+    # BaseHTTPMiddleware를 쓰지 않는 순수 ASGI 미들웨어 (스트리밍 응답을 버퍼링하지 않고, 요청마다 추가 태스크를 만들지 않음)
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestMetrics(scope)
+        token = _current.set(request)
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", request.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = request.route
+            http_request_seconds.observe(time.perf_counter() - request.started, route, scope["method"], str(status))
+            db_queries_per_request.observe(request.db_queries, route)
@@ -0,0 +1,97 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, TypeVar
+
+# --- 프로세스 풀 (CPU 작업용) ---
+# 해싱처럼 CPU를 오래 쓰는 작업은 스레드로 옮겨도 GIL과 코어 수에 막히므로 별도 프로세스에서 실행합니다.
+# - 실행 중 + 대기 중인 작업이 max_pending을 넘으면 큐에 쌓지 않고 바로 PoolSaturated를 던집니다.
+#   (호출한 쪽에서 503 등으로 응답해 클라이언트가 잠시 뒤 재시도하도록)
+# - 워커는 spawn으로 띄워 부모의 스레드/락 상태를 물려받지 않습니다. 실행할 함수는 모듈 최상위 함수여야 합니다.
+# - 호출한 쪽이 취소되어도 이미 워커에서 실행 중인 작업은 끝까지 실행되며, 끝날 때까지 대기 수에 포함됩니다.
+# - 워커 프로세스가 죽어 풀이 깨지면 다음 호출 때 새로 만듭니다.
+
+T = TypeVar("T")
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+class BoundedProcessPool:
+    def __init__(self, max_workers: int, max_pending: int, name: str = "process"):
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self.name = name
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.peak_pending = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.failed = 0
+        self.total_wait = 0.0  # 제출부터 완료까지 걸린 시간 합
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _done(self, started: float, future):
+        # 작업 완료 콜백 (풀 관리 스레드에서 호출될 수 있음)
+        with self._lock:
+            self.pending -= 1
+            self.total_wait += time.perf_counter() - started
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+
+    def _submit(self, func: Callable[..., T], *args: Any):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PoolSaturated(f"{self.name} pool is saturated ({self.pending} pending)")
+            try:
+                future = self._get_executor().submit(func, *args)
+            except BrokenProcessPool:
+                self._executor = None
+                future = self._get_executor().submit(func, *args)
+            self.submitted += 1
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        future.add_done_callback(lambda f, started=time.perf_counter(): self._done(started, f))
+        return future
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        future = self._submit(func, *args)
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            completed = self.submitted - self.pending
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "peak_pending": self.peak_pending,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "avg_latency_ms": round(self.total_wait / completed * 1000, 2) if completed else 0.0,
+            }
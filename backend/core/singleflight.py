@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+# --- 동일 요청 합치기 (single-flight) ---
+# 같은 키의 작업이 이미 실행 중이면 새로 시작하지 않고, 실행 중인 작업의 결과를 함께 기다립니다.
+# - 작업에서 발생한 예외는 기다리던 모든 호출자에게 그대로 전달됩니다.
+# - 호출자 한 명이 취소되어도(클라이언트 연결 끊김 등) 다른 호출자가 남아 있으면 작업은 계속됩니다.
+#   마지막 호출자까지 취소되면 그때 작업도 취소합니다.
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self.leaders = 0    # 실제로 작업을 시작한 횟수
+        self.coalesced = 0  # 실행 중인 작업에 합류한 횟수
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+            self._calls[key] = call
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            # shield: 이 호출자가 취소되어도 공유 작업 자체는 취소되지 않음
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # 완료 콜백은 다음 루프 차례에 실행되므로, 그 사이에 온 호출자가 취소된 작업에 합류하지 않도록 먼저 뺌
+                self._forget(key, call)
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), "leaders": self.leaders, "coalesced": self.coalesced}
@@ -0,0 +1,118 @@
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+from typing import Callable, List, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from backend.core.cache import TTLCache
+
+# --- 캐시 친화적인 정적 파일 서빙 ---
+# StaticFiles(Range, 304 처리는 그대로 사용)에 캐시 헤더와 변형 파일 선택을 더합니다.
+# - 파일 이름이 내용 해시로 시작하면(예: profile/<해시>_256.webp) 내용이 절대 바뀌지 않으므로
+#   Cache-Control: immutable(1년)과 파일 이름 기반의 strong ETag를 붙입니다.
+# - 그 외 파일은 짧게 캐시하고(STATIC_MAX_AGE) 내용 해시로 만든 strong ETag로 재검증(304)합니다.
+#   해시는 (경로, 수정 시각, 크기)별로 한 번만 계산해서 보관합니다.
+# - 압축 가능한 파일은 미리 압축된 .br / .gz 파일이 있으면 Accept-Encoding에 맞춰 그 파일을 보냅니다.
+# - variant_resolver가 주어지면 요청(Accept, ?w=)에 맞는 다른 파일(예: 작은 WebP)을 먼저 찾아봅니다.
+
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", 300))
+STATIC_IMMUTABLE_MAX_AGE = 31536000
+STATIC_ETAG_CACHE_MAX_ENTRIES = int(os.getenv("STATIC_ETAG_CACHE_MAX_ENTRIES", 5000))
+
+HASHED_NAME = re.compile(r"^[0-9a-f]{16,64}(?=[_.])")
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml", "application/xml")
+
+# (요청 경로, 요청 헤더, 쿼리) -> (대신 보낼 파일 경로 또는 None, 선택에 영향을 준 요청 헤더 이름 또는 None)
+VariantResolver = Callable[[str, Headers, QueryParams], Tuple[Optional[str], Optional[str]]]
+
+
+def _accepts_encoding(accept_encoding: str, encoding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == encoding and params.replace(" ", "") != "q=0":
+            return True
+    return False
+
+
+class CachedStaticFiles(StaticFiles):
+    def __init__(self, *args, variant_resolver: Optional[VariantResolver] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.variant_resolver = variant_resolver
+        self._etags = TTLCache(STATIC_ETAG_CACHE_MAX_ENTRIES, ttl=24 * 3600)
+
+    def _candidates(self, path: str, headers: Headers, query: QueryParams) -> Tuple[List[Tuple[str, Optional[str]]], List[str]]:
+        # 보낼 후보 파일 [(경로, Content-Encoding)]을 우선순위대로, 그리고 응답의 Vary 헤더 목록
+        candidates = []
+        vary = []
+        if self.variant_resolver is not None:
+            variant, varies_on = self.variant_resolver(path, headers, query)
+            if variant is not None:
+                candidates.append((variant, None))
+            if varies_on:
+                vary.append(varies_on)
+
+        media_type = mimetypes.guess_type(path)[0] or ""
+        if media_type.startswith(COMPRESSIBLE_TYPES):
+            vary.append("Accept-Encoding")
+            accept_encoding = headers.get("accept-encoding", "")
+            for encoding, suffix in PRECOMPRESSED:
+                if _accepts_encoding(accept_encoding, encoding):
+                    candidates.append((path + suffix, encoding))
+        candidates.append((path, None))
+        return candidates, vary
+
+    def _content_etag(self, full_path: str, stat_result: os.stat_result) -> str:
+        key = (full_path, stat_result.st_mtime_ns, stat_result.st_size)
+        etag = self._etags.get(key)
+        if etag is None:
+            digest = hashlib.sha256()
+            with open(full_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 16), b""):
+                    digest.update(chunk)
+            etag = f'"{digest.hexdigest()[:32]}"'
+            self._etags.set(key, etag)
+        return etag
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        headers = Headers(scope=scope)
+        candidates, vary = self._candidates(path, headers, QueryParams(scope.get("query_string", b"")))
+        for candidate, encoding in candidates:
+            try:
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, candidate)
+            except (OSError, ValueError):
+                continue
+            if not stat_result or not stat.S_ISREG(stat_result.st_mode):
+                continue
+
+            name = os.path.basename(candidate)
+            response_headers = {}
+            if HASHED_NAME.match(name):
+                response_headers["cache-control"] = f"public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable"
+                response_headers["etag"] = f'"{name}"'
+            else:
+                response_headers["cache-control"] = f"public, max-age={STATIC_MAX_AGE}"
+                response_headers["etag"] = await anyio.to_thread.run_sync(self._content_etag, full_path, stat_result)
+            if encoding is not None:
+                response_headers["content-encoding"] = encoding
+            if vary:
+                response_headers["vary"] = ", ".join(vary)
+
+            # Content-Type: 압축 파일은 원본 파일의 형식, 변형 파일은 변형 파일 자체의 형식
+            media_type = mimetypes.guess_type(path if encoding else candidate)[0]
+            response = FileResponse(full_path, stat_result=stat_result, headers=response_headers, media_type=media_type)
+            if self.is_not_modified(response.headers, headers):
+                return NotModifiedResponse(response.headers)
+            return response
+
+        return await super().get_response(path, scope)
@@ -0,0 +1,171 @@
+import asyncio
+import contextvars
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# --- 인기 요청 기록 + 미리 데우기 작업자 ---
+# 점심/저녁처럼 시간대별로 자주 들어오는 요청은 거의 같아서, 캐시가 식은 상태로 첫 사용자를 받지 않도록 미리 계산해 둡니다.
+# - PopularityTracker: 키(정규화된 요청)별 요청 수를 시간대(0~23시)별로 세고, 오래된 기록은 half_life마다 절반으로 줄임
+#   어제 12시에 많이 들어온 요청은 오늘 11시대에 '곧 인기 있을 요청'으로 뽑힙니다.
+# - WarmupWorker: interval마다 앞으로 lookahead 시간 동안 인기 있을 키를 뽑아 warm(key, payload)을 concurrency개씩 실행
+#   warm은 결과(outcome) 문자열을 돌려주고, 외부 호출 할당량/혼잡 여부 판단은 warm 쪽에서 합니다.
+# - 작업자가 실행하는 코드 안에서는 warming()이 True라서, 캐시 조회 쪽이 '곧 만료될 항목'도 새로 받아 오도록 할 수 있습니다.
+# 기록과 캐시가 모두 프로세스 메모리에 있으므로 워커 프로세스마다 따로 동작합니다.
+
+_warming: contextvars.ContextVar[bool] = contextvars.ContextVar("warming", default=False)
+
+
+def warming() -> bool:
+    return _warming.get()
+
+
+class PopularityTracker:
+    def __init__(self, max_entries: int, half_life: float, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.half_life = half_life
+        self.clock = clock
+        # key -> [payload, 시간대별 점수(24개), 마지막으로 감쇠를 반영한 시각]
+        self._entries: Dict[Hashable, list] = {}
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.evictions = 0
+
+    def _decay(self, entry: list, now: float):
+        factor = 0.5 ** ((now - entry[2]) / self.half_life)
+        entry[1] = [score * factor for score in entry[1]]
+        entry[2] = now
+
+    def record(self, key: Hashable, payload: Any):
+        now = self.clock()
+        hour = time.localtime(now).tm_hour
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_entries:
+                    self._evict(now)
+                entry = self._entries[key] = [payload, [0.0] * 24, now]
+            else:
+                self._decay(entry, now)
+            entry[1][hour] += 1
+            self.recorded += 1
+
+    def _evict(self, now: float):
+        # 가득 차면 점수가 낮은 10%를 한 번에 버림 (요청마다 전체를 훑지 않도록)
+        for entry in self._entries.values():
+            self._decay(entry, now)
+        ranked = sorted(self._entries, key=lambda key: sum(self._entries[key][1]))
+        for key in ranked[:max(1, len(ranked) // 10)]:
+            del self._entries[key]
+            self.evictions += 1
+
+    def top(self, n: int, hours: Iterable[int], min_score: float) -> List[Tuple[Hashable, Any, float]]:
+        # 주어진 시간대들의 (감쇠된) 요청 수 합이 큰 순서로 n개
+        now = self.clock()
+        hours = list(hours)
+        with self._lock:
+            scored = []
+            for key, entry in self._entries.items():
+                self._decay(entry, now)
+                score = sum(entry[1][hour] for hour in hours)
+                if score >= min_score * 0.99:  # 방금 들어온 요청도 감쇠 때문에 정수보다 아주 조금 작음
+                    scored.append((key, entry[0], score))
+        scored.sort(key=lambda item: item[2], reverse=True)
+        return scored[:n]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {"tracked": len(self._entries), "max_entries": self.max_entries,
+                "recorded": self.recorded, "evictions": self.evictions}
+
+
+class WarmupWorker:
+    def __init__(self, tracker: PopularityTracker, warm: Callable[[Hashable, Any], Awaitable[str]],
+                 concurrency: int, interval: float, top_n: int, min_score: float,
+                 lookahead: float = 3600, initial_delay: float = 60):
+        self.tracker = tracker
+        self.warm = warm
+        self.concurrency = concurrency
+        self.interval = interval
+        self.top_n = top_n
+        self.min_score = min_score
+        self.lookahead = lookahead
+        self.initial_delay = initial_delay
+        self.running = 0
+        self.cycles = 0
+        self.outcomes: Dict[str, int] = {}
+        self.last_cycle_at: Optional[float] = None
+        self.last_cycle_seconds: Optional[float] = None
+        self.last_candidates = 0
+
+    def upcoming_hours(self) -> List[int]:
+        # 지금 시간대부터 lookahead 안에 시작하는 시간대까지
+        now = self.tracker.clock()
+        return sorted({time.localtime(now + offset).tm_hour for offset in range(0, int(self.lookahead) + 1, 3600)})
+
+    async def _run_job(self, key: Hashable, payload: Any):
+        _warming.set(True)  # 이 작업의 태스크(와 여기서 만든 스레드 작업)에만 적용됨
+        self.running += 1
+        try:
+            outcome = await self.warm(key, payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"미리 데우기 오류 ({key}): {e!r}")
+            outcome = "error"
+        finally:
+            self.running -= 1
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    async def run_once(self) -> int:
+        # 한 번의 주기: 후보를 뽑아서 concurrency개의 작업자가 나눠 실행, 후보 수를 반환
+        started = time.monotonic()
+        candidates = self.tracker.top(self.top_n, self.upcoming_hours(), self.min_score)
+        queue: asyncio.Queue = asyncio.Queue()
+        for key, payload, _ in candidates:
+            queue.put_nowait((key, payload))
+
+        async def worker():
+            while not queue.empty():
+                key, payload = queue.get_nowait()
+                await self._run_job(key, payload)
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, len(candidates)))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:  # 종료(취소) 시 실행 중인 작업도 함께 정리
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        self.cycles += 1
+        self.last_cycle_at = time.time()
+        self.last_cycle_seconds = time.monotonic() - started
+        self.last_candidates = len(candidates)
+        return len(candidates)
+
+    async def run(self):
+        # lifespan에서 백그라운드 작업으로 실행 (취소하면 실행 중인 작업까지 정리하고 끝남)
+        await asyncio.sleep(self.initial_delay)
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"미리 데우기 주기 오류: {e!r}")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            **self.tracker.stats(),
+            "concurrency": self.concurrency,
+            "interval_sec": self.interval,
+            "running": self.running,
+            "cycles": self.cycles,
+            "last_cycle_at": self.last_cycle_at,
+            "last_cycle_ms": round(self.last_cycle_seconds * 1000, 1) if self.last_cycle_seconds is not None else None,
+            "last_candidates": self.last_candidates,
+            "outcomes": dict(self.outcomes),
+        }
@@ -1,28 +1,70 @@
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from backend.routers import recommend, mypage, tips
 from backend.auth import auth
-from backend.auth.auth import engine, Base, User # 데이터베이스 엔진과 Base 모델, User 모델 가져오기
-from backend.routers.tips import RecipeTip # RecipeTip 모델 가져오기
+from backend.auth.auth import db_executor, read_db_stats, run_db
+from backend.services.http_client import close_http_client
+from backend.services.google_clients import init_google_clients
+from backend.auth import hashing
+from backend.services.image_pipeline import image_pool, select_profile_variant
+from backend.core.static_files import CachedStaticFiles
+from backend.core.metrics import MetricsMiddleware, PROMETHEUS_CONTENT_TYPE, registry
+from backend.services.recipe_corpus import recipe_index
+from backend.schema import AUTO_CREATE_SCHEMA, ensure_schema
 
-# 데이터베이스 테이블 생성
-# 애플리케이션이 시작될 때, User 모델에 정의된 스키마를 바탕으로
-# 데이터베이스에 'users' 테이블이 없으면 새로 생성합니다.
-print("Attempting to drop and recreate database tables...")
-RecipeTip.__table__.drop(engine, checkfirst=True)
-Base.metadata.create_all(bind=engine)
-print("Database tables created (if not already existing).")
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
 
-app = FastAPI()
+# import 시점에는 DB 작업이나 네트워크 요청을 하지 않습니다. (워커/리로드마다 반복되지 않도록)
+# 테이블 생성은 backend/schema.py (python -m backend.schema 또는 AUTO_CREATE_SCHEMA=1이면 시작 시 한 번)
+
+async def calibrate_password_hashing():
+    # bcrypt cost를 이 서버의 해싱 워커 속도에 맞춰 결정 (해싱 프로세스 풀도 미리 띄워짐)
+    # 끝나기 전의 로그인은 기본 cost를 사용하므로 서버 준비를 기다리게 하지 않음
+    try:
+        await hashing.calibrate()
+    except Exception as e:
+        print(f"bcrypt cost calibration 실패, 기본값 {hashing.current_rounds} 사용: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if AUTO_CREATE_SCHEMA:
+        await run_db(ensure_schema)
+    # Gemini/Custom Search 클라이언트 초기화 (SDK import가 무거워서 스레드에서 실행)
+    await asyncio.to_thread(init_google_clients)
+    calibration = asyncio.create_task(calibrate_password_hashing())
+    # 로컬 레시피 코퍼스를 배치 단위로 읽어 역색인을 만들고, 이후에도 주기적으로 새 레시피를 반영
+    corpus_loader = asyncio.create_task(recipe_index.run_loader())
+    # 자주 들어오는 추천 요청을 인기 시간대 전에 미리 계산 (검색/크롤링 캐시도 만료 전에 갱신)
+    warmer = asyncio.create_task(recommend.recommend_warmer.run()) if recommend.WARMUP_ENABLED else None
+    # 아무 사용자도 쓰지 않는 프로필 이미지 변형 파일을 주기적으로 삭제
+    image_sweeper = asyncio.create_task(mypage.run_profile_image_sweeper())
+    yield
+    calibration.cancel()
+    corpus_loader.cancel()
+    image_sweeper.cancel()
+    if warmer is not None:
+        # 실행 중인 작업이 취소되고 정리될 때까지 기다린 뒤에 HTTP 클라이언트/실행 풀을 닫음
+        warmer.cancel()
+        await asyncio.gather(warmer, return_exceptions=True)
+    # 서버 종료 시 공유 HTTP 클라이언트의 연결 풀 정리
+    await close_http_client()
+    db_executor.shutdown()
+    hashing.hash_pool.shutdown()
+    image_pool.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 from pathlib import Path
 
 # ... (other imports)
 
 # 정적 파일 마운트
+# 해시 이름 파일은 immutable 캐시, 나머지는 ETag 재검증 / 프로필 이미지는 Accept와 ?w=에 맞는 WebP 크기로 응답
 static_files_path = Path(__file__).parent.parent / "static"
-app.mount("/static", StaticFiles(directory=static_files_path), name="static")
+app.mount("/static", CachedStaticFiles(directory=static_files_path, variant_resolver=select_profile_variant), name="static")
 
 
 # CORS 설정
@@ -34,8 +76,23 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# 요청/단계별 시간, DB 쿼리 수 계측 (/metrics, Server-Timing 헤더). 가장 바깥에서 전체 처리 시간을 잼
+app.add_middleware(MetricsMiddleware, server_timing=SERVER_TIMING)
+
 # 라우터 등록
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(recommend.router, prefix="/recipes", tags=["Recipes"])
 app.include_router(mypage.router, prefix="/mypage", tags=["My Page"])
-app.include_router(tips.router, prefix="/api/tips", tags=["Tips"])
\ No newline at end of file
+app.include_router(tips.router, prefix="/api/tips", tags=["Tips"])
+
+
+@app.get("/stats/db", include_in_schema=False)
+async def db_stats():
+    # 연결 풀 / DB 실행 스레드 사용량 (풀 크기 튜닝용)
+    return read_db_stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Prometheus 수집용 (텍스트 형식)
+    return Response(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
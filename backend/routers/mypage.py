@@ -1,14 +1,45 @@
-from fastapi import APIRouter, Depends, File, UploadFile
+import asyncio
+from typing import List
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
 from sqlalchemy.orm import Session
-import shutil
-import os
-from PIL import Image
 
 # auth.py에서 필요한 의존성 및 스키마를 가져옵니다.
-from backend.auth.auth import get_current_user, UserInDB, get_db, User
+from backend.auth.auth import get_current_user, UserInDB, get_db, User, SessionLocal, run_db, save_user
+from backend.core.process_pool import PoolSaturated
+from backend.services.image_pipeline import (
+    PROFILE_IMAGE_MAX_BYTES, PROFILE_IMAGE_SWEEP_INTERVAL, PROFILE_IMAGE_URL_PREFIX, ImageRejected, ImageTooLarge,
+    remove_legacy_image, store_profile_image, sweep_profile_images,
+)
 
 router = APIRouter()
 
+# --- 쓰지 않는 프로필 이미지 정리 ---
+
+def load_profile_image_urls() -> List[str]:
+    db = SessionLocal()
+    try:
+        rows = db.query(User.profile_image_url).filter(User.profile_image_url.like(PROFILE_IMAGE_URL_PREFIX + "%"))
+        return [url for (url,) in rows]
+    finally:
+        db.close()
+
+async def sweep_unused_profile_images() -> int:
+    # 내용 해시로 저장한 변형 파일은 여러 사용자가 함께 쓸 수 있어서, 이미지를 바꿀 때가 아니라 여기서 한꺼번에 지움
+    urls = await run_db(load_profile_image_urls)
+    return await asyncio.to_thread(sweep_profile_images, urls)
+
+async def run_profile_image_sweeper():
+    # lifespan에서 백그라운드 작업으로 실행
+    while True:
+        await asyncio.sleep(PROFILE_IMAGE_SWEEP_INTERVAL)
+        try:
+            removed = await sweep_unused_profile_images()
+            if removed:
+                print(f"쓰지 않는 프로필 이미지 파일 {removed}개 삭제")
+        except Exception as e:
+            print(f"프로필 이미지 정리 오류: {e!r}")
+
 # --- API 엔드포인트 ---
 
 @router.get("/me", response_model=UserInDB)
@@ -21,27 +52,27 @@ async def upload_profile_image(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    static_dir = "static"
-    os.makedirs(static_dir, exist_ok=True)
+    # 크기 제한보다 1바이트 더 읽어서, 넘는 파일은 전부 읽지 않고 거절
+    data = await file.read(PROFILE_IMAGE_MAX_BYTES + 1)
 
-    # Convert image to PNG
-    image = Image.open(file.file)
-    if image.mode != 'RGB':
-        image = image.convert('RGB')
-        
-    # Change file extension to .png
-    file_name, _ = os.path.splitext(file.filename)
-    new_filename = f"{current_user.id}_{file_name}.png"
-    file_path = os.path.join(static_dir, new_filename)
-
-    image.save(file_path, 'PNG')
-
-    file_url = f"/static/{new_filename}"
+    # 64/256/512 WebP + JPEG 변환은 프로세스 풀에서 (같은 이미지는 기존 파일 재사용)
+    try:
+        file_url = await store_profile_image(data)
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except ImageRejected as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except PoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many image uploads in progress. Please retry shortly.",
+            headers={"Retry-After": "2"},
+        )
 
+    previous_url = current_user.profile_image_url
     current_user.profile_image_url = file_url
-    db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
-
-    return current_user
-
+    user = await run_db(save_user, db, current_user)
+    # 예전 방식({id}_{이름}.png) 파일은 이 사용자만 쓰므로 새 URL이 저장된 뒤 바로 지움 (해시 파일은 정리 작업에서)
+    if previous_url and previous_url != file_url:
+        await asyncio.to_thread(remove_legacy_image, previous_url, user.id)
+    return user
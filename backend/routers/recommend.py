@@ -1,15 +1,36 @@
 import os
-import requests
 import json
-import google.generativeai as genai
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
-from dotenv import load_dotenv
-from bs4 import BeautifulSoup
-from googleapiclient.discovery import build
+import time
+import asyncio
+import threading
+import httplib2
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import AsyncIterator, List, Optional, Tuple
+from backend.core.admission import AdmissionController, AdmissionRejected
+from backend.core.deadline import Deadline, LatencyTracker, hedged
+from backend.core.json_stream import JsonArrayStreamParser
+from backend.core.metrics import registry, stage, observe_stage, record_upstream, upstream_retries
+from backend.core.singleflight import SingleFlight
+from backend.core.warmup import PopularityTracker, WarmupWorker, warming
+from backend.auth.auth import get_request_subject
+from backend.services.http_client import fetch
+from backend.services.google_clients import GOOGLE_CSE_ID, get_gemini_model, get_search_service, gemini_response_schema
+from backend.services.crawl_cache import crawl_cache
+from backend.services.prompt_builder import (
+    render_request_block, build_keyword_prompt, build_ranking_prompt, build_repair_prompt, synthesize_keywords, log_token_usage,
+)
+from backend.services.recipe_corpus import recipe_index
+from backend.services.recipe_extractor import extract_recipe_fields
+from backend.services.recommend_cache import recommend_cache, canonicalize_request, request_cache_key
+from backend.services.search_cache import (
+    search_cache, search_quota, normalize_query, QuotaAccountant, SEARCH_CACHE_NEGATIVE_TTL, CSE_DAILY_QUOTA, QUOTA_DB_PATH,
+)
 
 router = APIRouter()
+recommend_flights = SingleFlight()
 
 class Recipe(BaseModel):
     name: str
@@ -31,153 +52,671 @@ class RecommendationRequest(BaseModel):
     avoid_keywords: Optional[List[str]] = []
 
 # --- API 및 모델 설정 ---
-try:
-    dotenv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.env')
-    load_dotenv(dotenv_path=dotenv_path)
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-    GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
-
-    if not all([GEMINI_API_KEY, GOOGLE_API_KEY, GOOGLE_CSE_ID]):
-        raise ValueError("하나 이상의 필수 환경 변수가 설정되지 않았습니다.")
-
-    genai.configure(api_key=GEMINI_API_KEY)
-    gemini_model = genai.GenerativeModel('gemini-2.5-flash')
-    google_search_service = build("customsearch", "v1", developerKey=GOOGLE_API_KEY)
-    print("API 및 모델 초기화 성공 (recommend.py)")
-
-except Exception as e:
-    print(f"API 초기화 오류 (recommend.py): {e}")
-    gemini_model = None
-    google_search_service = None
+# Gemini 모델과 Custom Search 서비스는 backend/services/google_clients.py에서 처음 사용할 때 초기화 (import 시 네트워크/SDK 초기화 없음)
+
+# --- 응답 형식 및 호출 횟수 설정 ---
+# 순위화 응답을 Recipe 스키마의 JSON으로 받으면 코드 펜스 제거 같은 정리 없이 바로 파싱됨
+# 단일 호출 모드에서는 키워드 생성 Gemini 호출 대신 요청 필드로 검색어를 만들어서, 캐시 미스 경로의 왕복이 한 번 줄어듦
+GEMINI_STRUCTURED_OUTPUT = os.getenv("GEMINI_STRUCTURED_OUTPUT", "1") == "1"
+RECOMMEND_SINGLE_CALL = os.getenv("RECOMMEND_SINGLE_CALL", "0") == "1"
+RANKING_GENERATION_CONFIG = {"response_mime_type": "application/json", "response_schema": gemini_response_schema(Recipe, many=True)}
+
+def ranking_options() -> dict:
+    return {"generation_config": RANKING_GENERATION_CONFIG} if GEMINI_STRUCTURED_OUTPUT else {}
+
+# --- 시간 제한 및 헤징 설정 ---
+# 요청 전체 마감 시간 안에서 단계별 예산만큼만 기다리고, 느린 크롤링/Gemini 호출은 두 번째 시도로 보완함
+RECOMMEND_DEADLINE_SEC = float(os.getenv("RECOMMEND_DEADLINE_SEC", 30))
+KEYWORD_STAGE_SEC = float(os.getenv("KEYWORD_STAGE_SEC", 8))
+CRAWL_STAGE_SEC = float(os.getenv("CRAWL_STAGE_SEC", 10))
+RANKING_STAGE_SEC = float(os.getenv("RANKING_STAGE_SEC", 20))
+REPAIR_STAGE_SEC = float(os.getenv("REPAIR_STAGE_SEC", 8))  # 형식이 깨진 순위화 응답을 고치는 호출
+SEARCH_TIMEOUT_SEC = float(os.getenv("SEARCH_TIMEOUT_SEC", 4))
+HEDGE_CRAWL = os.getenv("HEDGE_CRAWL", "1") == "1"    # 느린 크롤링은 다음 검색 결과로 한 번 더 시도
+HEDGE_GEMINI = os.getenv("HEDGE_GEMINI", "0") == "1"  # 느린 Gemini 호출을 한 번 더 보냄 (비용이 늘어서 기본은 꺼 둠)
+SEARCH_RESULTS_PER_KEYWORD = 2 if HEDGE_CRAWL else 1
+
+crawl_latency = LatencyTracker(default=3.0)
+gemini_latency = {"keywords": LatencyTracker(default=4.0), "ranking": LatencyTracker(default=12.0), "repair": LatencyTracker(default=4.0)}
+
+# --- 계측 ---
+# 단계별 시간은 stage(...)로 /metrics 히스토그램과 응답의 Server-Timing 헤더에 함께 기록됨 (backend/core/metrics.py)
+crawl_bytes = registry.counter("crawl_bytes_total", "크롤링으로 내려받은 HTML 바이트 수")
+parse_repairs = registry.counter("recommend_parse_repairs_total", "형식이 깨진 순위화 응답의 복구 결과", ("outcome",))
+
+def counted_retry(upstream: str, attempt):
+    # 헤징의 두 번째 시도가 실제로 시작될 때만 재시도 횟수를 셈
+    def start():
+        upstream_retries.inc(upstream)
+        return attempt()
+    return start
+
+# --- 동시 실행 제한 ---
+# 검색/크롤링/Gemini를 부르는 추천은 워커당 동시 실행 수를 제한하고, 넘치는 요청은 사용자별로 공정하게 줄 세움
+# 한도는 처리 시간에 맞춰 RECOMMEND_MIN/MAX_CONCURRENCY 사이에서 조절됨 (backend/core/admission.py)
+RECOMMEND_CONCURRENCY = int(os.getenv("RECOMMEND_CONCURRENCY", 8))
+RECOMMEND_MIN_CONCURRENCY = int(os.getenv("RECOMMEND_MIN_CONCURRENCY", 2))
+RECOMMEND_MAX_CONCURRENCY = int(os.getenv("RECOMMEND_MAX_CONCURRENCY", 32))
+RECOMMEND_QUEUE_SIZE = int(os.getenv("RECOMMEND_QUEUE_SIZE", 32))
+RECOMMEND_QUEUE_PER_USER = int(os.getenv("RECOMMEND_QUEUE_PER_USER", 2))
+RECOMMEND_QUEUE_TIMEOUT_SEC = float(os.getenv("RECOMMEND_QUEUE_TIMEOUT_SEC", 10))
+TOO_BUSY_DETAIL = "추천 요청이 많아 잠시 후 다시 시도해 주세요."
+
+def is_upstream_overload(e: BaseException) -> bool:
+    return isinstance(e, asyncio.TimeoutError) or (isinstance(e, HTTPException) and e.status_code == 504)
+
+recommend_admission = AdmissionController(
+    RECOMMEND_CONCURRENCY, RECOMMEND_MIN_CONCURRENCY, RECOMMEND_MAX_CONCURRENCY,
+    RECOMMEND_QUEUE_SIZE, RECOMMEND_QUEUE_PER_USER, RECOMMEND_QUEUE_TIMEOUT_SEC,
+    is_overload=is_upstream_overload,
+)
+recommend_rejections = registry.counter("recommend_admission_rejected_total", "동시 실행 제한으로 거절된 추천 요청", ("reason",))
+registry.gauge("recommend_admission_limit", "추천 동시 실행 한도", lambda: recommend_admission.limit)
+registry.gauge("recommend_admission_running", "실행 중인 추천 요청 수", lambda: recommend_admission.running)
+registry.gauge("recommend_admission_queued", "대기 중인 추천 요청 수", lambda: recommend_admission.queued)
+
+def too_busy(e: AdmissionRejected) -> HTTPException:
+    recommend_rejections.inc(e.reason)
+    return HTTPException(status_code=429, detail=TOO_BUSY_DETAIL, headers={"Retry-After": str(e.retry_after)})
+
+# --- 미리 데우기 (warm-up) ---
+# 자주 들어오는 정규화된 요청을 시간대별로 기록해 두고, 곧 인기 있을 요청의 추천 결과를 만료되기 전에 다시 만들어 둠
+# (backend/core/warmup.py). 이때 곧 만료될 검색 결과/크롤링 페이지도 함께 새로 받음
+# 외부 호출은 사용자 요청과 별도의 일일 예산 안에서만 하고, 추천 대기열에 사람이 있으면 쉬어 감
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+WARMUP_INTERVAL_SEC = float(os.getenv("WARMUP_INTERVAL_SEC", 5 * 60))
+WARMUP_INITIAL_DELAY_SEC = float(os.getenv("WARMUP_INITIAL_DELAY_SEC", 60))
+WARMUP_CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", 2))
+WARMUP_TOP_N = int(os.getenv("WARMUP_TOP_N", 20))                     # 주기마다 살펴볼 인기 요청 수
+WARMUP_MIN_SCORE = float(os.getenv("WARMUP_MIN_SCORE", 3))            # 이보다 덜 들어온 요청은 데우지 않음
+WARMUP_LOOKAHEAD_SEC = float(os.getenv("WARMUP_LOOKAHEAD_SEC", 60 * 60))
+WARMUP_REFRESH_MARGIN_SEC = float(os.getenv("WARMUP_REFRESH_MARGIN_SEC", 15 * 60))  # 남은 유효 시간이 이보다 짧으면 새로 만듦
+WARMUP_HALF_LIFE_SEC = float(os.getenv("WARMUP_HALF_LIFE_SEC", 3 * 24 * 60 * 60))
+WARMUP_TRACK_MAX_ENTRIES = int(os.getenv("WARMUP_TRACK_MAX_ENTRIES", 1000))
+WARMUP_CSE_DAILY_BUDGET = int(os.getenv("WARMUP_CSE_DAILY_BUDGET", CSE_DAILY_QUOTA // 5))
+WARMUP_GEMINI_DAILY_BUDGET = int(os.getenv("WARMUP_GEMINI_DAILY_BUDGET", 100))
+WARMUP_ADMISSION_KEY = "background:warmup"
+
+popular_requests = PopularityTracker(WARMUP_TRACK_MAX_ENTRIES, WARMUP_HALF_LIFE_SEC)
+# 예산도 할당량과 같은 SQLite 파일에 기록되므로 워커 프로세스/재시작에 걸쳐 하루 한도가 지켜짐
+warmup_search_quota = QuotaAccountant("customsearch-warmup", WARMUP_CSE_DAILY_BUDGET, 0, QUOTA_DB_PATH)
+warmup_gemini_quota = QuotaAccountant("gemini-warmup", WARMUP_GEMINI_DAILY_BUDGET, 0, QUOTA_DB_PATH)
+warmup_jobs = registry.counter("recommend_warmup_jobs_total", "미리 데우기 작업 결과", ("outcome",))
+
+# httplib2.Http는 스레드 간에 공유하면 안전하지 않으므로 검색을 실행하는 스레드마다 하나씩 만듦
+_search_http = threading.local()
+
+def _thread_http() -> httplib2.Http:
+    http = getattr(_search_http, "http", None)
+    if http is None:
+        http = _search_http.http = httplib2.Http(timeout=SEARCH_TIMEOUT_SEC)
+    return http
 
 # --- 헬퍼 함수 ---
 
 def search_google(query: str, num: int = 1) -> List[str]:
+    site = "www.10000recipe.com"
+    query = normalize_query(query)
+    cache_key = (query, num, site)
+    cached = search_cache.get(cache_key)
+    # 미리 데우기 중에는 곧 만료될 결과도 다시 검색
+    if cached is not None and not (warming() and search_cache.expires_in(cache_key) < WARMUP_REFRESH_MARGIN_SEC):
+        return list(cached)
+
+    google_search_service = get_search_service()
     if not google_search_service:
         return []
+    if warming() and not warmup_search_quota.try_acquire():
+        record_upstream("cse", "warmup_budget")
+        return list(cached) if cached is not None else []
+    if not search_quota.try_acquire():
+        # 일일 할당량 소진 임박: 만료된 캐시라도 있으면 사용하고, 없으면 검색하지 않음
+        print(f"Google 검색 할당량 한도 근접, 캐시 전용 모드: {query}")
+        record_upstream("cse", "quota_denied")
+        stale = search_cache.get(cache_key, allow_stale=True)
+        return list(stale) if stale is not None else []
+
     try:
-        result = google_search_service.cse().list(
-            q=query,
-            cx=GOOGLE_CSE_ID,
-            num=num,
-            siteSearch="www.10000recipe.com",
-            siteSearchFilter="i"
-        ).execute()
-        return [item['link'] for item in result.get('items', [])]
+        with stage("search"):
+            result = google_search_service.cse().list(
+                q=query,
+                cx=GOOGLE_CSE_ID,
+                num=num,
+                siteSearch=site,
+                siteSearchFilter="i"
+            ).execute(http=_thread_http())
+        record_upstream("cse", "ok")
+        links = [item['link'] for item in result.get('items', [])]
+        # 결과가 없는 검색도 잠깐 기억해 두어서 같은 키워드로 할당량을 계속 쓰지 않도록 함
+        search_cache.set(cache_key, tuple(links), ttl=None if links else SEARCH_CACHE_NEGATIVE_TTL)
+        return links
     except Exception as e:
+        record_upstream("cse", "error")
         print(f"Google 검색 오류: {e}")
         return []
 
-def crawl_recipe(url: str) -> Optional[str]:
+def format_recipe_text(url: str, title: str, ingredients_text: str, steps_text: str) -> str:
+    return f"URL: {url}\n제목: {title}\n재료: {ingredients_text}\n조리법:\n{steps_text}"
+
+def _extract_and_store(url: str, content: bytes, encoding: Optional[str],
+                       etag: Optional[str], last_modified: Optional[str]) -> Tuple[str, str, str]:
+    fields = extract_recipe_fields(content, encoding)
+    crawl_cache.put(url, *fields, etag=etag, last_modified=last_modified)
+    return fields
+
+async def crawl_recipe(url: str, timeout: Optional[float] = None) -> Optional[str]:
+    # 1. 영구 캐시 확인 (TTL 안이면 다운로드/파싱 없이 바로 사용)
     try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers)
+        cached, fresh = await asyncio.to_thread(crawl_cache.lookup, url, WARMUP_REFRESH_MARGIN_SEC if warming() else 0)
+    except Exception as e:
+        print(f"크롤링 캐시 조회 오류 ({url}): {e!r}")
+        cached, fresh = None, False
+    if fresh:
+        return format_recipe_text(url, cached.title, cached.ingredients, cached.steps)
+
+    # 2. 만료된 항목이 있으면 조건부 요청으로 재검증
+    headers = {}
+    if cached:
+        if cached.etag:
+            headers['If-None-Match'] = cached.etag
+        if cached.last_modified:
+            headers['If-Modified-Since'] = cached.last_modified
+
+    try:
+        started = time.monotonic()
+        with stage("fetch"):
+            response = await fetch(url, headers=headers, timeout=timeout) # 공유 커넥션 풀 + 호스트별 동시 요청 제한 + 타임아웃
+        crawl_latency.record(time.monotonic() - started)
+        crawl_bytes.inc(amount=len(response.content))
+        if cached and response.status_code == 304:
+            record_upstream("crawl", "not_modified")
+            await asyncio.to_thread(crawl_cache.renew, url)
+            return format_recipe_text(url, cached.title, cached.ingredients, cached.steps)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 레시피 제목, 재료, 설명, 조리법 등 주요 정보를 포함하는 영역 선택
-        # (만개의 레시피 사이트 구조에 따라 셀렉터는 변경될 수 있음)
-        title = soup.find('h3').get_text(strip=True) if soup.find('h3') else "제목 없음"
-        
-        ingredients = soup.find('div', class_='ready_ingre3')
-        ingredients_text = ingredients.get_text('\n', strip=True) if ingredients else "재료 정보 없음"
-        
-        recipe_steps = soup.find_all('div', class_='view_step_cont')
-        steps_text = "\n".join([f"{i+1}. {step.get_text(strip=True)}" for i, step in enumerate(recipe_steps)])
-        
-        full_text = f"URL: {url}\n제목: {title}\n재료: {ingredients_text}\n조리법:\n{steps_text}"
-        return full_text
+        record_upstream("crawl", "ok")
+
+        # HTML 파싱과 캐시 저장은 이벤트 루프를 막지 않도록 스레드에서 처리
+        with stage("extract"):
+            fields = await asyncio.to_thread(
+                _extract_and_store, url, response.content, response.charset_encoding,
+                response.headers.get('ETag'), response.headers.get('Last-Modified'),
+            )
+        return format_recipe_text(url, *fields)
     except Exception as e:
-        print(f"크롤링 오류 ({url}): {e}")
+        record_upstream("crawl", "timeout" if isinstance(e, asyncio.TimeoutError) else "error")
+        print(f"크롤링 오류 ({url}): {e!r}")
+        if cached: # 재검증에 실패하면 만료된 캐시라도 사용
+            crawl_cache.served_stale(url)
+            return format_recipe_text(url, cached.title, cached.ingredients, cached.steps)
         return None
 
-# --- API 엔드포인트 ---
+async def search_and_crawl(keyword: str, deadline: Deadline) -> Optional[str]:
+    # googleapiclient의 .execute()는 블로킹 호출이므로 스레드에서 실행
+    try:
+        urls = await asyncio.wait_for(
+            asyncio.to_thread(search_google, keyword, SEARCH_RESULTS_PER_KEYWORD),
+            timeout=deadline.budget(SEARCH_TIMEOUT_SEC),
+        )
+    except asyncio.TimeoutError:
+        print(f"Google 검색 시간 초과: {keyword}")
+        return None
+    if not urls:
+        return None
 
-@router.post("/recommend", response_model=List[Recipe])
-async def recommend_recipe(request: RecommendationRequest): # async def VS def : 전자 = 후자 + '이 함수는 비동기적인 사건을 포함함!'을 선언
-    if not gemini_model:
-        raise HTTPException(status_code=500, detail="Gemini API 모델이 초기화되지 않았습니다.")
+    # 첫 번째 결과의 크롤링이 평소(p95)보다 오래 걸리면 두 번째 결과도 크롤링해서 먼저 끝난 쪽 사용
+    backup = None
+    if HEDGE_CRAWL and len(urls) > 1:
+        backup = counted_retry("crawl", lambda: crawl_recipe(urls[1], timeout=deadline.budget(CRAWL_STAGE_SEC)))
+    return await hedged(lambda: crawl_recipe(urls[0], timeout=deadline.budget(CRAWL_STAGE_SEC)), backup, delay=crawl_latency.p95())
+
+async def call_gemini(stage_name: str, prompt: str, timeout: float, **kwargs):
+    # 단계 예산(timeout) 안에 끝나지 않으면 asyncio.TimeoutError
+    if timeout <= 0:
+        raise asyncio.TimeoutError()
+    tracker = gemini_latency[stage_name]
+
+    async def attempt():
+        started = time.monotonic()
+        try:
+            response = await get_gemini_model().generate_content_async(prompt, request_options={"timeout": timeout}, **kwargs)
+        except asyncio.CancelledError: # 단계 시간 초과 또는 헤징에서 진 쪽
+            record_upstream("gemini", "cancelled")
+            raise
+        except Exception as e:
+            record_upstream("gemini", "timeout" if isinstance(e, asyncio.TimeoutError) else "error")
+            raise
+        tracker.record(time.monotonic() - started)
+        record_upstream("gemini", "ok")
+        return response
+
+    backup = counted_retry("gemini", attempt) if HEDGE_GEMINI and not kwargs.get("stream") else None
+    return await asyncio.wait_for(hedged(attempt, backup, delay=tracker.p95()), timeout=timeout)
+
+def response_text(response) -> str:
+    # 안전 필터 등으로 후보가 비어 있으면 .text가 ValueError를 냄
+    try:
+        return response.text
+    except ValueError:
+        return ""
+
+async def iter_with_deadline(iterator: AsyncIterator, deadline: Deadline) -> AsyncIterator:
+    # 스트리밍 응답의 각 조각도 남은 시간 안에 도착해야 함
+    iterator = iterator.__aiter__()
+    while True:
+        try:
+            item = await asyncio.wait_for(iterator.__anext__(), timeout=deadline.remaining())
+        except StopAsyncIteration:
+            return
+        yield item
+
+# --- 추천 파이프라인 단계 ---
+# 일반 엔드포인트와 스트리밍 엔드포인트가 같은 단계를 공유합니다.
 
+async def generate_keywords(request_block: str, deadline: Deadline) -> List[str]:
     # --- 1단계: 검색 키워드 생성 ---
-    keyword_prompt = f"""
-    사용자의 다음 요청에 가장 적합한 '만개의 레시피' 검색 키워드 3개를 생성해줘.
-    각 키워드는 검색에 최적화된 단순하고 명확한 형태로, 한 줄에 하나씩만 응답해줘.
-    
-    [사용자 요청]
-    - 식사 목표: {request.meal_goal or '지정 안 함'}
-    - 최대 조리 시간: {request.cooking_time or '지정 안 함'}분
-    - 최대 비용: {request.cost or '지정 안 함'}원
-    - 포함할 재료: {', '.join(request.include_ingredients) or '없음'}
-    - 보유 재료: {', '.join(request.available_ingredients) or '없음'}
-    - 선호 키워드: {', '.join(request.preference_keywords) or '없음'}
-    - 기피 키워드: {', '.join(request.avoid_keywords) or '없음'}
-    
-    [검색 키워드 예시]
-    닭가슴살 다이어트 요리
-    초간단 김치찌개
-    자취생 간단요리
-    """
-    
     try:
-        response = await gemini_model.generate_content_async(keyword_prompt) # await로 기다리는 시간 동안 이 서버는 다른 일을 할 수 있음
+        with stage("keywords"):
+            response = await call_gemini("keywords", build_keyword_prompt(request_block), deadline.budget(KEYWORD_STAGE_SEC)) # await로 기다리는 시간 동안 이 서버는 다른 일을 할 수 있음
+        log_token_usage("keywords", response)
         search_keywords = [kw.strip() for kw in response.text.split('\n') if kw.strip()]
         print(f"생성된 검색 키워드: {search_keywords}")
+        return search_keywords[:3] # 최대 3개 키워드 사용
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="키워드 생성 시간이 초과되었습니다.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"키워드 생성 중 오류: {e}")
 
-    # --- 2단계: 크롤링 ---
-    crawled_texts = []
-    for keyword in search_keywords[:3]: # 최대 3개 키워드 사용
-        urls = search_google(keyword, num=1)
-        if not urls: continue
-        
-        text = crawl_recipe(urls[0])
-        if text:
-            crawled_texts.append(text)
-
-    if not crawled_texts:
-        raise HTTPException(status_code=404, detail="관련 레시피를 찾거나 크롤링할 수 없습니다.")
-
-    # --- 3단계: 순위화 및 JSON 변환 ---
-    final_prompt = f"""
-    다음은 내가 '만개의 레시피'에서 수집한 레시피 정보다.
-    
-    [사용자 최초 요청]
-    - 식사 목표: {request.meal_goal or '지정 안 함'}
-    - 최대 조리 시간: {request.cooking_time or '지정 안 함'}분
-    - 최대 비용: {request.cost or '지정 안 함'}원
-    - 포함할 재료: {', '.join(request.include_ingredients) or '없음'}
-    - 보유 재료: {', '.join(request.available_ingredients) or '없음'}
-    - 선호 키워드: {', '.join(request.preference_keywords) or '없음'}
-    - 기피 키워드: {', '.join(request.avoid_keywords) or '없음'}
-    
-    [수집된 레시피 정보]
-    {"---".join(crawled_texts)}
-    
-    [너의 임무]
-    1. 위 [사용자 최초 요청]에 가장 부합하는 순서대로 [수집된 레시피 정보]의 순위를 매겨라.
-    2. 순위가 매겨진 3개의 레시피를 각각 아래 JSON 형식에 맞춰 완벽하게 정리해라.
-    3. 최종 결과는 반드시 3개의 JSON 객체를 포함하는 단일 JSON 배열(리스트)로만 응답해라. 다른 텍스트는 절대 포함하지 마라.
-
-    [JSON 응답 형식]
-    {json.dumps([{"name": "string", "description": "string", "ingredients": ["string"], "cooking_time": 0, "cost": 0, "tags": ["string"], "instructions": ["string"], "source_url": "string"}], ensure_ascii=False, indent=2)}
-    """
+async def pick_keywords(request: RecommendationRequest, request_block: str, deadline: Deadline) -> List[str]:
+    if RECOMMEND_SINGLE_CALL:
+        with stage("keywords"):
+            search_keywords = synthesize_keywords(request)
+        print(f"요청 필드로 만든 검색 키워드: {search_keywords}")
+        return search_keywords
+    return await generate_keywords(request_block, deadline)
 
+async def iter_recipe_texts(search_keywords: List[str], deadline: Deadline) -> AsyncIterator[Optional[str]]:
+    # --- 2단계: 크롤링 ---
+    # 키워드별 '검색 -> 크롤링'을 동시에 실행하고, 끝나는 순서대로 결과를 넘겨줌 (실패한 건은 None)
+    # 전체 소요 시간 ≈ 가장 느린 한 건. 단계 예산이 끝나면 그때까지 모인 결과만으로 진행
+    tasks = [asyncio.ensure_future(search_and_crawl(keyword, deadline)) for keyword in search_keywords]
+    started = time.perf_counter()
     try:
-        response = await gemini_model.generate_content_async(final_prompt)
-        response_text = response.text.strip() 
+        for next_done in asyncio.as_completed(tasks, timeout=deadline.budget(CRAWL_STAGE_SEC)):
+            try:
+                yield await next_done
+            except asyncio.TimeoutError:
+                print("크롤링 단계 시간 초과: 수집된 레시피만으로 진행")
+                return
+    finally:
+        for task in tasks: # 중간에 멈추면(클라이언트 연결 끊김 등) 남은 작업 정리
+            task.cancel()
+        observe_stage("crawl", time.perf_counter() - started)
 
+def parse_recipes(response_text: str) -> List[Recipe]:
+    if GEMINI_STRUCTURED_OUTPUT: # 스키마를 지정한 응답은 JSON 그대로
+        json_str = response_text
+    else:
         # Gemini의 response에 순수한 json만 남기도록 하는 가정문
+        response_text = response_text.strip()
         if response_text.startswith("```json"):
             json_str = response_text[len("```json"):-len("```")].strip()
         else:
             json_str = response_text
-            
-        recipes_data = json.loads(json_str)
-        return [Recipe(**data) for data in recipes_data]
-        
+
+    recipes_data = json.loads(json_str)
+    if not isinstance(recipes_data, list):
+        raise ValueError(f"JSON 배열이 아닌 응답: {type(recipes_data).__name__}")
+    recipes = [Recipe(**data) for data in recipes_data]
+    complete = [recipe for recipe in recipes if is_complete(recipe)]
+    if recipes and not complete:
+        raise ValueError("재료나 조리법이 빠진 레시피만 있는 응답")
+    return complete
+
+def is_complete(recipe: Recipe) -> bool:
+    # 잘린 응답에서 나온 '빈 껍데기' 레시피는 캐시/코퍼스에 넣지 않음
+    return bool(recipe.name.strip() and any(item.strip() for item in recipe.ingredients)
+                and any(step.strip() for step in recipe.instructions))
+
+_json_decoder = json.JSONDecoder()
+
+def salvage_recipes(response_text: str) -> List[Recipe]:
+    # 잘리거나 일부가 깨진 배열에서 완전하고 스키마에 맞는 객체만 골라냄
+    # 배열 안의 객체를 raw_decode로 하나씩 읽고, 깨진 객체를 만나면 다음 '{'부터 다시 시도
+    # (다음 '{'가 깨진 객체 안쪽이면 Recipe 검증에서 걸러짐)
+    recipes = []
+    position = response_text.find("[") + 1
+    if position == 0:
+        return recipes
+    length = len(response_text)
+    while position < length:
+        while position < length and response_text[position] in " \t\r\n,":
+            position += 1
+        if position >= length or response_text[position] == "]":
+            break
+        if response_text[position] != "{":
+            position = response_text.find("{", position)
+            if position == -1:
+                break
+            continue
+        try:
+            data, end = _json_decoder.raw_decode(response_text, position)
+        except json.JSONDecodeError:
+            position = response_text.find("{", position + 1)
+            if position == -1:
+                break
+            continue
+        position = end
+        try:
+            recipe = Recipe(**data)
+        except (TypeError, ValidationError):
+            continue
+        if is_complete(recipe):
+            recipes.append(recipe)
+    return recipes
+
+async def repair_recipes(response_text: str, error: Exception, request_block: str, crawled_texts: List[str],
+                         deadline: Deadline) -> List[Recipe]:
+    # 파싱에 실패한 순위화 응답 복구: 검색/크롤링은 다시 하지 않고 이미 받은 응답과 이미 크롤링한 텍스트만 사용
+    # 1. 응답 안에 멀쩡한 레시피가 있으면 그것만 사용 (추가 호출 없음)
+    recipes = salvage_recipes(response_text)
+    if recipes:
+        parse_repairs.inc("salvaged")
+        print(f"순위화 응답 일부 복구: {len(recipes)}개 ({error})")
+        return recipes
+
+    # 2. 크롤링한 레시피 + 깨진 응답으로 한 번 더 호출 (응답이 비어 있었으면 같은 순위화 프롬프트로 다시 요청)
+    if response_text.strip():
+        prompt = build_repair_prompt(request_block, crawled_texts, response_text, str(error))
+    else:
+        prompt = build_ranking_prompt(request_block, crawled_texts)
+    try:
+        with stage("repair"):
+            response = await call_gemini("repair", prompt, deadline.budget(REPAIR_STAGE_SEC), **ranking_options())
+        log_token_usage("repair", response)
+        recipes = parse_recipes(response.text)
+        if not recipes:
+            raise ValueError("복구 응답에 완성된 레시피가 없습니다.")
+    except Exception:
+        parse_repairs.inc("failed")
+        raise
+    parse_repairs.inc("repaired")
+    print(f"순위화 응답 복구 호출로 {len(recipes)}개 생성 ({error})")
+    return recipes
+
+async def run_recommendation(request: RecommendationRequest, admission_key: str) -> List[Recipe]:
+    # 로컬 코퍼스에 조건에 맞는 레시피가 충분하면 검색/크롤링 없이 바로 응답
+    with stage("corpus"):
+        local_recipes = recipe_index.search(request)
+    if local_recipes:
+        return [Recipe(**data) for data in local_recipes]
+
+    if not get_gemini_model():
+        raise HTTPException(status_code=500, detail="Gemini API 모델이 초기화되지 않았습니다.")
+
+    # 외부 API를 부르는 부분만 동시 실행 제한 (캐시/코퍼스로 답하는 요청은 자리를 차지하지 않음)
+    started = time.perf_counter()
+    try:
+        async with recommend_admission.slot(admission_key):
+            observe_stage("queue", time.perf_counter() - started)
+            return await run_pipeline(request)
+    except AdmissionRejected as e:
+        raise too_busy(e)
+
+async def run_pipeline(request: RecommendationRequest) -> List[Recipe]:
+    deadline = Deadline(RECOMMEND_DEADLINE_SEC)
+    request_block = render_request_block(request) # 두 프롬프트가 같은 요청 블록을 사용
+    search_keywords = await pick_keywords(request, request_block, deadline)
+    crawled_texts = [text async for text in iter_recipe_texts(search_keywords, deadline) if text]
+    if not crawled_texts:
+        if deadline.expired:
+            raise HTTPException(status_code=504, detail="제한 시간 안에 레시피를 수집하지 못했습니다.")
+        raise HTTPException(status_code=404, detail="관련 레시피를 찾거나 크롤링할 수 없습니다.")
+
+    try:
+        # --- 3단계: 순위화 및 JSON 변환 ---
+        with stage("ranking"):
+            response = await call_gemini("ranking", build_ranking_prompt(request_block, crawled_texts),
+                                         deadline.budget(RANKING_STAGE_SEC), **ranking_options())
+        log_token_usage("ranking", response)
+        try:
+            with stage("parse"):
+                recipes = parse_recipes(response.text)
+                if not recipes:
+                    raise ValueError("응답에 레시피가 없습니다.")
+        except (ValueError, TypeError, ValidationError) as e: # JSONDecodeError도 ValueError
+            recipes = await repair_recipes(response_text(response), e, request_block, crawled_texts, deadline)
+        recipe_index.schedule_save(jsonable_encoder(recipes))
+        return recipes
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="최종 레시피 생성 시간이 초과되었습니다.")
     except Exception as e:
         print(f"최종 레시피 생성 오류: {e}")
-        print(f"오류 발생 당시 Gemini 응답: {response.text if 'response' in locals() else 'N/A'}")
-        raise HTTPException(status_code=500, detail=f"최종 레시피 생성 중 오류 발생: {e}")
\ No newline at end of file
+        print(f"오류 발생 당시 Gemini 응답: {response_text(response) if 'response' in locals() else 'N/A'}")
+        raise HTTPException(status_code=500, detail=f"최종 레시피 생성 중 오류 발생: {e}")
+
+async def stream_recommendation(request: RecommendationRequest, cache_key: str, admission_key: str) -> AsyncIterator[dict]:
+    # 스트리밍 버전: 단계가 끝날 때마다 진행 이벤트를, 레시피는 하나씩 완성되는 대로 내보냄
+    cached = recommend_cache.get(cache_key)
+    if cached is not None:
+        for rank, recipe in enumerate(cached, start=1):
+            yield {"event": "recipe", "rank": rank, "recipe": jsonable_encoder(recipe)}
+        yield {"event": "done", "count": len(cached), "cached": True}
+        return
+
+    with stage("corpus"):
+        local_recipes = recipe_index.search(request)
+    if local_recipes:
+        for rank, data in enumerate(local_recipes, start=1):
+            yield {"event": "recipe", "rank": rank, "recipe": jsonable_encoder(Recipe(**data))}
+        recommend_cache.set(cache_key, tuple(Recipe(**data) for data in local_recipes))
+        yield {"event": "done", "count": len(local_recipes), "cached": False}
+        return
+
+    if not get_gemini_model():
+        yield {"event": "error", "status": 500, "detail": "Gemini API 모델이 초기화되지 않았습니다."}
+        return
+
+    # 응답 헤더가 이미 나간 뒤라서 자리를 못 받으면 429 상태의 error 이벤트로 알림
+    started = time.perf_counter()
+    try:
+        async with recommend_admission.slot(admission_key):
+            observe_stage("queue", time.perf_counter() - started)
+            async for event in stream_pipeline(request, cache_key):
+                yield event
+    except AdmissionRejected as e:
+        recommend_rejections.inc(e.reason)
+        yield {"event": "error", "status": 429, "detail": TOO_BUSY_DETAIL, "retry_after": e.retry_after}
+
+async def stream_pipeline(request: RecommendationRequest, cache_key: str) -> AsyncIterator[dict]:
+    deadline = Deadline(RECOMMEND_DEADLINE_SEC)
+    request_block = render_request_block(request)
+    try:
+        search_keywords = await pick_keywords(request, request_block, deadline)
+    except HTTPException as e:
+        yield {"event": "error", "status": e.status_code, "detail": e.detail}
+        return
+    yield {"event": "keywords", "keywords": search_keywords}
+
+    crawled_texts = []
+    finished = 0
+    async for text in iter_recipe_texts(search_keywords, deadline):
+        finished += 1
+        if text:
+            crawled_texts.append(text)
+        yield {"event": "crawled", "done": finished, "total": len(search_keywords), "crawled": len(crawled_texts)}
+    if not crawled_texts:
+        if deadline.expired:
+            yield {"event": "error", "status": 504, "detail": "제한 시간 안에 레시피를 수집하지 못했습니다."}
+        else:
+            yield {"event": "error", "status": 404, "detail": "관련 레시피를 찾거나 크롤링할 수 없습니다."}
+        return
+
+    # Gemini 스트리밍 생성 + 점진적 JSON 배열 파서: 첫 레시피 객체가 닫히는 즉시 전송
+    # 형식이 깨진 객체는 건너뛰고 나머지는 계속 보냄. 깨진 부분이 있었거나 하나도 못 건졌으면, 비스트리밍과 같이
+    # 받은 전체 텍스트로 복구 단계를 거친 뒤에 캐시 (복구에 실패하면 이미 보낸 레시피만 남고 캐시하지 않음)
+    recipes = []
+    parser = JsonArrayStreamParser()
+    received = []
+    parse_error: Optional[Exception] = None
+    started = time.perf_counter()
+    try:
+        response = await call_gemini("ranking", build_ranking_prompt(request_block, crawled_texts),
+                                     deadline.budget(RANKING_STAGE_SEC), stream=True, **ranking_options())
+        async for chunk in iter_with_deadline(response, deadline):
+            try:
+                chunk_text = chunk.text
+            except ValueError: # 텍스트 없이 종료 사유만 담긴 조각
+                continue
+            received.append(chunk_text)
+            parsed = parser.feed(chunk_text)
+            if parser.errors and parse_error is None: # 객체 하나가 JSON으로 깨짐
+                parse_error = parser.errors[0]
+            for data in parsed:
+                try:
+                    recipe = Recipe(**data)
+                except (TypeError, ValidationError) as e:
+                    parse_error = e
+                    continue
+                if not is_complete(recipe):
+                    parse_error = ValueError(f"재료나 조리법이 빠진 레시피: {recipe.name}")
+                    continue
+                recipes.append(recipe)
+                yield {"event": "recipe", "rank": len(recipes), "recipe": jsonable_encoder(recipe)}
+        log_token_usage("ranking_stream", response)
+        if parse_error is None and not parser.finished:
+            parse_error = ValueError("응답이 배열 끝(']') 전에 끊김")
+        if parse_error is not None or not recipes:
+            error = parse_error or ValueError("응답에 완성된 레시피가 없습니다.")
+            sent = {(recipe.name, recipe.source_url) for recipe in recipes}
+            for recipe in await repair_recipes("".join(received), error, request_block, crawled_texts, deadline):
+                if (recipe.name, recipe.source_url) in sent:
+                    continue
+                recipes.append(recipe)
+                yield {"event": "recipe", "rank": len(recipes), "recipe": jsonable_encoder(recipe)}
+    except asyncio.TimeoutError:
+        # 이미 보낸 레시피는 유효하므로 캐시하지 않고 종료 이벤트만 알림
+        yield {"event": "error", "status": 504, "detail": "최종 레시피 생성 시간이 초과되었습니다.", "partial": len(recipes)}
+        return
+    except Exception as e:
+        print(f"최종 레시피 스트리밍 오류: {e}")
+        yield {"event": "error", "status": 500, "detail": f"최종 레시피 생성 중 오류 발생: {e}", "partial": len(recipes)}
+        return
+    finally:
+        observe_stage("ranking", time.perf_counter() - started)
+
+    if not recipes:
+        yield {"event": "error", "status": 500, "detail": "최종 레시피 생성 중 오류 발생: 레시피를 찾을 수 없습니다."}
+        return
+    recommend_cache.set(cache_key, tuple(recipes))
+    recipe_index.schedule_save(jsonable_encoder(recipes))
+    yield {"event": "done", "count": len(recipes), "cached": False}
+
+async def warm_recommendation(cache_key: str, request: RecommendationRequest) -> str:
+    # 미리 데우기 작업 하나: 추천 결과가 곧 만료되거나 없으면 사용자 요청과 같은 경로로 다시 만들어 캐시에 넣음
+    outcome = await _warm_recommendation(cache_key, request)
+    warmup_jobs.inc(outcome)
+    return outcome
+
+async def _warm_recommendation(cache_key: str, request: RecommendationRequest) -> str:
+    remaining = recommend_cache.expires_in(cache_key)
+    if remaining is not None and remaining > WARMUP_REFRESH_MARGIN_SEC:
+        return "fresh"
+    if recommend_flights.in_flight(cache_key):
+        return "in_flight"
+    local_recipes = recipe_index.search(request)
+    if local_recipes:
+        recommend_cache.set(cache_key, tuple(Recipe(**data) for data in local_recipes))
+        return "corpus"
+    if not get_gemini_model():
+        return "unavailable"
+    # 사람이 기다리고 있거나 한도의 절반 넘게 쓰는 중이면 이번에는 건너뜀
+    if recommend_admission.queued or recommend_admission.running >= recommend_admission.limit / 2:
+        return "busy"
+    # 이 작업이 부를 Gemini 호출 수만큼 예산을 먼저 잡아 둠 (검색은 search_google에서 한 건씩)
+    gemini_calls = 1 if RECOMMEND_SINGLE_CALL else 2
+    if warmup_gemini_quota.remaining() < gemini_calls:
+        return "budget"
+    for _ in range(gemini_calls):
+        if not warmup_gemini_quota.try_acquire():
+            return "budget"
+
+    async def compute():
+        async with recommend_admission.slot(WARMUP_ADMISSION_KEY):
+            recipes = tuple(await run_pipeline(request))
+        recommend_cache.set(cache_key, recipes)
+        return recipes
+
+    # 같은 요청이 사용자에게서 들어오면 이 작업의 결과를 함께 기다림
+    try:
+        await recommend_flights.do(cache_key, compute)
+    except AdmissionRejected:
+        return "busy"
+    except HTTPException as e:
+        print(f"미리 데우기 실패 ({cache_key}): {e.status_code} {e.detail}")
+        return "failed"
+    return "warmed"
+
+recommend_warmer = WarmupWorker(
+    popular_requests, warm_recommendation, WARMUP_CONCURRENCY, WARMUP_INTERVAL_SEC, WARMUP_TOP_N, WARMUP_MIN_SCORE,
+    lookahead=WARMUP_LOOKAHEAD_SEC, initial_delay=WARMUP_INITIAL_DELAY_SEC,
+)
+registry.gauge("recommend_warmup_running", "실행 중인 미리 데우기 작업 수", lambda: recommend_warmer.running)
+registry.gauge("recommend_warmup_tracked", "기록 중인 인기 요청 수", lambda: len(popular_requests))
+
+# --- API 엔드포인트 ---
+
+@router.get("/cache/stats", summary="추천 캐시 상태")
+async def read_cache_stats():
+    return {
+        "crawl": await asyncio.to_thread(crawl_cache.stats),
+        "search": search_cache.stats(),
+        "search_quota": await asyncio.to_thread(search_quota.stats),
+        "recommend": recommend_cache.stats(),
+        "single_flight": recommend_flights.stats(),
+        "corpus": recipe_index.stats(),
+        "admission": recommend_admission.stats(),
+        "warmup": {
+            **recommend_warmer.stats(),
+            "enabled": WARMUP_ENABLED,
+            "search_budget": await asyncio.to_thread(warmup_search_quota.stats),
+            "gemini_budget": await asyncio.to_thread(warmup_gemini_quota.stats),
+        },
+    }
+
+@router.post("/recommend", response_model=List[Recipe])
+async def recommend_recipe(request: RecommendationRequest, response: Response, subject: str = Depends(get_request_subject)): # async def VS def : 전자 = 후자 + '이 함수는 비동기적인 사건을 포함함!'을 선언
+    # 의미가 같은 요청은 같은 키가 되도록 정규화한 뒤 캐시 확인 (적중하면 외부 API 호출 없음)
+    canonical_request = canonicalize_request(request)
+    cache_key = request_cache_key(canonical_request)
+    popular_requests.record(cache_key, canonical_request)
+    cached = recommend_cache.get(cache_key)
+    if cached is not None:
+        response.headers["X-Cache"] = "HIT"
+        return list(cached)
+
+    # 같은 요청이 이미 처리 중이면 파이프라인을 새로 돌리지 않고 그 결과를 함께 기다림
+    async def compute():
+        recipes = tuple(await run_recommendation(canonical_request, subject))
+        recommend_cache.set(cache_key, recipes)
+        return recipes
+
+    coalesced = recommend_flights.in_flight(cache_key)
+    recipes = await recommend_flights.do(cache_key, compute)
+    response.headers["X-Cache"] = "COALESCED" if coalesced else "MISS"
+    return list(recipes)
+
+@router.post("/recommend/stream", summary="레시피 추천 (스트리밍)")
+async def recommend_recipe_stream(request: RecommendationRequest, http_request: Request, subject: str = Depends(get_request_subject)):
+    # 기본은 NDJSON(한 줄에 이벤트 하나), Accept: text/event-stream 이면 SSE 형식으로 응답
+    canonical_request = canonicalize_request(request)
+    cache_key = request_cache_key(canonical_request)
+    popular_requests.record(cache_key, canonical_request)
+    use_sse = "text/event-stream" in http_request.headers.get("accept", "")
+
+    async def body():
+        async for event in stream_recommendation(canonical_request, cache_key, subject):
+            data = json.dumps(event, ensure_ascii=False)
+            yield f"event: {event['event']}\ndata: {data}\n\n" if use_sse else data + "\n"
+
+    media_type = "text/event-stream" if use_sse else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type, headers={"Cache-Control": "no-cache"})
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+import hashlib
+import json
+import threading
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, RootModel
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, func, ForeignKey
-from sqlalchemy.orm import relationship
-from ..auth.auth import Base, get_db, engine, User, get_current_user
+from typing import Optional
+import os
+from sqlalchemy import Column, Integer, String, DateTime, func, ForeignKey, Index, and_, or_, case, literal
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import relationship, contains_eager, joinedload, load_only
+from ..auth.auth import Base, get_db, User, get_current_user
+from backend.core.cache import TTLCache
 
 # --- SQLAlchemy Model (데이터베이스 테이블 정의) ---
 
@@ -20,8 +28,15 @@ class RecipeTip(Base):
 
     owner = relationship("User", back_populates="tips")
 
-# 데이터베이스에 테이블 생성
-Base.metadata.create_all(bind=engine)
+    # 피드(최신순 keyset 페이지네이션)용 복합 인덱스
+    # 검색용 FULLTEXT 인덱스 (MySQL 전용, 한국어는 공백으로 단어가 나뉘지 않으므로 ngram 파서 사용)
+    __table_args__ = (
+        Index("ix_recipe_tips_created_at_id", "created_at", "id"),
+        Index(
+            "ft_recipe_tips_title_content", "title", "content",
+            mysql_prefix="FULLTEXT", mysql_with_parser="ngram",
+        ).ddl_if(dialect="mysql"),
+    )
 
 router = APIRouter(
     tags=["tips"],
@@ -51,28 +66,200 @@ class Tip(TipBase):
     class Config:
         from_attributes = True
 
+class TipFeed(BaseModel):
+    items: list[Tip]
+    next_cursor: Optional[str] = None
+
+
+# --- 피드 커서 ---
+# 마지막으로 받은 팁의 정렬 키(피드: created_at, id / 검색: 점수, id)를 base64로 감싼 값.
+# 클라이언트는 내용을 해석하지 않고 그대로 다시 보냅니다.
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps(values).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(types):
+            raise ValueError(cursor)
+        return tuple(parse(value) for parse, value in zip(types, values))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _feed_time(db: Session):
+    # 피드 정렬/커서 비교에 쓰는 created_at 식과, 커서의 시각을 그 식과 같은 형식으로 바꾸는 함수
+    # SQLite는 날짜를 문자열로 비교하는데, server_default(CURRENT_TIMESTAMP)로 저장된 값은 'YYYY-MM-DD HH:MM:SS',
+    # 바인딩되는 datetime은 'YYYY-MM-DD HH:MM:SS.000000'이라 같은 시각도 항상 작게 비교됨 -> 양쪽을 초 단위 문자열로 맞춤
+    if db.get_bind().dialect.name == "sqlite":
+        return func.datetime(RecipeTip.created_at), lambda value: value.strftime("%Y-%m-%d %H:%M:%S")
+    return RecipeTip.created_at, lambda value: value
+
+
+# --- 팁 검색 ---
+# MySQL: title/content의 FULLTEXT(ngram) 인덱스에 MATCH ... AGAINST (자연어 모드)로 관련도 점수를 계산합니다.
+#        테이블이 커져도 인덱스만 보므로 검색 시간이 거의 일정합니다.
+#        ngram 토큰(TIPS_NGRAM_TOKEN_SIZE, MySQL 기본 2글자)보다 짧은 검색어는 인덱스로 찾을 수 없어 LIKE로 처리합니다.
+# 그 외 DB(개발용 SQLite 등): 검색어별 LIKE 일치 여부로 점수 계산 (제목 2점, 내용 1점)
+# 결과는 (점수, id) 내림차순이며 커서도 이 두 값을 사용합니다. 점수는 반올림해서 커서 비교가 정확히 맞도록 합니다.
+
+TIPS_NGRAM_TOKEN_SIZE = int(os.getenv("TIPS_NGRAM_TOKEN_SIZE", 2))
+TIPS_SEARCH_MAX_TERMS = 5
+
+def _search_expressions(db: Session, q: str, terms: list[str]):
+    # (WHERE 조건, 점수 식) 반환
+    if db.get_bind().dialect.name == "mysql" and min(len(term) for term in terms) >= TIPS_NGRAM_TOKEN_SIZE:
+        relevance = match(RecipeTip.title, RecipeTip.content, against=q).in_natural_language_mode()
+        # WHERE에는 MATCH를 그대로 둬야 FULLTEXT 인덱스를 사용
+        return relevance, func.round(relevance, 6)
+    conditions = []
+    score = literal(0)
+    for term in terms:
+        in_title = RecipeTip.title.contains(term, autoescape=True)
+        in_content = RecipeTip.content.contains(term, autoescape=True)
+        conditions += [in_title, in_content]
+        score = score + case((in_title, 2), else_=0) + case((in_content, 1), else_=0)
+    return or_(*conditions), score
+
+
+# --- 팁 조회 캐시 ---
+# 팁은 거의 쓰이지 않고 홈 화면에서 계속 읽히므로, 단건/목록/피드 응답(JSON)을 ETag와 함께 캐시합니다.
+# - 캐시 키에 버전을 넣고, 팁을 작성/수정/삭제하면 버전을 올려 이전 응답을 모두 무효화합니다.
+#   (조회 시작 전의 버전으로 저장하므로, 조회 도중 쓰기가 끝나도 옛 내용이 새 버전으로 남지 않음)
+# - ETag는 응답 본문의 해시입니다. If-None-Match가 같으면 본문 없이 304를 보냅니다.
+#   (updated_at은 초 단위라 같은 초 안의 수정을 구분하지 못하고, 작성자 닉네임 변경도 반영하지 못하므로 본문으로 계산)
+# 캐시는 워커마다 따로 있으므로 다른 워커의 쓰기나 작성자 닉네임 변경은 TIPS_CACHE_TTL 이내에 반영됩니다.
+
+TIPS_CACHE_TTL = int(os.getenv("TIPS_CACHE_TTL", 30))
+TIPS_CACHE_MAX_ENTRIES = int(os.getenv("TIPS_CACHE_MAX_ENTRIES", 1000))
+
+tips_cache = TTLCache(TIPS_CACHE_MAX_ENTRIES, TIPS_CACHE_TTL)
+_tips_version = 0
+_tips_version_lock = threading.Lock()
+
+def bump_tips_version():
+    global _tips_version
+    with _tips_version_lock:
+        _tips_version += 1
+
+def _make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest()[:32] + '"'
+
+def cached_tips_response(request: Request, key: tuple, load) -> Response:
+    # load() -> 응답 모델. 캐시에 없을 때만 호출되어 DB를 조회
+    version = _tips_version
+    entry = tips_cache.get((version,) + key)
+    if entry is None:
+        body = load().model_dump_json().encode("utf-8")
+        entry = (body, _make_etag(body))
+        tips_cache.set((version,) + key, entry)
+    body, etag = entry
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+class TipList(RootModel[list[Tip]]):
+    pass
+
 
 # --- API Endpoints (라우터) ---
 
 @router.get("/", response_model=list[Tip])
-def read_tips(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    tips = db.query(RecipeTip).offset(skip).limit(limit).all()
-    return tips
+def read_tips(request: Request, skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+    def load():
+        tips = (
+            db.query(RecipeTip)
+            .options(joinedload(RecipeTip.owner))
+            .order_by(RecipeTip.id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        return TipList.model_validate(tips)
+    return cached_tips_response(request, ("list", skip, limit), load)
+
+@router.get("/feed", response_model=TipFeed, summary="팁 피드 (최신순, 커서 페이지네이션)")
+def read_tip_feed(request: Request, cursor: Optional[str] = None, limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_db)):
+    # OFFSET 대신 (created_at, id) 인덱스에서 커서 다음 위치부터 읽으므로 몇 번째 페이지든 비용이 같고,
+    # 작성자는 같은 쿼리에서 JOIN으로 (id, name만) 가져와 페이지당 쿼리 1번으로 끝납니다.
+    def load():
+        query = (
+            db.query(RecipeTip)
+            .join(RecipeTip.owner)
+            .options(
+                load_only(RecipeTip.id, RecipeTip.title, RecipeTip.content, RecipeTip.created_at),
+                contains_eager(RecipeTip.owner).load_only(User.id, User.name),
+            )
+        )
+        created_at_key, to_key = _feed_time(db)
+        if cursor:
+            created_at, tip_id = decode_cursor(cursor, datetime.fromisoformat, int)
+            created_at = to_key(created_at)
+            query = query.filter(or_(
+                created_at_key < created_at,
+                and_(created_at_key == created_at, RecipeTip.id < tip_id),
+            ))
+        # 한 개 더 읽어서 다음 페이지가 있는지 확인
+        tips = query.order_by(created_at_key.desc(), RecipeTip.id.desc()).limit(limit + 1).all()
+        next_cursor = encode_cursor(tips[limit - 1].created_at.isoformat(), tips[limit - 1].id) if len(tips) > limit else None
+        return TipFeed(items=[Tip.model_validate(tip) for tip in tips[:limit]], next_cursor=next_cursor)
+    return cached_tips_response(request, ("feed", cursor, limit), load)
+
+@router.get("/search", response_model=TipFeed, summary="팁 검색 (관련도순, 커서 페이지네이션)")
+def search_tips(
+    q: str = Query(..., min_length=1, max_length=100),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    terms = q.split()[:TIPS_SEARCH_MAX_TERMS]
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    condition, score = _search_expressions(db, " ".join(terms), terms)
+    score = score.label("score")
+
+    query = (
+        db.query(RecipeTip, score)
+        .join(RecipeTip.owner)
+        .options(
+            load_only(RecipeTip.id, RecipeTip.title, RecipeTip.content, RecipeTip.created_at),
+            contains_eager(RecipeTip.owner).load_only(User.id, User.name),
+        )
+        .filter(condition)
+    )
+    if cursor:
+        last_score, tip_id = decode_cursor(cursor, float, int)
+        query = query.filter(or_(score < last_score, and_(score == last_score, RecipeTip.id < tip_id)))
+    rows = query.order_by(score.desc(), RecipeTip.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        last_tip, last_score = rows[limit - 1]
+        next_cursor = encode_cursor(float(last_score), last_tip.id)
+    return {"items": [tip for tip, _ in rows[:limit]], "next_cursor": next_cursor}
 
 @router.post("/", response_model=Tip)
 def create_tip(tip: TipCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     db_tip = RecipeTip(**tip.dict(), owner_id=current_user.id)
     db.add(db_tip)
     db.commit()
+    bump_tips_version()
     db.refresh(db_tip)
     return db_tip
 
 @router.get("/{tip_id}", response_model=Tip)
-def read_tip(tip_id: int, db: Session = Depends(get_db)):
-    db_tip = db.query(RecipeTip).filter(RecipeTip.id == tip_id).first()
-    if db_tip is None:
-        raise HTTPException(status_code=404, detail="Tip not found")
-    return db_tip
+def read_tip(request: Request, tip_id: int, db: Session = Depends(get_db)):
+    def load():
+        db_tip = db.query(RecipeTip).options(joinedload(RecipeTip.owner)).filter(RecipeTip.id == tip_id).first()
+        if db_tip is None:
+            raise HTTPException(status_code=404, detail="Tip not found")
+        return Tip.model_validate(db_tip)
+    return cached_tips_response(request, ("tip", tip_id), load)
 
 @router.put("/{tip_id}", response_model=Tip)
 def update_tip(tip_id: int, tip: TipCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -86,6 +273,7 @@ def update_tip(tip_id: int, tip: TipCreate, db: Session = Depends(get_db), curre
         setattr(db_tip, key, value)
         
     db.commit()
+    bump_tips_version()
     db.refresh(db_tip)
     return db_tip
 
@@ -99,4 +287,5 @@ def delete_tip(tip_id: int, db: Session = Depends(get_db), current_user: User =
         
     db.delete(db_tip)
     db.commit()
-    return {"ok": True}
+    bump_tips_version()
+    return {"ok": True}
\ No newline at end of file
@@ -0,0 +1,60 @@
+import os
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from backend.auth.auth import Base, engine
+# 모든 모델을 Base.metadata에 등록하기 위해 import
+from backend.auth.auth import User  # noqa: F401
+from backend.routers.tips import RecipeTip  # noqa: F401
+from backend.services.recipe_corpus import CorpusRecipe  # noqa: F401
+
+# --- 데이터베이스 스키마 관리 ---
+# 테이블/인덱스 생성은 모듈 import 시점이 아니라 ensure_schema()로 명시적으로 실행합니다.
+# - 없는 테이블만 만들고, 이미 있는 테이블에는 모델에 새로 추가된 인덱스만 만듭니다. 기존 데이터는 지우지 않습니다.
+# - 여러 번 실행해도 결과가 같으므로, 여러 워커가 동시에 실행해도 됩니다. (먼저 만든 쪽이 있으면 한 번 더 확인만 함)
+# - 컬럼 추가/변경은 하지 않습니다.
+# 실행: python -m backend.schema
+# 서버 시작 시 자동 실행: AUTO_CREATE_SCHEMA=1 (기본값, 운영에서는 0으로 두고 배포 단계에서 위 명령을 실행)
+
+AUTO_CREATE_SCHEMA = os.getenv("AUTO_CREATE_SCHEMA", "1") == "1"
+
+
+def _create_missing(bind: Engine) -> list[str]:
+    created = []
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    missing_tables = [table for table in Base.metadata.sorted_tables if table.name not in existing_tables]
+    if missing_tables:
+        Base.metadata.create_all(bind=bind, tables=missing_tables)
+        created += [f"table {table.name}" for table in missing_tables]
+
+    for table in Base.metadata.sorted_tables:
+        if table in missing_tables:
+            continue
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing_indexes = [index for index in table.indexes if index.name not in existing_indexes]
+        if not missing_indexes:
+            continue
+        for index in missing_indexes:
+            index.create(bind=bind, checkfirst=True)  # 다른 DB 전용 인덱스(ddl_if)는 여기서 건너뜀
+        now_existing = {index["name"] for index in inspect(bind).get_indexes(table.name)}
+        created += [f"index {index.name}" for index in missing_indexes if index.name in now_existing]
+    return created
+
+
+def ensure_schema(bind: Engine = engine) -> list[str]:
+    try:
+        created = _create_missing(bind)
+    except (OperationalError, ProgrammingError) as e:
+        # 다른 워커가 같은 테이블/인덱스를 먼저 만든 경우: 현재 상태로 다시 확인
+        print(f"스키마 생성 중 충돌, 다시 확인합니다: {e.orig if hasattr(e, 'orig') else e}")
+        created = _create_missing(bind)
+    if created:
+        print(f"데이터베이스 스키마 생성: {', '.join(created)}")
+    return created
+
+
+if __name__ == "__main__":
+    ensure_schema()
+    print("데이터베이스 스키마 확인 완료")
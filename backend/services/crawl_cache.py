@@ -0,0 +1,161 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+# --- 크롤링 결과 영구 캐시 ---
+# 만개의 레시피 페이지에서 추출한 텍스트(제목/재료/조리법)를 URL 기준으로 로컬 SQLite 파일에 저장합니다.
+# - 서버를 재시작해도 유지되며, 여러 워커 프로세스가 같은 파일을 공유할 수 있습니다. (WAL 모드)
+# - TTL이 지나지 않은 항목은 바로 사용하고, 지난 항목은 ETag/Last-Modified로 조건부 요청을 보내 재검증합니다.
+# - 최대 항목 수를 넘으면 가장 오래 사용되지 않은 항목(LRU)부터 삭제합니다.
+#   조회 시각은 조회할 때마다 쓰지 않고 메모리에 모았다가, 저장할 때(=삭제할 항목을 고르기 전)나 일정 개수가 쌓이면 한 번에 기록합니다.
+#   (다른 워커가 아직 기록하지 않은 조회 시각은 그 워커의 다음 기록 전까지 반영되지 않음)
+
+CRAWL_CACHE_PATH = os.getenv("CRAWL_CACHE_PATH", str(Path(__file__).parent.parent / ".cache" / "crawl_cache.sqlite3"))
+CRAWL_CACHE_TTL = int(os.getenv("CRAWL_CACHE_TTL", 6 * 60 * 60)) # 초 단위 (기본 6시간)
+CRAWL_CACHE_MAX_ENTRIES = int(os.getenv("CRAWL_CACHE_MAX_ENTRIES", 5000))
+CRAWL_CACHE_ACCESS_BATCH = int(os.getenv("CRAWL_CACHE_ACCESS_BATCH", 100)) # 조회 시각을 모아서 기록하는 단위
+
+
+class CachedRecipe(NamedTuple):
+    url: str
+    title: str
+    ingredients: str
+    steps: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class CrawlCache:
+    def __init__(self, path: str, ttl: int, max_entries: int, access_batch: int = CRAWL_CACHE_ACCESS_BATCH):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.access_batch = access_batch
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._accessed: Dict[str, float] = {} # 아직 기록하지 않은 조회 시각
+        # 캐시 크기를 정하는 데 참고할 카운터
+        self.hits = 0          # TTL 안의 항목을 그대로 사용
+        self.misses = 0        # 캐시에 없어서 새로 다운로드
+        self.revalidated = 0   # TTL이 지났지만 304 Not Modified로 재사용
+        self.refreshed = 0     # TTL이 지났고 페이지가 바뀌어서 다시 다운로드
+        self.stale_served = 0  # 다운로드가 실패해서 만료된 항목을 대신 사용
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS crawl_cache (
+                    url TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    ingredients TEXT NOT NULL,
+                    steps TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_crawl_cache_accessed_at ON crawl_cache (accessed_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def is_fresh(self, entry: CachedRecipe, margin: float = 0) -> bool:
+        # margin: 남은 유효 시간이 이보다 짧으면 만료된 것으로 봄 (미리 데우기에서 곧 만료될 항목을 재검증할 때)
+        return time.time() - entry.fetched_at < self.ttl - margin
+
+    def _flush_accessed(self, conn: sqlite3.Connection):
+        # lock 안에서 호출
+        if self._accessed:
+            conn.executemany("UPDATE crawl_cache SET accessed_at = ? WHERE url = ?",
+                             [(accessed_at, url) for url, accessed_at in self._accessed.items()])
+            self._accessed = {}
+
+    def get(self, url: str) -> Optional[CachedRecipe]:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT url, title, ingredients, steps, etag, last_modified, fetched_at FROM crawl_cache WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._accessed[url] = time.time()
+            if len(self._accessed) >= self.access_batch:
+                self._flush_accessed(conn)
+                conn.commit()
+            return CachedRecipe(*row)
+
+    def lookup(self, url: str, margin: float = 0) -> Tuple[Optional[CachedRecipe], bool]:
+        # (항목, TTL 안인지). TTL 안이면 적중으로 셈. 만료된 항목도 재검증/대체용으로 함께 반환
+        entry = self.get(url)
+        fresh = entry is not None and self.is_fresh(entry, margin)
+        if fresh:
+            self.hits += 1
+        return entry, fresh
+
+    def put(self, url: str, title: str, ingredients: str, steps: str,
+            etag: Optional[str] = None, last_modified: Optional[str] = None):
+        # 새로 다운로드한 페이지 저장 (이미 있던 URL이면 refreshed, 없던 URL이면 misses로 셈)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            self._flush_accessed(conn)
+            existed = conn.execute("SELECT 1 FROM crawl_cache WHERE url = ?", (url,)).fetchone() is not None
+            conn.execute(
+                "INSERT OR REPLACE INTO crawl_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, title, ingredients, steps, etag, last_modified, now, now),
+            )
+            if existed:
+                self.refreshed += 1
+            else:
+                self.misses += 1
+            (count,) = conn.execute("SELECT COUNT(*) FROM crawl_cache").fetchone()
+            if count > self.max_entries:
+                evicted = conn.execute(
+                    "DELETE FROM crawl_cache WHERE url IN "
+                    "(SELECT url FROM crawl_cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                ).rowcount
+                self.evictions += evicted
+            conn.commit()
+
+    def renew(self, url: str):
+        # 304 응답을 받은 항목의 TTL을 다시 시작
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            self._accessed.pop(url, None)
+            conn.execute("UPDATE crawl_cache SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            conn.commit()
+            self.revalidated += 1
+
+    def served_stale(self, url: str):
+        # 다운로드/재검증에 실패해서 만료된 항목을 대신 사용함
+        self.stale_served += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            (size,) = self._connection().execute("SELECT COUNT(*) FROM crawl_cache").fetchone()
+        return {
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "refreshed": self.refreshed,
+            "stale_served": self.stale_served,
+            "evictions": self.evictions,
+        }
+
+
+crawl_cache = CrawlCache(CRAWL_CACHE_PATH, CRAWL_CACHE_TTL, CRAWL_CACHE_MAX_ENTRIES)
@@ -0,0 +1,107 @@
+import os
+import threading
+from typing import Any, Dict, Type
+
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+# --- Gemini / Google Custom Search 클라이언트 ---
+# 모듈을 import할 때는 아무것도 만들지 않고, 처음 사용할 때(또는 lifespan의 init_google_clients) 한 번만 초기화합니다.
+# uvicorn 워커/리로드마다 import 시점에 네트워크와 SDK 초기화 비용을 치르지 않도록 하기 위함입니다.
+# - Custom Search 서비스는 google-api-python-client에 포함된 discovery 문서(static_discovery)로 만들어 네트워크 요청이 없습니다.
+# - 필수 환경 변수가 없거나 초기화에 실패하면 None을 반환하고, 다음 호출 때 다시 시도하지 않습니다.
+
+dotenv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.env')
+load_dotenv(dotenv_path=dotenv_path)
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.5-flash")
+
+_lock = threading.Lock()
+_initialized = False
+_gemini_model = None
+_search_service = None
+
+
+def init_google_clients():
+    global _initialized, _gemini_model, _search_service
+    with _lock:
+        if _initialized:
+            return
+        try:
+            if not all([GEMINI_API_KEY, GOOGLE_API_KEY, GOOGLE_CSE_ID]):
+                raise ValueError("하나 이상의 필수 환경 변수가 설정되지 않았습니다.")
+
+            import google.generativeai as genai
+            from googleapiclient.discovery import build
+
+            genai.configure(api_key=GEMINI_API_KEY)
+            _gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+            _search_service = build(
+                "customsearch", "v1", developerKey=GOOGLE_API_KEY,
+                static_discovery=True, cache_discovery=False,
+            )
+            print("API 및 모델 초기화 성공 (google_clients.py)")
+        except Exception as e:
+            print(f"API 초기화 오류 (google_clients.py): {e}")
+            _gemini_model = None
+            _search_service = None
+        _initialized = True
+
+
+def get_gemini_model():
+    if not _initialized:
+        init_google_clients()
+    return _gemini_model
+
+
+def get_search_service():
+    if not _initialized:
+        init_google_clients()
+    return _search_service
+
+
+def reset_google_clients(gemini_model=None, search_service=None):
+    # 테스트/벤치마크에서 가짜 클라이언트를 넣을 때 사용
+    global _initialized, _gemini_model, _search_service
+    with _lock:
+        _initialized = True
+        _gemini_model = gemini_model
+        _search_service = search_service
+
+
+# --- 구조화된 출력(response_schema) ---
+# Gemini에 JSON 스키마를 주면 응답 텍스트가 항상 그 스키마의 JSON이라서 코드 펜스 제거 같은 정리 없이 바로 파싱할 수 있습니다.
+# SDK(google-generativeai)는 기본값이나 Optional 필드가 있는 pydantic 모델을 그대로 변환하지 못하므로,
+# 모델의 JSON 스키마를 Gemini가 받는 OpenAPI 부분집합(type/items/properties/required/nullable)으로 바꿉니다.
+
+_SCHEMA_TYPES = {"string": "STRING", "integer": "INTEGER", "number": "NUMBER", "boolean": "BOOLEAN",
+                 "array": "ARRAY", "object": "OBJECT"}
+
+
+def _to_gemini_schema(node: Dict[str, Any], definitions: Dict[str, Any]) -> Dict[str, Any]:
+    if "$ref" in node:
+        return _to_gemini_schema(definitions[node["$ref"].split("/")[-1]], definitions)
+    if "anyOf" in node:  # Optional[X] -> X + nullable
+        options = [option for option in node["anyOf"] if option.get("type") != "null"]
+        schema = _to_gemini_schema(options[0], definitions)
+        schema["nullable"] = True
+        return schema
+    schema: Dict[str, Any] = {"type": _SCHEMA_TYPES[node["type"]]}
+    if "description" in node:
+        schema["description"] = node["description"]
+    if node["type"] == "array":
+        schema["items"] = _to_gemini_schema(node["items"], definitions)
+    elif node["type"] == "object":
+        properties = node.get("properties", {})
+        schema["properties"] = {name: _to_gemini_schema(value, definitions) for name, value in properties.items()}
+        schema["required"] = list(node.get("required", []))
+    return schema
+
+
+def gemini_response_schema(model: Type[BaseModel], many: bool = False) -> Dict[str, Any]:
+    json_schema = model.model_json_schema()
+    schema = _to_gemini_schema(json_schema, json_schema.get("$defs", {}))
+    return {"type": "ARRAY", "items": schema} if many else schema
+
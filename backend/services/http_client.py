@@ -0,0 +1,61 @@
+import asyncio
+import os
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+# --- 공유 비동기 HTTP 클라이언트 ---
+# 요청마다 새로 TCP/TLS 연결을 맺지 않도록, keep-alive 연결 풀을 가진 클라이언트 하나를 앱 전체가 함께 사용합니다.
+# 호스트별 동시 요청 수를 세마포어로 제한해서, 한 사이트(만개의 레시피)에 요청이 몰려도 차단당하지 않도록 합니다.
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 50))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", 20))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", 6))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 3))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 5))
+HTTP_FETCH_TIMEOUT = float(os.getenv("HTTP_FETCH_TIMEOUT", 8)) # 요청 하나(대기 + 연결 + 다운로드)에 허용하는 전체 시간
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+_client: Optional[httpx.AsyncClient] = None
+_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            follow_redirects=True,
+        )
+    return _client
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = _host_semaphores[host] = asyncio.Semaphore(HTTP_PER_HOST_LIMIT)
+    return semaphore
+
+async def fetch(url: str, headers: Optional[dict] = None, timeout: Optional[float] = None) -> httpx.Response:
+    # 세마포어 대기 시간까지 포함해서 timeout 안에 끝나지 않으면 asyncio.TimeoutError 발생
+    async def _get():
+        async with _host_semaphore(url):
+            return await get_http_client().get(url, headers=headers)
+    return await asyncio.wait_for(_get(), timeout=HTTP_FETCH_TIMEOUT if timeout is None else min(timeout, HTTP_FETCH_TIMEOUT))
+
+async def close_http_client():
+    # 앱 종료 시(lifespan) 호출해서 열려 있는 keep-alive 연결을 정리
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _host_semaphores.clear()
@@ -0,0 +1,221 @@
+import hashlib
+import io
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+from starlette.datastructures import Headers, QueryParams
+
+from backend.core.process_pool import BoundedProcessPool
+
+# --- 프로필 이미지 처리 ---
+# 업로드된 원본을 그대로 PNG로 저장하지 않고, 화면에서 쓰는 크기(64/256/512)의 WebP와 호환용 JPEG 한 장을 만듭니다.
+# - 디코딩/리사이즈/인코딩은 CPU를 많이 쓰므로 프로세스 풀에서 실행합니다. (이벤트 루프와 다른 요청을 막지 않도록)
+# - 디코딩 전에 바이트 크기와 (헤더에 적힌) 픽셀 수를 먼저 확인해서 너무 큰 이미지는 바로 거절합니다.
+# - JPEG은 draft()로 필요한 크기에 가깝게 축소 디코딩하고, 그 외 형식은 reduce()로 먼저 크게 줄인 뒤 리샘플링합니다.
+# - 파일 이름은 (원본 내용 + 처리 설정)의 해시라서, 같은 이미지를 다시 올리면 처리 없이 기존 파일을 그대로 사용합니다.
+# - 같은 파일을 여러 사용자가 쓸 수 있으므로 이미지를 바꿀 때 바로 지우지 않고, 주기적인 정리(sweep_profile_images)에서
+#   아무도 쓰지 않고 grace 시간 동안 사용되지 않은 파일만 지웁니다. 기존 파일을 재사용할 때 수정 시각을 갱신하므로,
+#   업로드가 끝나고 URL이 저장되기 전에 정리가 돌아도 그 파일은 지워지지 않습니다.
+
+STATIC_DIR = Path(__file__).resolve().parents[2] / "static"
+PROFILE_IMAGE_SUBDIR = "profile"
+PROFILE_IMAGE_DIR = STATIC_DIR / PROFILE_IMAGE_SUBDIR
+PROFILE_IMAGE_URL_PREFIX = f"/static/{PROFILE_IMAGE_SUBDIR}/"
+
+PROFILE_IMAGE_MAX_BYTES = int(os.getenv("PROFILE_IMAGE_MAX_BYTES", 10 * 1024 * 1024))
+PROFILE_IMAGE_MAX_PIXELS = int(os.getenv("PROFILE_IMAGE_MAX_PIXELS", 40_000_000))
+PROFILE_IMAGE_SIZES = tuple(sorted(int(size) for size in os.getenv("PROFILE_IMAGE_SIZES", "64,256,512").split(",")))
+PROFILE_IMAGE_WEBP_QUALITY = int(os.getenv("PROFILE_IMAGE_WEBP_QUALITY", 80))
+PROFILE_IMAGE_JPEG_QUALITY = int(os.getenv("PROFILE_IMAGE_JPEG_QUALITY", 85))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+IMAGE_MAX_PENDING = int(os.getenv("IMAGE_MAX_PENDING", IMAGE_WORKERS * 4))
+PROFILE_IMAGE_SWEEP_INTERVAL = int(os.getenv("PROFILE_IMAGE_SWEEP_INTERVAL", 6 * 60 * 60)) # 초 단위
+PROFILE_IMAGE_SWEEP_GRACE = int(os.getenv("PROFILE_IMAGE_SWEEP_GRACE", 60 * 60)) # 이 시간 안에 만들거나 재사용한 파일은 남김
+
+# 처리 설정이 바뀌면 해시도 바뀌어서 예전 설정으로 만든 파일을 재사용하지 않음
+_PIPELINE_SIGNATURE = f"v1|{PROFILE_IMAGE_SIZES}|{PROFILE_IMAGE_WEBP_QUALITY}|{PROFILE_IMAGE_JPEG_QUALITY}".encode()
+_NAME_PATTERN = re.compile(r"^[0-9a-f]{24}$")
+_VARIANT_FILE_PATTERN = re.compile(r"^([0-9a-f]{24})(?:_\d+\.webp|\.jpg)$")
+_LEGACY_FILE_PATTERN = re.compile(r"^(\d+)_[^/\\]+\.png$")  # 예전 업로드: static/{사용자 id}_{파일 이름}.png
+
+image_pool = BoundedProcessPool(IMAGE_WORKERS, IMAGE_MAX_PENDING, name="image")
+
+
+class ImageRejected(Exception):
+    pass
+
+
+class ImageTooLarge(ImageRejected):
+    pass
+
+
+def content_name(data: bytes) -> str:
+    return hashlib.sha256(_PIPELINE_SIGNATURE + data).hexdigest()[:24]
+
+
+def _variant_files(name: str) -> Dict[str, str]:
+    files = {str(size): f"{name}_{size}.webp" for size in PROFILE_IMAGE_SIZES}
+    files["jpeg"] = f"{name}.jpg"
+    return files
+
+
+def url_content_name(profile_image_url: Optional[str]) -> Optional[str]:
+    # 이 파이프라인으로 만든 URL(/static/profile/<해시>.jpg)이면 해시, 아니면 None
+    if not profile_image_url or not profile_image_url.startswith(PROFILE_IMAGE_URL_PREFIX):
+        return None
+    name, ext = os.path.splitext(profile_image_url[len(PROFILE_IMAGE_URL_PREFIX):])
+    return name if ext == ".jpg" and _NAME_PATTERN.match(name) else None
+
+
+def variant_urls(profile_image_url: Optional[str]) -> Dict[str, str]:
+    # 크기별 URL, 예전 방식 URL이면 빈 dict 반환
+    name = url_content_name(profile_image_url)
+    if name is None:
+        return {}
+    return {key: PROFILE_IMAGE_URL_PREFIX + file for key, file in _variant_files(name).items()}
+
+
+def fallback_url(name: str) -> str:
+    return PROFILE_IMAGE_URL_PREFIX + _variant_files(name)["jpeg"]
+
+
+def is_processed(name: str) -> bool:
+    return all((PROFILE_IMAGE_DIR / file).exists() for file in _variant_files(name).values())
+
+
+def _touch_variants(name: str):
+    # 재사용하는 파일의 수정 시각을 갱신해서 정리 대상에서 빠지게 함
+    for file in _variant_files(name).values():
+        try:
+            os.utime(PROFILE_IMAGE_DIR / file)
+        except FileNotFoundError:
+            pass
+
+
+def sweep_profile_images(referenced: Iterable[Optional[str]], grace: float = PROFILE_IMAGE_SWEEP_GRACE) -> int:
+    # referenced: 사용자들의 profile_image_url. 어느 URL에도 속하지 않고 grace보다 오래된 변형 파일을 지우고 그 수를 반환
+    keep = {name for name in map(url_content_name, referenced) if name}
+    cutoff = time.time() - grace
+    removed = 0
+    if not PROFILE_IMAGE_DIR.is_dir():
+        return removed
+    for path in PROFILE_IMAGE_DIR.iterdir():
+        match = _VARIANT_FILE_PATTERN.match(path.name)  # 쓰는 중인 임시 파일(.*.tmp)은 해당하지 않음
+        if match is None or match.group(1) in keep:
+            continue
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:  # 다른 워커가 먼저 지움
+            pass
+    return removed
+
+
+def remove_legacy_image(profile_image_url: Optional[str], user_id: int) -> bool:
+    # 예전 방식 업로드 파일은 사용자별 이름이라 공유되지 않으므로, 그 사용자의 파일이면 바로 지움
+    if not profile_image_url or not profile_image_url.startswith("/static/"):
+        return False
+    file = profile_image_url[len("/static/"):]
+    match = _LEGACY_FILE_PATTERN.match(file)
+    if match is None or int(match.group(1)) != user_id:
+        return False
+    try:
+        (STATIC_DIR / file).unlink()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def select_profile_variant(path: str, headers: Headers, query: QueryParams) -> Tuple[Optional[str], Optional[str]]:
+    # 정적 파일 서빙(CachedStaticFiles)의 variant_resolver
+    # profile/<해시>.jpg 요청에 WebP를 받는 클라이언트면 WebP를, ?w=로 표시 폭을 주면 그보다 크거나 같은 가장 작은 크기를 보냄
+    directory, file = os.path.split(os.path.normpath(path))
+    name, ext = os.path.splitext(file)
+    if directory != PROFILE_IMAGE_SUBDIR or ext != ".jpg" or not _NAME_PATTERN.match(name):
+        return None, None
+    if "image/webp" not in headers.get("accept", ""):
+        return None, "Accept"
+    size = PROFILE_IMAGE_SIZES[-1]
+    width = query.get("w", "")
+    if width.isdigit():
+        size = next((candidate for candidate in PROFILE_IMAGE_SIZES if candidate >= int(width)), size)
+    return os.path.join(PROFILE_IMAGE_SUBDIR, _variant_files(name)[str(size)]), "Accept"
+
+
+# --- 워커 프로세스에서 실행되는 함수 ---
+
+def _open_checked(data: bytes) -> Image.Image:
+    if len(data) > PROFILE_IMAGE_MAX_BYTES:
+        raise ImageTooLarge("이미지 파일이 너무 큽니다.")
+    try:
+        image = Image.open(io.BytesIO(data))  # 헤더만 읽음 (픽셀 디코딩 전)
+    except (OSError, Image.DecompressionBombError):
+        raise ImageRejected("이미지 파일을 읽을 수 없습니다.")
+    width, height = image.size
+    if width * height > PROFILE_IMAGE_MAX_PIXELS:
+        raise ImageTooLarge("이미지 해상도가 너무 큽니다.")
+    return image
+
+
+def _save_atomic(image: Image.Image, path: Path, image_format: str, **params):
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    image.save(tmp_path, image_format, **params)
+    os.replace(tmp_path, path)
+
+
+def process_profile_image(data: bytes, name: str) -> List[str]:
+    image = _open_checked(data)
+    largest = PROFILE_IMAGE_SIZES[-1]
+
+    # JPEG은 디코딩 단계에서 1/2, 1/4, 1/8로 축소 (가장 큰 변형보다 작아지지 않는 범위에서)
+    image.draft("RGB", (largest, largest))
+    try:
+        image = ImageOps.exif_transpose(image)  # 여기서 픽셀 디코딩 (휴대폰 사진의 회전 정보 반영)
+    except (OSError, SyntaxError, ValueError):
+        raise ImageRejected("이미지 파일을 읽을 수 없습니다.")
+
+    factor = min(image.size) // largest
+    if factor >= 2:
+        image = image.reduce(factor)
+
+    # 투명 배경은 흰색으로 채워서 RGB로 변환
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+
+    PROFILE_IMAGE_DIR.mkdir(parents=True, exist_ok=True)
+    files = _variant_files(name)
+    written = []
+    for size in sorted(PROFILE_IMAGE_SIZES, reverse=True):  # 큰 것부터 줄여가며 만듦
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        if size == largest:
+            _save_atomic(image, PROFILE_IMAGE_DIR / files["jpeg"], "JPEG",
+                         quality=PROFILE_IMAGE_JPEG_QUALITY, optimize=True, progressive=True)
+            written.append(files["jpeg"])
+        _save_atomic(image, PROFILE_IMAGE_DIR / files[str(size)], "WEBP",
+                     quality=PROFILE_IMAGE_WEBP_QUALITY, method=4)
+        written.append(files[str(size)])
+    return written
+
+
+# --- 이벤트 루프에서 쓰는 함수 ---
+
+async def store_profile_image(data: bytes) -> str:
+    # 처리된 이미지의 대표 URL(JPEG) 반환. 같은 내용의 이미지가 이미 처리되어 있으면 재사용
+    if len(data) > PROFILE_IMAGE_MAX_BYTES:
+        raise ImageTooLarge("이미지 파일이 너무 큽니다.")
+    name = content_name(data)
+    if is_processed(name):
+        _touch_variants(name)
+    else:
+        await image_pool.run(process_profile_image, data, name)
+    return fallback_url(name)
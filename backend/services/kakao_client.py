@@ -0,0 +1,75 @@
+import asyncio
+import hashlib
+import os
+from typing import NamedTuple
+
+import httpx
+
+from backend.core.cache import TTLCache
+from backend.core.singleflight import SingleFlight
+from backend.services.http_client import fetch
+
+# --- 카카오 사용자 정보 조회 ---
+# 공유 HTTP 클라이언트(keep-alive)로 kapi.kakao.com을 호출해서 로그인마다 TLS 연결을 새로 맺지 않습니다.
+# 모바일 클라이언트는 같은 액세스 토큰으로 몇 초 안에 여러 번 재시도하므로,
+# 토큰 해시 -> (email, social_id) 결과를 짧게 캐시하고, 동시에 들어온 같은 토큰 요청은 한 번만 호출합니다.
+# 실패 결과는 캐시하지 않습니다. (이메일 동의 후 바로 재시도하는 경우)
+
+KAKAO_USER_INFO_URL = "https://kapi.kakao.com/v2/user/me"
+KAKAO_TIMEOUT = float(os.getenv("KAKAO_TIMEOUT", 5))
+KAKAO_PROFILE_CACHE_TTL = int(os.getenv("KAKAO_PROFILE_CACHE_TTL", 60))
+KAKAO_PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("KAKAO_PROFILE_CACHE_MAX_ENTRIES", 1000))
+
+
+class KakaoProfile(NamedTuple):
+    email: str
+    social_id: str
+
+
+class KakaoAuthError(Exception):
+    pass
+
+
+kakao_profile_cache = TTLCache(KAKAO_PROFILE_CACHE_MAX_ENTRIES, KAKAO_PROFILE_CACHE_TTL)
+kakao_flights = SingleFlight()
+
+
+async def _request_profile(access_token: str) -> KakaoProfile:
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-type": "application/x-www-form-urlencoded;charset=utf-8",
+    }
+    try:
+        response = await fetch(KAKAO_USER_INFO_URL, headers=headers, timeout=KAKAO_TIMEOUT)
+    except (httpx.HTTPError, asyncio.TimeoutError) as e:
+        print(f"카카오 사용자 정보 요청 실패: {e!r}")
+        raise KakaoAuthError("카카오 사용자 정보 조회 실패")
+
+    if response.status_code != 200:
+        raise KakaoAuthError("카카오 사용자 정보 조회 실패")
+    try:
+        user_info_json = response.json()
+    except ValueError:  # 프록시 오류 페이지 등 JSON이 아닌 200 응답
+        raise KakaoAuthError("카카오 사용자 정보 조회 실패")
+    if not isinstance(user_info_json, dict):
+        raise KakaoAuthError("카카오 사용자 정보 조회 실패")
+
+    kakao_account = user_info_json.get("kakao_account")
+    if not kakao_account or "email" not in kakao_account:
+        raise KakaoAuthError("카카오 계정에 이메일 정보가 없습니다. (사용자 동의 필요)")
+
+    return KakaoProfile(email=kakao_account.get("email"), social_id=str(user_info_json.get("id")))
+
+
+async def get_kakao_profile(access_token: str) -> KakaoProfile:
+    key = hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+    profile = kakao_profile_cache.get(key)
+    if profile is not None:
+        return profile
+
+    async def compute():
+        profile = await _request_profile(access_token)
+        kakao_profile_cache.set(key, profile)
+        return profile
+
+    return await kakao_flights.do(key, compute)
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import re
+from typing import List, Optional
+
+from backend.core.metrics import registry
+
+# --- Gemini 프롬프트 구성 ---
+# 두 번의 Gemini 호출(키워드 생성, 순위화)에 쓰는 프롬프트를 만듭니다.
+# - 사용자 요청 블록은 요청마다 한 번만 만들어서 두 프롬프트가 함께 씁니다.
+# - 크롤링한 레시피 텍스트는 중복 제거 후 공백/불필요한 줄을 정리하고, 조리 단계 수와 길이를 제한합니다.
+# - 그래도 호출당 토큰 예산을 넘으면 각 레시피의 조리법을 길이에 비례해서 잘라 내고,
+#   제목/재료만으로도 넘으면 긴 레시피부터 뺍니다.
+
+GEMINI_PROMPT_TOKEN_BUDGET = int(os.getenv("GEMINI_PROMPT_TOKEN_BUDGET", 4000)) # 순위화 프롬프트 입력 토큰 예산
+RECIPE_MAX_STEPS = int(os.getenv("RECIPE_MAX_STEPS", 12))
+RECIPE_STEP_MAX_CHARS = int(os.getenv("RECIPE_STEP_MAX_CHARS", 160))
+RECIPE_MAX_INGREDIENT_LINES = int(os.getenv("RECIPE_MAX_INGREDIENT_LINES", 40))
+
+# 재료 영역에 섞여 들어오는 링크/버튼 문구
+_BOILERPLATE_LINES = {"구매", "구매하기", "[재료]", "[양념]", "재료", "양념", "계량법 안내", "동영상"}
+_STEP_PREFIX = re.compile(r"^\d+\.\s*")
+
+RANKING_JSON_FORMAT = json.dumps([{"name": "string", "description": "string", "ingredients": ["string"], "cooking_time": 0, "cost": 0, "tags": ["string"], "instructions": ["string"], "source_url": "string"}], ensure_ascii=False, indent=2)
+
+
+def estimate_tokens(text: str) -> int:
+    # 대략적인 추정치: 영문/숫자는 약 4자당 1토큰, 한글은 약 1.5자당 1토큰
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return int(ascii_chars / 4 + (len(text) - ascii_chars) / 1.5) + 1
+
+def render_request_block(request) -> str:
+    return "\n".join([
+        f"- 식사 목표: {request.meal_goal or '지정 안 함'}",
+        f"- 최대 조리 시간: {request.cooking_time or '지정 안 함'}분",
+        f"- 최대 비용: {request.cost or '지정 안 함'}원",
+        f"- 포함할 재료: {', '.join(request.include_ingredients or []) or '없음'}",
+        f"- 보유 재료: {', '.join(request.available_ingredients or []) or '없음'}",
+        f"- 선호 키워드: {', '.join(request.preference_keywords or []) or '없음'}",
+        f"- 기피 키워드: {', '.join(request.avoid_keywords or []) or '없음'}",
+    ])
+
+def build_keyword_prompt(request_block: str) -> str:
+    return f"""사용자의 다음 요청에 가장 적합한 '만개의 레시피' 검색 키워드 3개를 생성해줘.
+각 키워드는 검색에 최적화된 단순하고 명확한 형태로, 한 줄에 하나씩만 응답해줘.
+
+[사용자 요청]
+{request_block}
+
+[검색 키워드 예시]
+닭가슴살 다이어트 요리
+초간단 김치찌개
+자취생 간단요리
+"""
+
+# 키워드 생성 호출 없이 요청 필드로 검색어를 만드는 경우 (RECOMMEND_SINGLE_CALL)
+# 같은 요청이면 항상 같은 검색어가 나와서 검색 캐시에도 잘 맞음
+QUICK_TIME_WORDS = ((10, "초간단"), (30, "간단"))
+CHEAP_COST_WORDS = ((5000, "자취생"), (10000, "저렴한"))
+
+def _first_word(thresholds, value: Optional[int]) -> Optional[str]:
+    if value is None:
+        return None
+    return next((word for limit, word in thresholds if value <= limit), None)
+
+def synthesize_keywords(request, count: int = 3) -> List[str]:
+    goal = (request.meal_goal or "").strip()
+    include = list(request.include_ingredients or [])
+    available = [item for item in (request.available_ingredients or []) if item not in include]
+    preferences = list(request.preference_keywords or [])
+    modifier = _first_word(QUICK_TIME_WORDS, request.cooking_time) or _first_word(CHEAP_COST_WORDS, request.cost)
+    main_ingredients = include or available
+
+    candidates = [
+        " ".join(filter(None, [*main_ingredients[:2], goal])),
+        " ".join(filter(None, [modifier, preferences[0] if preferences else None, main_ingredients[0] if main_ingredients else goal, "요리"])),
+        " ".join(filter(None, [*available[:2], *include[:1], "레시피"])) if available else " ".join(filter(None, [goal, modifier, "집밥"])),
+    ]
+    # 기피 키워드는 검색 연산자로 제외 (만개의 레시피 사이트 검색에도 그대로 적용됨)
+    exclude = " ".join(f"-{word}" for word in (request.avoid_keywords or [])[:2])
+    keywords = []
+    for candidate in candidates:
+        candidate = re.sub(r"\s+", " ", candidate).strip()
+        if candidate and candidate not in ("요리", "레시피", "집밥") and candidate not in keywords:
+            keywords.append(candidate)
+    if not keywords:
+        keywords.append("간단 집밥 요리")
+    return [f"{keyword} {exclude}".strip() for keyword in keywords[:count]]
+
+def _ranking_prompt(request_block: str, recipes_text: str) -> str:
+    return f"""다음은 내가 '만개의 레시피'에서 수집한 레시피 정보다.
+
+[사용자 최초 요청]
+{request_block}
+
+[수집된 레시피 정보]
+{recipes_text}
+
+[너의 임무]
+1. 위 [사용자 최초 요청]에 가장 부합하는 순서대로 [수집된 레시피 정보]의 순위를 매겨라.
+2. 순위가 매겨진 3개의 레시피를 각각 아래 JSON 형식에 맞춰 완벽하게 정리해라.
+3. 최종 결과는 반드시 3개의 JSON 객체를 포함하는 단일 JSON 배열(리스트)로만 응답해라. 다른 텍스트는 절대 포함하지 마라.
+
+[JSON 응답 형식]
+{RANKING_JSON_FORMAT}
+"""
+
+# --- 크롤링 텍스트 정리 ---
+
+class _RecipeParts:
+    # crawl_recipe가 만든 "URL/제목/재료/조리법" 형식의 텍스트를 나눠서 다룸
+    def __init__(self, text: str):
+        self.header: List[str] = []
+        self.ingredients: List[str] = []
+        self.steps: List[str] = []
+        section = "header"
+        for raw_line in text.split("\n"):
+            line = re.sub(r"\s+", " ", raw_line).strip()
+            if not line:
+                continue
+            if line.startswith("재료:"):
+                section = "ingredients"
+                line = line[len("재료:"):].strip()
+            elif line.startswith("조리법:"):
+                section = "steps"
+                continue
+            if section == "header":
+                self.header.append(line)
+            elif section == "ingredients":
+                if line and line not in _BOILERPLATE_LINES:
+                    self.ingredients.append(line)
+            else:
+                step = _STEP_PREFIX.sub("", line)
+                if step:
+                    self.steps.append(step)
+
+    def render(self, step_chars: Optional[int] = None) -> str:
+        steps = [step[:RECIPE_STEP_MAX_CHARS] for step in self.steps[:RECIPE_MAX_STEPS]]
+        if step_chars is not None: # 예산 초과 시: 조리법 전체 길이를 step_chars 이하로
+            trimmed, used = [], 0
+            for step in steps:
+                if used >= step_chars:
+                    break
+                step = step[:max(step_chars - used, 0)]
+                trimmed.append(step)
+                used += len(step)
+            steps = trimmed
+        lines = list(self.header)
+        lines.append("재료: " + ", ".join(self.ingredients[:RECIPE_MAX_INGREDIENT_LINES]))
+        lines.append("조리법:")
+        lines.extend(f"{i+1}. {step}" for i, step in enumerate(steps))
+        return "\n".join(lines)
+
+    def steps_length(self) -> int:
+        return sum(len(step[:RECIPE_STEP_MAX_CHARS]) for step in self.steps[:RECIPE_MAX_STEPS])
+
+def compact_recipe_texts(crawled_texts: List[str], token_budget: int) -> List[str]:
+    # 1. 중복 제거 (같은 페이지가 여러 키워드로 검색된 경우)
+    seen = set()
+    parts = []
+    for text in crawled_texts:
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        parts.append(_RecipeParts(text))
+
+    # 2. 정리 + 단계 수/길이 제한
+    compacted = [part.render() for part in parts]
+    total = sum(estimate_tokens(text) for text in compacted)
+    if total <= token_budget:
+        return compacted
+
+    # 3. 제목/재료만으로도 예산을 넘으면 긴 레시피부터 뺌 (남은 레시피는 검색 순서 유지, 최소 1개)
+    fixed = [estimate_tokens(part.render(step_chars=0)) for part in parts]
+    kept = sorted(range(len(parts)), key=lambda i: fixed[i])
+    while len(kept) > 1 and sum(fixed[i] for i in kept) > token_budget:
+        kept.pop()
+    kept.sort()
+
+    # 4. 남은 예산을 조리법 길이에 비례해서 나눔 (제목/재료는 유지)
+    #    토큰 추정이 글자 수에 정확히 비례하지 않으므로, 넘치면 비율을 조금씩 더 줄임
+    step_tokens = sum(estimate_tokens(compacted[i]) - fixed[i] for i in kept)
+    ratio = min(max(token_budget - sum(fixed[i] for i in kept), 0) / step_tokens, 1.0) if step_tokens else 0.0
+    while True:
+        result = [parts[i].render(step_chars=int(parts[i].steps_length() * ratio)) for i in kept]
+        if ratio <= 0 or sum(estimate_tokens(text) for text in result) <= token_budget:
+            return result
+        ratio = ratio - 0.05 if ratio > 0.05 else 0.0
+
+def build_ranking_prompt(request_block: str, crawled_texts: List[str]) -> str:
+    overhead = estimate_tokens(_ranking_prompt(request_block, ""))
+    recipe_texts = compact_recipe_texts(crawled_texts, max(GEMINI_PROMPT_TOKEN_BUDGET - overhead, 0))
+    return _ranking_prompt(request_block, "\n---\n".join(recipe_texts))
+
+REPAIR_MAX_CHARS = int(os.getenv("REPAIR_MAX_CHARS", 8000))
+
+def _repair_prompt(request_block: str, recipes_text: str, broken_text: str, error: str) -> str:
+    return f"""아래 [이전 응답]은 [수집된 레시피 정보]를 [사용자 최초 요청]에 맞게 순위화한 JSON 배열인데, 형식이 깨져서 파싱에 실패했다.
+[이전 응답]의 레시피 순서를 따르되, 각 레시피의 재료와 조리법은 반드시 [수집된 레시피 정보]에서 다시 채워서 아래 JSON 형식의 배열로 작성해라.
+[수집된 레시피 정보]에서 재료나 조리법을 찾을 수 없는 레시피는 배열에서 빼라. 다른 텍스트는 절대 포함하지 마라.
+
+[사용자 최초 요청]
+{request_block}
+
+[수집된 레시피 정보]
+{recipes_text}
+
+[이전 응답]
+{broken_text[:REPAIR_MAX_CHARS]}
+
+[파싱 오류]
+{error}
+
+[JSON 응답 형식]
+{RANKING_JSON_FORMAT}
+"""
+
+def build_repair_prompt(request_block: str, crawled_texts: List[str], broken_text: str, error: str) -> str:
+    # 순위화 응답이 형식에 맞지 않을 때: 검색/크롤링은 다시 하지 않고, 이미 수집한 레시피(순위화와 같은 정리/예산)와
+    # 깨진 응답을 함께 보내서 다시 작성하게 함 (잘린 응답의 빈 필드를 추측으로 채우지 않도록)
+    overhead = estimate_tokens(_repair_prompt(request_block, "", broken_text, error))
+    recipe_texts = compact_recipe_texts(crawled_texts, max(GEMINI_PROMPT_TOKEN_BUDGET - overhead, 0))
+    return _repair_prompt(request_block, "\n---\n".join(recipe_texts), broken_text, error)
+
+gemini_tokens = registry.counter("gemini_tokens_total", "Gemini 호출의 입력/출력 토큰 수", ("stage", "kind"))
+TOKEN_STAGE_NAMES = {"keywords": "키워드 생성", "ranking": "순위화", "ranking_stream": "순위화(스트리밍)", "repair": "응답 복구"}
+
+def log_token_usage(stage: str, response):
+    # Gemini 응답의 usage_metadata로 호출별 입력/출력 토큰 수 기록 (스트리밍은 끝까지 읽은 뒤 호출)
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    gemini_tokens.inc(stage, "prompt", amount=usage.prompt_token_count or 0)
+    gemini_tokens.inc(stage, "output", amount=usage.candidates_token_count or 0)
+    print(f"Gemini 토큰 사용량 ({TOKEN_STAGE_NAMES.get(stage, stage)}): 입력 {usage.prompt_token_count}, 출력 {usage.candidates_token_count}")
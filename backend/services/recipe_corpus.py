@@ -0,0 +1,229 @@
+import array
+import asyncio
+import bisect
+import json
+import os
+import re
+import unicodedata
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, func
+from sqlalchemy.exc import IntegrityError
+
+from backend.auth.auth import Base, SessionLocal, run_db
+
+# --- 로컬 레시피 코퍼스 + 재료 역색인 ---
+# 크롤링 후 Gemini가 정리한 레시피(Recipe)를 recipe_corpus 테이블에 모아 두고,
+# 메모리에는 '재료/태그/이름 토큰 -> 레시피 id 배열' 형태의 역색인을 유지합니다.
+# 요청 조건에 충분히 맞는 레시피가 코퍼스에 있으면 검색/크롤링(1~2단계)을 건너뛰고 바로 답합니다.
+
+CORPUS_MIN_MATCHES = int(os.getenv("CORPUS_MIN_MATCHES", 3))     # 로컬로 답하려면 필요한 레시피 수
+CORPUS_MIN_COVERAGE = float(os.getenv("CORPUS_MIN_COVERAGE", 0.5)) # 포함 재료 외의 요청 조건 중 맞아야 하는 비율
+CORPUS_LOAD_BATCH = int(os.getenv("CORPUS_LOAD_BATCH", 500))
+CORPUS_REFRESH_INTERVAL = int(os.getenv("CORPUS_REFRESH_INTERVAL", 300)) # 다른 워커가 저장한 레시피를 가져오는 주기(초)
+
+# 점수 가중치: 포함할 재료는 필수 조건이면서 가장 중요한 신호
+# 포함 재료는 후보를 거르는 데만 쓰고, 로컬로 답할지는 나머지 조건(보유 재료/선호 키워드/식사 목표)이
+# CORPUS_MIN_COVERAGE 비율 이상 맞는지로 판단 (흔한 재료 하나만 맞는 레시피가 모든 요청에 답하지 않도록)
+INCLUDE_WEIGHT = 3
+AVAILABLE_WEIGHT = 1
+PREFERENCE_WEIGHT = 1
+
+# 재료 문자열에서 버릴 단위/수량 표현 ("돼지고기 200g", "간장 2큰술" -> 돼지고기, 간장)
+_UNIT_WORDS = {
+    "g", "kg", "ml", "l", "t", "cc", "개", "컵", "큰술", "작은술", "스푼", "숟가락", "티스푼", "꼬집", "줌",
+    "약간", "적당량", "조금", "모", "장", "대", "쪽", "알", "봉", "봉지", "팩", "인분", "구매",
+}
+
+
+class CorpusRecipe(Base):
+    __tablename__ = "recipe_corpus"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_url = Column(String(500), unique=True, nullable=False)
+    name = Column(String(255), nullable=False)
+    data = Column(Text, nullable=False) # Recipe JSON
+    created_at = Column(DateTime, server_default=func.now())
+
+
+def tokenize(text: Optional[str]) -> Set[str]:
+    if not text:
+        return set()
+    text = unicodedata.normalize("NFC", text).lower()
+    text = re.sub(r"\([^)]*\)|\[[^\]]*\]", " ", text) # 괄호 안의 부가 설명 제거
+    return {token for token in re.findall(r"[가-힣a-z]+", text) if token not in _UNIT_WORDS}
+
+
+def _contains(posting: array.array, recipe_id: int) -> bool:
+    index = bisect.bisect_left(posting, recipe_id)
+    return index < len(posting) and posting[index] == recipe_id
+
+
+class RecipeIndex:
+    def __init__(self):
+        self._recipes: Dict[int, dict] = {}
+        self._limits: Dict[int, Tuple[int, int]] = {} # id -> (조리 시간, 비용)
+        self._postings: Dict[str, array.array] = {}   # 토큰 -> 레시피 id 배열 (unsigned int)
+        self._urls: Set[str] = set()
+        self._load_cursor = 0 # DB에서 여기까지 읽어 옴 (id 기준)
+        self._pending: Set[asyncio.Task] = set()
+        self.local_answers = 0
+        self.saved = 0
+
+    def add(self, recipe_id: int, data: dict):
+        if recipe_id in self._recipes:
+            return
+        self._recipes[recipe_id] = data
+        self._limits[recipe_id] = (int(data.get("cooking_time") or 0), int(data.get("cost") or 0))
+        if data.get("source_url"):
+            self._urls.add(data["source_url"])
+
+        tokens = tokenize(data.get("name"))
+        for text in list(data.get("ingredients") or []) + list(data.get("tags") or []):
+            tokens |= tokenize(text)
+        for token in tokens:
+            posting = self._postings.setdefault(token, array.array("I"))
+            if posting and posting[-1] > recipe_id: # 보통은 id 순서로 들어오지만, 늦게 도착한 저장분도 정렬 유지
+                posting.insert(bisect.bisect_left(posting, recipe_id), recipe_id)
+            else:
+                posting.append(recipe_id)
+
+    def _match(self, term: str) -> Set[int]:
+        # 검색어의 모든 토큰을 가진 레시피: 가장 짧은 posting의 id를 나머지 정렬된 posting에서 이분 탐색
+        # (posting을 set으로 바꾸지 않으므로 흔한 토큰이 섞여도 비용은 가장 짧은 posting 길이에 비례)
+        postings = sorted((self._postings.get(token) for token in tokenize(term)), key=lambda posting: len(posting or ()))
+        if not postings or not postings[0]:
+            return set()
+        result = list(postings[0])
+        for posting in postings[1:]:
+            result = [recipe_id for recipe_id in result if _contains(posting, recipe_id)]
+            if not result:
+                break
+        return set(result)
+
+    def search(self, request, limit: int = 3) -> List[dict]:
+        if len(self._recipes) < CORPUS_MIN_MATCHES:
+            return []
+
+        scores: Dict[int, float] = {}
+        candidates: Optional[Set[int]] = None
+        for term in request.include_ingredients or []:
+            matched = self._match(term)
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return []
+        for recipe_id in candidates or ():
+            scores[recipe_id] = INCLUDE_WEIGHT * len(request.include_ingredients)
+
+        # 포함 재료 외의 조건별로 맞은 수를 세어서 비율(coverage)로 판단
+        matched_terms: Dict[int, int] = {}
+        soft_terms = 0
+        for terms, weight in ((request.available_ingredients, AVAILABLE_WEIGHT),
+                              (list(request.preference_keywords or []) + [request.meal_goal or ""], PREFERENCE_WEIGHT)):
+            for term in terms or []:
+                if not tokenize(term):
+                    continue
+                soft_terms += 1
+                for recipe_id in self._match(term):
+                    if candidates is None or recipe_id in candidates:
+                        scores[recipe_id] = scores.get(recipe_id, 0) + weight
+                        matched_terms[recipe_id] = matched_terms.get(recipe_id, 0) + 1
+
+        excluded: Set[int] = set()
+        for term in request.avoid_keywords or []:
+            excluded |= self._match(term)
+
+        results = []
+        for recipe_id, score in scores.items():
+            if recipe_id in excluded:
+                continue
+            if soft_terms and matched_terms.get(recipe_id, 0) / soft_terms < CORPUS_MIN_COVERAGE:
+                continue
+            cooking_time, cost = self._limits[recipe_id]
+            if request.cooking_time and cooking_time > request.cooking_time:
+                continue
+            if request.cost and cost > request.cost:
+                continue
+            results.append((score, recipe_id))
+
+        if len(results) < CORPUS_MIN_MATCHES:
+            return []
+        results.sort(reverse=True) # 점수가 같으면 최근에 저장된 레시피 우선
+        self.local_answers += 1
+        return [self._recipes[recipe_id] for _, recipe_id in results[:limit]]
+
+    # --- DB 동기화 ---
+
+    def _load_batch(self, after_id: int, batch: int) -> List[Tuple[int, str]]:
+        db = SessionLocal()
+        try:
+            return db.query(CorpusRecipe.id, CorpusRecipe.data) \
+                .filter(CorpusRecipe.id > after_id) \
+                .order_by(CorpusRecipe.id) \
+                .limit(batch).all()
+        finally:
+            db.close()
+
+    async def refresh(self):
+        # 마지막으로 읽은 id 이후의 레시피만 배치 단위로 읽어 옴 (시작 시 전체 로드도 같은 방식)
+        while True:
+            rows = await run_db(self._load_batch, self._load_cursor, CORPUS_LOAD_BATCH)
+            for recipe_id, data in rows:
+                self.add(recipe_id, json.loads(data))
+                self._load_cursor = recipe_id
+            if len(rows) < CORPUS_LOAD_BATCH:
+                return
+            await asyncio.sleep(0) # 배치 사이에 다른 요청 처리
+
+    async def run_loader(self):
+        # lifespan에서 백그라운드 작업으로 실행
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"레시피 코퍼스 로드 오류: {e!r}")
+            await asyncio.sleep(CORPUS_REFRESH_INTERVAL)
+
+    def _save(self, recipes: List[dict]) -> List[Tuple[int, dict]]:
+        saved = []
+        db = SessionLocal()
+        try:
+            for data in recipes:
+                url = data.get("source_url")
+                if not url or url in self._urls:
+                    continue
+                row = CorpusRecipe(source_url=url, name=data["name"][:255], data=json.dumps(data, ensure_ascii=False))
+                db.add(row)
+                try:
+                    db.commit()
+                    saved.append((row.id, data))
+                except IntegrityError: # 다른 워커가 먼저 저장함
+                    db.rollback()
+        finally:
+            db.close()
+        return saved
+
+    async def save(self, recipes: List[dict]):
+        try:
+            for recipe_id, data in await run_db(self._save, recipes):
+                self.add(recipe_id, data)
+                self.saved += 1
+        except Exception as e:
+            print(f"레시피 코퍼스 저장 오류: {e!r}")
+
+    def schedule_save(self, recipes: List[dict]):
+        # 응답을 늦추지 않도록 저장은 백그라운드에서 처리
+        task = asyncio.ensure_future(self.save(recipes))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def stats(self) -> dict:
+        return {
+            "recipes": len(self._recipes),
+            "tokens": len(self._postings),
+            "local_answers": self.local_answers,
+            "saved": self.saved,
+        }
+
+
+recipe_index = RecipeIndex()
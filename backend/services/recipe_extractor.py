@@ -0,0 +1,144 @@
+from typing import List, Optional, Tuple
+
+from lxml import etree
+
+# --- 레시피 페이지 추출 엔진 ---
+# 만개의 레시피 페이지는 스크립트/광고가 많아 크지만, 실제로 필요한 것은 첫 번째 h3, div.ready_ingre3,
+# div.view_step_cont 뿐입니다. 전체 BeautifulSoup 트리를 만드는 대신 lxml(libxml2)의 target 파서로
+# 원본 바이트를 한 번 훑으면서 필요한 영역의 텍스트만 모읍니다. (트리를 만들지 않으므로 메모리도 적게 씀)
+#
+# 결과 텍스트는 기존 BeautifulSoup 코드의 get_text(strip=True) / get_text('\n', strip=True)와 같은 규칙을 따릅니다.
+# - 태그나 주석으로 나뉜 텍스트 조각마다 앞뒤 공백을 제거하고, 빈 조각은 버림
+# - script/style/template/rt/rp 안의 텍스트는 포함하지 않음 (BeautifulSoup도 get_text에서 제외)
+# - <![CDATA[...]]>는 html.parser처럼 별도의 텍스트 조각으로 포함 (libxml2는 주석으로 넘겨줌)
+#
+# 알려진 차이: 태그가 잘못 중첩된 문서에서는 결과가 다를 수 있습니다.
+# libxml2는 HTML4 규칙대로 태그를 암묵적으로 닫지만(<p> 안의 <h3>가 <p>를 닫는 등), html.parser+BeautifulSoup은
+# 열린 태그를 닫지 않고 닫는 태그가 나올 때 그 태그까지 한꺼번에 닫습니다. target 파서는 libxml2가 이미 고친
+# 이벤트만 받으므로 원래 순서를 알 수 없습니다.
+#   <p><h3>x</p>y</h3>  -> BeautifulSoup 'x', 이 모듈 'xy'
+#   <h3>a<p>b</h3>c     -> BeautifulSoup 'ab', 이 모듈 'a'
+# 그 밖에 주석 <!--[CDATA[...]]-->은 CDATA와 구분되지 않아 텍스트로 들어가고, '>'가 들어 있는 CDATA는 libxml2가
+# 첫 '>'에서 끊습니다. 이런 경우는 benchmarks/bench_extract.py의 MALFORMED_FIXTURES로 확인합니다.
+
+_EXCLUDED_TAGS = {"script", "style", "template", "rt", "rp"}
+
+NO_TITLE = "제목 없음"
+NO_INGREDIENTS = "재료 정보 없음"
+
+
+class _Capture:
+    __slots__ = ("kind", "depth", "strings", "index")
+
+    def __init__(self, kind: str, index: int = 0):
+        self.kind = kind
+        self.depth = 1
+        self.strings: List[str] = []
+        self.index = index # 조리 단계의 순서 (시작 태그 기준, 중첩된 단계도 BeautifulSoup과 같은 순서)
+
+
+class _RecipeTarget:
+    def __init__(self):
+        self.title: Optional[str] = None
+        self.ingredients: Optional[str] = None
+        self.steps: List[str] = []
+        self._active: List[_Capture] = []
+        self._text: List[str] = []
+        self._excluded_depth = 0
+
+    def _flush(self):
+        # 지금까지 모은 텍스트 조각 하나를 마무리 (태그/주석이 나오면 조각이 끝남)
+        if self._text:
+            if self._active and not self._excluded_depth:
+                text = "".join(self._text).strip()
+                if text:
+                    for capture in self._active:
+                        capture.strings.append(text)
+            self._text = []
+
+    def _finish(self, capture: _Capture):
+        if capture.kind == "title":
+            self.title = "".join(capture.strings)
+        elif capture.kind == "ingredients":
+            self.ingredients = "\n".join(capture.strings)
+        else:
+            self.steps[capture.index] = "".join(capture.strings)
+
+    def start(self, tag, attrib):
+        self._flush()
+        for capture in self._active:
+            capture.depth += 1
+        if tag in _EXCLUDED_TAGS:
+            self._excluded_depth += 1
+
+        if tag == "h3":
+            if self.title is None and not any(c.kind == "title" for c in self._active):
+                self._active.append(_Capture("title"))
+        elif tag == "div":
+            classes = (attrib.get("class") or "").split()
+            if "ready_ingre3" in classes and self.ingredients is None \
+                    and not any(c.kind == "ingredients" for c in self._active):
+                self._active.append(_Capture("ingredients"))
+            if "view_step_cont" in classes:
+                self._active.append(_Capture("step", len(self.steps)))
+                self.steps.append("")
+
+    def end(self, tag):
+        self._flush()
+        if tag in _EXCLUDED_TAGS and self._excluded_depth:
+            self._excluded_depth -= 1
+        still_open = []
+        for capture in self._active:
+            capture.depth -= 1
+            if capture.depth == 0:
+                self._finish(capture)
+            else:
+                still_open.append(capture)
+        self._active = still_open
+
+    def data(self, data):
+        self._text.append(data)
+
+    def comment(self, text):
+        self._flush()
+        if text[:7].upper() == "[CDATA[" and text.endswith("]]"):
+            self._text.append(text[7:-2])
+            self._flush()
+
+    def pi(self, target, data=None):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        for capture in self._active: # 문서가 중간에 끝난 경우
+            self._finish(capture)
+        self._active = []
+        return self
+
+
+def _keep_carriage_returns(content: bytes) -> bytes:
+    # libxml2는 텍스트의 '\r'을 지워 버리지만 html.parser는 그대로 둠.
+    # 태그 밖 텍스트의 '\r'을 문자 참조로 바꿔서 기존 출력과 똑같이 유지 (태그 안은 건드리지 않음)
+    parts = content.split(b"<")
+    for i in range(len(parts)):
+        part = parts[i]
+        if b"\r" not in part:
+            continue
+        tag_end = part.find(b">") if i else -1
+        parts[i] = part[:tag_end + 1] + part[tag_end + 1:].replace(b"\r", b"&#13;")
+    return b"<".join(parts)
+
+def extract_recipe_fields(content: bytes, encoding: Optional[str] = "utf-8") -> Tuple[str, str, str]:
+    # content: 응답 원본 바이트 (문자열로 디코딩 후 다시 파싱하는 과정을 생략)
+    # encoding: HTTP 헤더의 charset. 없으면 기존 코드(response.text)와 같이 UTF-8로 처리
+    if b"\r" in content:
+        content = _keep_carriage_returns(content)
+    target = _RecipeTarget()
+    parser = etree.HTMLParser(target=target, encoding=encoding or "utf-8", no_network=True)
+    parser.feed(content)
+    parser.close()
+
+    title = target.title if target.title is not None else NO_TITLE
+    ingredients_text = target.ingredients if target.ingredients is not None else NO_INGREDIENTS
+    steps_text = "\n".join(f"{i+1}. {step}" for i, step in enumerate(target.steps))
+    return title, ingredients_text, steps_text
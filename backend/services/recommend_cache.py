@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from typing import List, Optional
+
+from backend.core.cache import TTLCache
+
+# --- 추천 결과 캐시 ---
+# 의미가 같은 추천 요청(재료 순서/대소문자/공백 차이, None과 [] 차이 등)을 하나의 '정규화된 요청'으로 모아서
+# 한 번 만든 추천 결과를 재사용합니다.
+# 조리 시간과 비용은 구간의 아래 경계로 내려서 묶습니다. 파이프라인도 이 정규화된 요청으로 실행하므로,
+# 예를 들어 25분 요청에서 만든 결과(최대 20분 기준)는 같은 구간의 어떤 요청 조건도 만족합니다.
+
+RECOMMEND_CACHE_TTL = int(os.getenv("RECOMMEND_CACHE_TTL", 60 * 60)) # 초 단위 (기본 1시간)
+RECOMMEND_CACHE_MAX_ENTRIES = int(os.getenv("RECOMMEND_CACHE_MAX_ENTRIES", 500))
+
+COOKING_TIME_BUCKETS = (5, 10, 15, 20, 30, 45, 60, 90, 120, 180) # 분
+COST_BUCKETS = (1000, 3000, 5000, 7000, 10000, 15000, 20000, 30000, 50000, 100000) # 원
+
+LIST_FIELDS = ("include_ingredients", "available_ingredients", "preference_keywords", "avoid_keywords")
+
+
+def _normalize_text(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    value = re.sub(r"\s+", " ", unicodedata.normalize("NFC", value)).strip().lower()
+    return value or None
+
+def _normalize_list(values: Optional[List[str]]) -> List[str]:
+    return sorted({text for text in (_normalize_text(v) for v in values or []) if text})
+
+def _bucket_down(value: Optional[int], buckets: tuple) -> Optional[int]:
+    if not value or value <= 0: # 0은 기존 프롬프트에서도 '지정 안 함'과 같음
+        return None
+    lower = [bucket for bucket in buckets if bucket <= value]
+    return lower[-1] if lower else value
+
+def canonicalize_request(request):
+    # RecommendationRequest -> 같은 타입의 정규화된 요청
+    fields = {
+        "meal_goal": _normalize_text(request.meal_goal),
+        "cooking_time": _bucket_down(request.cooking_time, COOKING_TIME_BUCKETS),
+        "cost": _bucket_down(request.cost, COST_BUCKETS),
+    }
+    for field in LIST_FIELDS:
+        fields[field] = _normalize_list(getattr(request, field))
+    return type(request)(**fields)
+
+def request_cache_key(canonical_request) -> str:
+    fields = {"meal_goal": canonical_request.meal_goal,
+              "cooking_time": canonical_request.cooking_time,
+              "cost": canonical_request.cost}
+    for field in LIST_FIELDS:
+        fields[field] = getattr(canonical_request, field)
+    raw = json.dumps(fields, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+recommend_cache = TTLCache(RECOMMEND_CACHE_MAX_ENTRIES, RECOMMEND_CACHE_TTL)
@@ -0,0 +1,101 @@
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+from backend.core.cache import TTLCache
+
+# --- Google Custom Search 결과 캐시 + 일일 할당량 관리 ---
+# Gemini가 만드는 검색 키워드는 비슷한 것이 반복되므로, 같은 검색은 API를 다시 부르지 않고 캐시에서 답합니다.
+# 유료 일일 할당량은 여러 워커 프로세스와 재시작에 걸쳐 세어야 하므로 로컬 SQLite 파일에 기록합니다.
+
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 24 * 60 * 60)) # 초 단위 (기본 하루)
+SEARCH_CACHE_NEGATIVE_TTL = int(os.getenv("SEARCH_CACHE_NEGATIVE_TTL", 10 * 60)) # 검색 결과가 없을 때
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 2000))
+CSE_DAILY_QUOTA = int(os.getenv("CSE_DAILY_QUOTA", 100))
+CSE_QUOTA_RESERVE = int(os.getenv("CSE_QUOTA_RESERVE", 5)) # 이만큼 남으면 캐시 전용 모드로 전환
+QUOTA_DB_PATH = os.getenv("QUOTA_DB_PATH", str(Path(__file__).parent.parent / ".cache" / "quota.sqlite3"))
+
+# Google API 할당량은 태평양 시간 자정에 초기화됨 (서머타임은 무시)
+_QUOTA_TZ = timezone(timedelta(hours=-8))
+
+
+def normalize_query(query: str) -> str:
+    # 유니코드 정규화 + 공백 정리 + 소문자: "초간단  김치찌개 " == "초간단 김치찌개"
+    query = unicodedata.normalize("NFC", query)
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class QuotaAccountant:
+    def __init__(self, api: str, daily_limit: int, reserve: int, path: str):
+        self.api = api
+        self.daily_limit = daily_limit
+        self.reserve = reserve
+        self.path = path
+        self.denied = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS api_quota ("
+                "day TEXT NOT NULL, api TEXT NOT NULL, used INTEGER NOT NULL, PRIMARY KEY (day, api))"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(_QUOTA_TZ).date().isoformat()
+
+    @property
+    def soft_limit(self) -> int:
+        return max(self.daily_limit - self.reserve, 0)
+
+    def try_acquire(self) -> bool:
+        # 호출 1회분을 예약. 한도에 가까우면 False (UPDATE 한 문장으로 처리해서 프로세스 간에도 원자적)
+        day = self._today()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("INSERT OR IGNORE INTO api_quota VALUES (?, ?, 0)", (day, self.api))
+            acquired = conn.execute(
+                "UPDATE api_quota SET used = used + 1 WHERE day = ? AND api = ? AND used < ?",
+                (day, self.api, self.soft_limit),
+            ).rowcount == 1
+            conn.commit()
+        if not acquired:
+            self.denied += 1
+        return acquired
+
+    def used_today(self) -> int:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT used FROM api_quota WHERE day = ? AND api = ?", (self._today(), self.api)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def remaining(self) -> int:
+        return max(self.soft_limit - self.used_today(), 0)
+
+    def stats(self) -> dict:
+        used = self.used_today()
+        return {
+            "daily_limit": self.daily_limit,
+            "reserve": self.reserve,
+            "used_today": used,
+            "remaining": max(self.soft_limit - used, 0),
+            "denied": self.denied,
+        }
+
+
+search_cache = TTLCache(SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_TTL)
+search_quota = QuotaAccountant("customsearch", CSE_DAILY_QUOTA, CSE_QUOTA_RESERVE, QUOTA_DB_PATH)
@@ -0,0 +1,18 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# --- 테스트 공통 설정 ---
+# backend 모듈은 import할 때 환경 변수를 읽으므로, 어떤 테스트 모듈보다 먼저 임시 SQLite DB와 캐시 파일을 쓰도록 설정합니다.
+# 실행: 저장소 루트에서 python -m pytest backend/tests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+_work_dir = Path(tempfile.mkdtemp(prefix="backend-tests-"))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_work_dir / 'test.sqlite3'}")
+os.environ.setdefault("QUOTA_DB_PATH", str(_work_dir / "quota.sqlite3"))
+os.environ.setdefault("CRAWL_CACHE_PATH", str(_work_dir / "crawl_cache.sqlite3"))
+os.environ.setdefault("JWT_SECRET_KEY", "test")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+os.environ.setdefault("WARMUP_ENABLED", "0")
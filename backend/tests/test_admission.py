@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from backend.core.admission import AdmissionController, AdmissionRejected
+
+
+def _controller(**overrides):
+    options = dict(initial_limit=1, min_limit=1, max_limit=4, max_queue=10, max_queue_per_key=5, queue_timeout=1)
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+def test_queued_keys_take_turns():
+    async def scenario():
+        controller = _controller()
+        order = []
+        release = asyncio.Event()
+
+        async def job(key, name, hold=None):
+            async with controller.slot(key):
+                order.append(name)
+                if hold is not None:
+                    await hold.wait()
+
+        holder = asyncio.ensure_future(job("a", "a1", release))
+        await asyncio.sleep(0)
+        others = [asyncio.ensure_future(job(key, name)) for key, name in (("a", "a2"), ("a", "a3"), ("b", "b1"))]
+        await asyncio.sleep(0)
+        assert controller.stats()["queued"] == 3 and controller.stats()["queued_keys"] == 2
+        release.set()
+        await asyncio.gather(holder, *others)
+        assert order == ["a1", "a2", "b1", "a3"]
+        assert controller.running == 0 and controller.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_rejects_when_queues_are_full_or_wait_is_too_long():
+    async def scenario():
+        controller = _controller(max_queue=3, max_queue_per_key=1, queue_timeout=0.05)
+        release = asyncio.Event()
+
+        async def hold(key):
+            async with controller.slot(key):
+                await release.wait()
+
+        tasks = [asyncio.ensure_future(hold(key)) for key in ("a", "a", "b")]
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as key_full:
+            await hold("a")
+        assert key_full.value.reason == "key_queue_full" and key_full.value.retry_after >= 1
+        tasks.append(asyncio.ensure_future(hold("c")))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as queue_full:
+            await hold("d")
+        assert queue_full.value.reason == "queue_full"
+
+        results = await asyncio.gather(*tasks[1:], return_exceptions=True)  # 대기 중인 셋은 시간 초과
+        assert [error.reason for error in results] == ["queue_timeout"] * 3
+        release.set()
+        await tasks[0]
+        assert controller.rejected == {"queue_full": 1, "key_queue_full": 1, "queue_timeout": 3}
+        assert controller.running == 0 and controller.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        controller = _controller()
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.slot("a"):
+                await release.wait()
+
+        holder = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.queued == 0
+        release.set()
+        await holder
+        assert controller.running == 0
+
+    asyncio.run(scenario())
+
+
+def test_overload_shrinks_limit_within_bounds():
+    async def scenario():
+        controller = _controller(initial_limit=4, min_limit=2)
+        for _ in range(10):
+            with pytest.raises(asyncio.TimeoutError):
+                async with controller.slot("a"):
+                    raise asyncio.TimeoutError()
+        assert controller.limit == 2 and controller.overloads == 10
+
+        with pytest.raises(ValueError):  # 과부하가 아닌 오류는 한도를 바꾸지 않음
+            async with controller.slot("a"):
+                raise ValueError()
+        assert controller.limit == 2
+
+        for _ in range(50):  # 빠르게 끝나는 작업이 계속되면 최대 한도 안에서 다시 늘어남
+            async with controller.slot("a"):
+                pass
+        assert 2 <= controller.limit <= 4
+
+    asyncio.run(scenario())
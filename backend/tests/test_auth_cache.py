@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from backend.auth import auth
+from backend.auth.auth import SessionLocal, SocialUserCreate, User, UserCreate, create_user, get_current_user, save_user, \
+    upsert_social_user, user_cache
+from backend.schema import ensure_schema
+
+EMAIL = "cache-user@test"
+
+
+@pytest.fixture
+def db():
+    ensure_schema()
+    session = SessionLocal()
+    session.query(User).filter(User.email == EMAIL).delete()
+    session.commit()
+    user_cache.clear()
+    auth.token_cache.clear()
+    yield session
+    session.close()
+    user_cache.clear()
+
+
+def _cache_stale_snapshot():
+    user_cache.set(EMAIL, {"id": -1, "email": EMAIL, "name": "예전 이름"})
+
+
+def test_create_user_invalidates_cache(db):
+    _cache_stale_snapshot()
+    create_user(db, UserCreate(email=EMAIL, password="pw"), "hash")
+    assert user_cache.get(EMAIL) is None
+
+
+def test_save_user_invalidates_cache(db):
+    user = create_user(db, UserCreate(email=EMAIL, password="pw"), "hash")
+    _cache_stale_snapshot()
+    user.name = "새 이름"
+    save_user(db, user)
+    assert user_cache.get(EMAIL) is None
+
+
+def test_upsert_social_user_invalidates_cache(db):
+    _cache_stale_snapshot()
+    user = upsert_social_user(db, SocialUserCreate(email=EMAIL, social_provider="kakao", social_id="1"))
+    assert user.email == EMAIL and user_cache.get(EMAIL) is None
+
+    user_cache.set(EMAIL, auth._user_snapshot(user))
+    assert upsert_social_user(db, SocialUserCreate(email=EMAIL, social_provider="kakao", social_id="1")).id == user.id
+    assert user_cache.get(EMAIL) is None
+
+
+def test_snapshot_keeps_password_hash_out_of_memory(db):
+    user = create_user(db, UserCreate(email=EMAIL, password="pw"), "secret-hash")
+    token = auth.create_access_token({"sub": EMAIL})
+
+    first = asyncio.run(get_current_user(token, db))
+    assert first.id == user.id
+    assert "password" not in user_cache.get(EMAIL)
+
+    # 캐시에서 만든 객체도 비밀번호가 필요하면 DB에서 읽어 옴
+    other = SessionLocal()
+    try:
+        cached = asyncio.run(get_current_user(token, other))
+        assert cached.name == "" and cached.password == "secret-hash"
+        cached.name = "닉네임"  # 닉네임 변경처럼 저장해도 비밀번호는 그대로
+        save_user(other, cached)
+    finally:
+        other.close()
+    db.expire_all()
+    assert db.query(User.name, User.password).filter(User.email == EMAIL).one() == ("닉네임", "secret-hash")
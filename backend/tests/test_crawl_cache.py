@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from backend.routers import recommend
+from backend.services.crawl_cache import CrawlCache
+
+URL = "https://www.10000recipe.com/recipe/1"
+PAGE = "<h3>김치찌개</h3><div class='ready_ingre3'>김치</div><div class='view_step_cont'>끓인다</div>".encode("utf-8")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CrawlCache(str(tmp_path / "crawl.sqlite3"), ttl=60, max_entries=100, access_batch=2)
+
+
+class FakeFetch:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.headers = []
+
+    async def __call__(self, url, headers=None, timeout=None):
+        self.headers.append(headers)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def _response(status, content=b"", headers=None):
+    return httpx.Response(status, content=content, headers=headers or {}, request=httpx.Request("GET", URL))
+
+
+def _crawl(monkeypatch, cache, *responses):
+    fetch = FakeFetch(*responses)
+    monkeypatch.setattr(recommend, "crawl_cache", cache)
+    monkeypatch.setattr(recommend, "fetch", fetch)
+    return asyncio.run(recommend.crawl_recipe(URL)), fetch
+
+
+def _expire(cache):
+    cache._connection().execute("UPDATE crawl_cache SET fetched_at = ?", (time.time() - 3600,))
+
+
+def test_miss_then_hit(monkeypatch, cache):
+    text, fetch = _crawl(monkeypatch, cache, _response(200, PAGE, {"ETag": '"v1"'}))
+    assert "제목: 김치찌개" in text and fetch.headers == [{}]
+    again, fetch = _crawl(monkeypatch, cache)  # 다운로드 없이 캐시에서
+    assert again == text and fetch.headers == []
+    assert (cache.misses, cache.hits) == (1, 1)
+
+
+def test_expired_entry_is_revalidated_with_304(monkeypatch, cache):
+    cache.put(URL, "김치찌개", "김치", "1. 끓인다", etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    _expire(cache)
+    entry, fresh = cache.lookup(URL)
+    assert entry is not None and not fresh
+
+    text, fetch = _crawl(monkeypatch, cache, _response(304))
+    assert "김치찌개" in text
+    assert fetch.headers == [{"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}]
+    assert cache.revalidated == 1 and cache.lookup(URL)[1]  # TTL이 다시 시작됨
+
+
+def test_expired_entry_is_refreshed_when_page_changed(monkeypatch, cache):
+    cache.put(URL, "예전 제목", "김치", "1. 끓인다")
+    _expire(cache)
+    text, _ = _crawl(monkeypatch, cache, _response(200, PAGE))
+    assert "제목: 김치찌개" in text
+    assert (cache.misses, cache.refreshed) == (1, 1)
+
+
+def test_stale_entry_is_served_when_fetch_fails(monkeypatch, cache):
+    cache.put(URL, "김치찌개", "김치", "1. 끓인다")
+    _expire(cache)
+    text, _ = _crawl(monkeypatch, cache, httpx.ConnectError("down"))
+    assert "김치찌개" in text and cache.stale_served == 1
+
+    missing, _ = _crawl(monkeypatch, CrawlCache(cache.path + "-empty", 60, 100), httpx.ConnectError("down"))
+    assert missing is None
+
+
+def test_lru_eviction_uses_batched_access_times(cache):
+    cache.max_entries = 2
+    cache.put("a", "a", "", "")
+    cache.put("b", "b", "", "")
+    cache.get("a")  # 아직 메모리에만 있는 조회 시각도 삭제 전에 기록됨
+    cache.put("c", "c", "", "")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.evictions == 1 and cache.stats()["size"] == 2
@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.core.deadline import Deadline, LatencyTracker, hedged
+
+
+def test_deadline_budget_is_capped_by_remaining_time():
+    deadline = Deadline(0.5)
+    assert deadline.budget(10) <= 0.5
+    assert deadline.budget(0.1) == 0.1
+    assert not deadline.expired
+    assert Deadline(0).expired and Deadline(0).budget(10) == 0.0
+
+
+def test_latency_tracker_uses_default_until_enough_samples():
+    tracker = LatencyTracker(default=2.0, min_samples=5)
+    for seconds in range(4):
+        tracker.record(seconds)
+    assert tracker.p95() == 2.0
+    for seconds in range(4, 100):
+        tracker.record(seconds)
+    assert tracker.p95() == 94
+
+
+def _attempt(log, name, seconds, result=None, error=None):
+    async def run():
+        log.append(f"{name}:start")
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            log.append(f"{name}:cancelled")
+            raise
+        if error is not None:
+            raise error
+        return result
+    return run
+
+
+def test_hedged_fast_primary_never_starts_backup():
+    log = []
+    result = asyncio.run(hedged(_attempt(log, "primary", 0, "a"), _attempt(log, "backup", 0, "b"), delay=1))
+    assert result == "a"
+    assert log == ["primary:start"]
+
+
+def test_hedged_slow_primary_loses_to_backup_and_is_cancelled():
+    log = []
+    started = time.monotonic()
+    result = asyncio.run(hedged(_attempt(log, "primary", 5, "a"), _attempt(log, "backup", 0, "b"), delay=0.05))
+    assert result == "b"
+    assert time.monotonic() - started < 1
+    assert log == ["primary:start", "backup:start", "primary:cancelled"]
+
+
+def test_hedged_failed_primary_starts_backup_immediately():
+    log = []
+    result = asyncio.run(hedged(_attempt(log, "primary", 0, error=ValueError("x")), _attempt(log, "backup", 0, "b"), delay=5))
+    assert result == "b"
+
+    # None은 실패로 보고 backup 결과를 기다림
+    log = []
+    assert asyncio.run(hedged(_attempt(log, "primary", 0), _attempt(log, "backup", 0.01, "b"), delay=5)) == "b"
+
+
+def test_hedged_all_failures():
+    log = []
+    with pytest.raises(KeyError):
+        asyncio.run(hedged(_attempt(log, "primary", 0, error=ValueError()), _attempt(log, "backup", 0, error=KeyError()), delay=1))
+    assert asyncio.run(hedged(_attempt(log, "primary", 0), None, delay=1)) is None
@@ -0,0 +1,84 @@
+import asyncio
+
+import bcrypt
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.auth import auth, hashing
+from backend.auth.auth import SessionLocal, User
+from backend.schema import ensure_schema
+
+EMAIL = "hash@test"
+
+
+@pytest.fixture(autouse=True)
+def fast_rounds(monkeypatch):
+    monkeypatch.setattr(hashing, "current_rounds", 4)  # 테스트에서는 가장 낮은 cost
+
+
+def test_hash_and_verify():
+    hashed = asyncio.run(hashing.hash_password("비밀번호"))
+    assert hashing.hash_rounds(hashed) == 4
+    assert asyncio.run(hashing.verify_password("비밀번호", hashed))
+    assert not asyncio.run(hashing.verify_password("다른 비밀번호", hashed))
+    assert not asyncio.run(hashing.verify_password("비밀번호", "plain-text"))
+
+
+def test_passwords_are_truncated_to_72_bytes_like_passlib():
+    long_password = "a" * 72
+    hashed = asyncio.run(hashing.hash_password(long_password + "ignored"))
+    assert asyncio.run(hashing.verify_password(long_password, hashed))
+    assert asyncio.run(hashing.verify_password(long_password + "different", hashed))
+    # 기존 passlib이 만든 해시($2b$, 72바이트 잘림)도 그대로 검증됨
+    legacy = bcrypt.hashpw(("가" * 30).encode("utf-8")[:72], bcrypt.gensalt(4)).decode("ascii")
+    assert asyncio.run(hashing.verify_password("가" * 30, legacy))
+
+
+def test_needs_rehash_only_upwards(monkeypatch):
+    monkeypatch.setattr(hashing, "current_rounds", 12)
+    assert hashing.needs_rehash("$2b$11$" + "x" * 53)
+    assert not hashing.needs_rehash("$2b$12$" + "x" * 53)
+    assert not hashing.needs_rehash("$2b$13$" + "x" * 53)
+    assert hashing.needs_rehash("not-a-bcrypt-hash")
+
+
+def test_calibration_never_goes_below_the_floor(monkeypatch):
+    class FastPool:
+        def __init__(self, elapsed_ms):
+            self.elapsed_ms = elapsed_ms
+
+        async def run(self, func, rounds):
+            assert rounds == hashing.BCRYPT_MIN_ROUNDS
+            return self.elapsed_ms
+
+    monkeypatch.setattr(hashing, "BCRYPT_ROUNDS", None)
+    assert hashing.BCRYPT_MIN_ROUNDS >= 12
+    monkeypatch.setattr(hashing, "hash_pool", FastPool(elapsed_ms=5))  # 아주 빠른 서버
+    assert asyncio.run(hashing.calibrate()) == hashing.BCRYPT_MAX_ROUNDS
+    monkeypatch.setattr(hashing, "hash_pool", FastPool(elapsed_ms=1000))  # 아주 느린 서버
+    assert asyncio.run(hashing.calibrate()) == hashing.BCRYPT_MIN_ROUNDS
+
+
+def test_login_rehashes_a_weaker_hash(monkeypatch):
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        db.query(User).filter(User.email == EMAIL).delete()
+        db.add(User(email=EMAIL, name="해시", password=bcrypt.hashpw(b"pw", bcrypt.gensalt(4)).decode("ascii")))
+        db.commit()
+    finally:
+        db.close()
+    monkeypatch.setattr(hashing, "current_rounds", 5)
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/auth")
+    client = TestClient(app)
+
+    assert client.post("/auth/login", data={"username": EMAIL, "password": "wrong"}).status_code == 401
+    assert client.post("/auth/login", data={"username": EMAIL, "password": "pw"}).status_code == 200
+    db = SessionLocal()
+    try:
+        stored = db.query(User.password).filter(User.email == EMAIL).scalar()
+    finally:
+        db.close()
+    assert hashing.hash_rounds(stored) == 5 and bcrypt.checkpw(b"pw", stored.encode("ascii"))
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from backend.core.json_stream import JsonArrayStreamParser
+
+RECIPES = [
+    {"name": "김치찌개", "ingredients": ["김치", "돼지고기"], "tips": {"heat": "중불"}},
+    {"name": 'say "hi" {not a brace}', "instructions": ["a]b", "c\\\\d"]},
+    {"name": "빈 배열", "tags": []},
+]
+
+
+def test_chunk_boundaries_do_not_matter():
+    text = "```json\n" + json.dumps(RECIPES, ensure_ascii=False, indent=2) + "\n```"
+    for size in (1, 2, 7, len(text)):
+        parser = JsonArrayStreamParser()
+        parsed = []
+        for start in range(0, len(text), size):
+            parsed.extend(parser.feed(text[start:start + size]))
+        assert parsed == RECIPES
+        assert parser.finished
+
+
+def test_objects_are_emitted_as_soon_as_they_close():
+    parser = JsonArrayStreamParser()
+    assert parser.feed('[{"a": 1}, {"b": ') == [{"a": 1}]
+    assert parser.feed('"x\\"}"') == []
+    assert parser.feed("}") == [{"b": 'x"}'}]
+    assert not parser.finished
+    assert parser.feed("] trailing [{\"c\": 3}]") == []
+    assert parser.finished
+
+
+def test_text_before_array_is_ignored():
+    parser = JsonArrayStreamParser()
+    assert parser.feed('Sure! {"ignored": true} [') == []
+    assert parser.feed('{"a": 1}]') == [{"a": 1}]
+    assert parser.errors == []
+
+
+def test_bad_object_is_skipped_without_losing_its_neighbours():
+    parser = JsonArrayStreamParser()
+    assert parser.feed('[{"a": 1}, {"b": 2,}, {"c": 3}') == [{"a": 1}, {"c": 3}]
+    assert [type(error) for error in parser.errors] == [json.JSONDecodeError]
+    assert parser.feed(', {"d": 4}]') == [{"d": 4}]
+    assert parser.finished
@@ -0,0 +1,83 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from backend.auth import auth
+from backend.auth.auth import SessionLocal, SocialUserCreate, User, engine, upsert_social_user, user_cache
+from backend.schema import ensure_schema
+from backend.services import kakao_client
+from backend.services.kakao_client import KakaoAuthError
+
+EMAIL = "kakao@test"
+
+
+@pytest.fixture
+def db():
+    ensure_schema()
+    session = SessionLocal()
+    session.query(User).filter(User.email == EMAIL).delete()
+    session.commit()
+    user_cache.clear()
+    kakao_client.kakao_profile_cache.clear()
+    yield session
+    session.close()
+    user_cache.clear()
+
+
+@pytest.fixture
+def statements():
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def _kakao_responds(monkeypatch, response: httpx.Response):
+    async def fake_fetch(url, **kwargs):
+        return response
+
+    monkeypatch.setattr(kakao_client, "fetch", fake_fetch)
+
+
+@pytest.mark.parametrize("response", [
+    httpx.Response(200, text="<html>Bad Gateway</html>"),
+    httpx.Response(200, json=["not", "an", "object"]),
+    httpx.Response(200, json={"id": 1, "kakao_account": {}}),
+    httpx.Response(401, json={"msg": "this access token does not exist"}),
+])
+def test_bad_profile_responses_raise_kakao_auth_error(monkeypatch, response):
+    _kakao_responds(monkeypatch, response)
+    with pytest.raises(KakaoAuthError):
+        asyncio.run(kakao_client._request_profile("token"))
+
+
+def test_non_json_profile_is_a_400_not_a_500(monkeypatch, db):
+    _kakao_responds(monkeypatch, httpx.Response(200, text="<html>Bad Gateway</html>"))
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/auth")
+    response = TestClient(app).post("/auth/login/kakao", json={"access_token": "html-token"})
+    assert response.status_code == 400
+
+
+def test_upsert_is_one_statement_for_new_and_existing_users(db, statements):
+    info = SocialUserCreate(email=EMAIL, social_provider="kakao", social_id="42")
+
+    created = upsert_social_user(db, info)
+    assert [s.split()[0] for s in statements] == ["INSERT"]
+    assert (created.email, created.social_id, created.name) == (EMAIL, "42", "")
+
+    statements.clear()
+    again = upsert_social_user(db, SocialUserCreate(email=EMAIL, social_provider="kakao", social_id="other"))
+    assert [s.split()[0] for s in statements] == ["INSERT"]
+    # 이미 있던 계정은 그대로 (social_id/이름을 덮어쓰지 않음), 반환된 객체는 다시 조회하지 않아도 읽힘
+    assert (again.id, again.social_id, again.name) == (created.id, "42", "")
+    assert statements == [statements[0]]
+    assert db.query(User).filter(User.email == EMAIL).count() == 1
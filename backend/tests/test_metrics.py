@@ -0,0 +1,93 @@
+import re
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from starlette.routing import Route
+
+from backend.auth.auth import SessionLocal
+from backend.core.metrics import (PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, db_queries_per_request,
+                                  http_request_seconds, route_label, stage, stage_seconds)
+
+router = APIRouter()
+
+
+@router.get("/items/{item_id}")
+async def read_item(item_id: int):
+    with stage("lookup"):
+        pass
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+        db.execute(text("SELECT 2"))
+    finally:
+        db.close()
+    return {"id": item_id}
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(router, prefix="/api/things")
+    return TestClient(app)
+
+
+def _server_timing(response) -> dict:
+    entries = {}
+    for entry in response.headers["server-timing"].split(", "):
+        name, *params = entry.split(";")
+        entries[name] = dict(param.split("=", 1) for param in params)
+    return entries
+
+
+def test_server_timing_lists_stages_queries_and_total(client):
+    response = client.get("/api/things/items/7")
+    assert response.status_code == 200
+    timing = _server_timing(response)
+    assert list(timing) == ["lookup", "db", "total"]
+    assert timing["db"]["desc"] == '"2 queries"'
+    assert all(re.fullmatch(r"\d+\.\d", entry["dur"]) for entry in timing.values())
+
+
+def test_routes_are_labelled_by_prefixed_template(client):
+    template = "/api/things/items/{item_id}"
+    before = http_request_seconds.count(template, "GET", "200")
+    client.get("/api/things/items/1")
+    client.get("/api/things/items/2")
+    assert http_request_seconds.count(template, "GET", "200") == before + 2
+    assert stage_seconds.count(template, "lookup") >= 2
+    assert db_queries_per_request.count(template) >= 2
+
+    before = http_request_seconds.count("unmatched", "GET", "404")
+    assert client.get("/nowhere/3").status_code == 404
+    assert http_request_seconds.count("unmatched", "GET", "404") == before + 1
+
+
+def test_route_label_with_and_without_prefixed_route_path():
+    async def endpoint(request):
+        pass
+
+    # include_router가 prefix를 붙인 복사본을 등록한 경우와 원래 라우트를 그대로 둔 경우 모두 같은 라벨
+    prefixed = Route("/api/tips/{tip_id}", endpoint)
+    original = Route("/{tip_id}", endpoint)
+    for route in (prefixed, original):
+        assert route_label({"route": route, "path": "/api/tips/42"}) == "/api/tips/{tip_id}"
+    assert route_label({"path": "/favicon.ico"}) == "unmatched"
+
+
+def test_metrics_endpoint_renders_prometheus_text(client):
+    from backend.main import app
+
+    client.get("/api/things/items/5")
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == PROMETHEUS_CONTENT_TYPE
+    body = response.text
+    assert body.startswith("# HELP http_request_duration_seconds ")
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert re.search(r'^http_request_duration_seconds_bucket\{route="/api/things/items/\{item_id\}",method="GET",status="200",le="\+Inf"\} \d+$',
+                     body, re.MULTILINE)
+    assert re.search(r'^db_queries_per_request_count\{route="/api/things/items/\{item_id\}"\} \d+$', body, re.MULTILINE)
+    assert "# TYPE upstream_requests_total counter" in body
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from backend.auth.auth import SessionLocal, User
+from backend.routers import mypage
+from backend.schema import ensure_schema
+from backend.services import image_pipeline
+from backend.services.image_pipeline import content_name, fallback_url, remove_legacy_image, sweep_profile_images, variant_urls
+
+
+@pytest.fixture
+def image_dirs(tmp_path, monkeypatch):
+    profile_dir = tmp_path / "profile"
+    profile_dir.mkdir()
+    monkeypatch.setattr(image_pipeline, "STATIC_DIR", tmp_path)
+    monkeypatch.setattr(image_pipeline, "PROFILE_IMAGE_DIR", profile_dir)
+    return tmp_path, profile_dir
+
+
+def _write_variants(directory, name, age=0.0):
+    url = fallback_url(name)
+    for variant in variant_urls(url).values():
+        path = directory / variant[len(image_pipeline.PROFILE_IMAGE_URL_PREFIX):]
+        path.write_bytes(b"image")
+        os.utime(path, (time.time() - age, time.time() - age))
+    return url
+
+
+def _files(directory):
+    return sorted(path.name for path in directory.iterdir())
+
+
+def test_sweep_removes_only_old_unreferenced_variants(image_dirs):
+    _, profile_dir = image_dirs
+    used = _write_variants(profile_dir, "a" * 24, age=7200)
+    _write_variants(profile_dir, "b" * 24, age=7200)
+    recent = _write_variants(profile_dir, "c" * 24, age=0)  # 막 올라와서 아직 URL이 저장되기 전일 수 있음
+    (profile_dir / ".x.jpg.1.tmp").write_bytes(b"")
+
+    removed = sweep_profile_images([used, None, "/static/1_old.png"], grace=3600)
+    assert removed == len(variant_urls(used))
+    expected = [url.rsplit("/", 1)[1] for url in [*variant_urls(used).values(), *variant_urls(recent).values()]]
+    assert _files(profile_dir) == sorted([".x.jpg.1.tmp", *expected])
+
+
+def test_reusing_processed_image_refreshes_it(image_dirs):
+    _, profile_dir = image_dirs
+    data = b"same image"
+    url = _write_variants(profile_dir, content_name(data), age=7200)
+    assert asyncio.run(image_pipeline.store_profile_image(data)) == url
+    assert sweep_profile_images([], grace=3600) == 0
+
+
+def test_sweep_reads_referenced_urls_from_users(image_dirs):
+    _, profile_dir = image_dirs
+    ensure_schema()
+    used = _write_variants(profile_dir, "d" * 24, age=7200)
+    _write_variants(profile_dir, "e" * 24, age=7200)
+    db = SessionLocal()
+    try:
+        db.query(User).filter(User.email == "image@test").delete()
+        db.add(User(email="image@test", name="이미지", profile_image_url=used))
+        db.commit()
+    finally:
+        db.close()
+
+    asyncio.run(mypage.sweep_unused_profile_images())
+    assert _files(profile_dir) == sorted(url.rsplit("/", 1)[1] for url in variant_urls(used).values())
+
+
+def test_remove_legacy_image_only_for_its_owner(image_dirs):
+    static_dir, _ = image_dirs
+    (static_dir / "7_me.png").write_bytes(b"old")
+    (static_dir / "8_other.png").write_bytes(b"old")
+    assert not remove_legacy_image("/static/8_other.png", 7)
+    assert not remove_legacy_image("/static/7_../8_other.png", 7)
+    assert not remove_legacy_image(fallback_url("f" * 24), 7)
+    assert remove_legacy_image("/static/7_me.png", 7)
+    assert _files(static_dir) == ["8_other.png", "profile"]
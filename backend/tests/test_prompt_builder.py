@@ -0,0 +1,69 @@
+from backend.routers.recommend import RecommendationRequest, format_recipe_text
+from backend.services.prompt_builder import compact_recipe_texts, estimate_tokens, synthesize_keywords
+
+
+def _text(name, steps, step_text="냄비에 물을 붓고 재료를 넣어 중불에서 충분히 끓인다", ingredients="김치 1컵, 돼지고기 200g, 두부 반 모"):
+    steps_text = "\n".join(f"{i + 1}. {step_text} {i}" for i in range(steps))
+    return format_recipe_text(f"https://example.com/{name}", name, ingredients, steps_text)
+
+
+def _total(texts):
+    return sum(estimate_tokens(text) for text in texts)
+
+
+def test_within_budget_only_dedups_and_cleans():
+    first, second = _text("김치찌개", 3), _text("된장찌개", 3)
+    compacted = compact_recipe_texts([first, second, first], token_budget=10_000)
+    assert len(compacted) == 2
+    assert compacted[0].startswith("URL: https://example.com/김치찌개")
+    assert "3. 냄비에 물을 붓고" in compacted[0]
+
+
+def test_steps_are_trimmed_to_fit_the_budget():
+    texts = [_text("김치찌개", 12), _text("된장찌개", 6), _text("부대찌개", 2)]
+    full = compact_recipe_texts(texts, token_budget=10_000)
+    budget = _total(full) // 2
+
+    compacted = compact_recipe_texts(texts, token_budget=budget)
+    assert _total(compacted) <= budget
+    assert len(compacted) == 3
+    for text in compacted:  # 제목/재료는 그대로
+        assert "제목: " in text and "재료: 김치 1컵, 돼지고기 200g, 두부 반 모" in text
+
+
+def test_budget_holds_even_when_titles_and_ingredients_dominate():
+    long_ingredients = ", ".join(f"재료{i} 1큰술" for i in range(30))
+    texts = [_text("김치찌개", 2, ingredients=long_ingredients), _text("된장찌개", 2, ingredients=long_ingredients)]
+    budget = int(_total(compact_recipe_texts(texts, token_budget=10_000)) * 0.9)
+    assert _total(compact_recipe_texts(texts, token_budget=budget)) <= budget
+
+
+def test_longest_recipes_are_dropped_first_and_order_is_kept():
+    long_ingredients = ", ".join(f"재료{i} 1큰술" for i in range(40))
+    texts = [_text("긴 레시피", 4, ingredients=long_ingredients), _text("김치찌개", 4), _text("된장찌개", 4)]
+    short_only = _total(compact_recipe_texts(texts[1:], token_budget=10_000))
+
+    compacted = compact_recipe_texts(texts, token_budget=short_only)
+    assert [text.split("\n")[1] for text in compacted] == ["제목: 김치찌개", "제목: 된장찌개"]
+    assert _total(compacted) <= short_only
+
+    # 예산이 아무리 작아도 가장 짧은 레시피 하나는 남김
+    assert [text.split("\n")[1] for text in compact_recipe_texts(texts, token_budget=1)] == ["제목: 김치찌개"]
+
+
+def test_synthesized_keywords_exclude_avoided_words():
+    request = RecommendationRequest(meal_goal="다이어트", cooking_time=10, include_ingredients=["닭가슴살"],
+                                    available_ingredients=["양파", "닭가슴살"], preference_keywords=["매콤한"],
+                                    avoid_keywords=["오이", "땅콩", "버섯"])
+    keywords = synthesize_keywords(request)
+    assert keywords == [
+        "닭가슴살 다이어트 -오이 -땅콩",
+        "초간단 매콤한 닭가슴살 요리 -오이 -땅콩",
+        "양파 닭가슴살 레시피 -오이 -땅콩",
+    ]
+    assert synthesize_keywords(request) == keywords  # 같은 요청이면 같은 검색어 (검색 캐시 적중)
+
+
+def test_synthesized_keywords_fall_back_without_request_fields():
+    assert synthesize_keywords(RecommendationRequest()) == ["간단 집밥 요리"]
+    assert synthesize_keywords(RecommendationRequest(avoid_keywords=["우유"])) == ["간단 집밥 요리 -우유"]
@@ -0,0 +1,53 @@
+from backend.routers.recommend import RecommendationRequest
+from backend.services.recipe_corpus import RecipeIndex
+
+
+def _recipe(name, ingredients, tags=(), cooking_time=20, cost=8000):
+    return {"name": name, "ingredients": list(ingredients), "tags": list(tags), "cooking_time": cooking_time,
+            "cost": cost, "instructions": ["만든다."], "source_url": f"https://example.com/{name}"}
+
+
+def _index():
+    index = RecipeIndex()
+    index.add(1, _recipe("계란말이", ["계란 3개", "대파"], ["반찬"]))
+    index.add(2, _recipe("계란볶음밥", ["계란 2개", "밥 1공기"], ["한그릇"]))
+    index.add(3, _recipe("계란찜", ["계란 3개", "새우젓"], ["반찬"]))
+    index.add(4, _recipe("닭가슴살 샐러드", ["닭가슴살", "양상추"], ["다이어트"], cooking_time=10))
+    index.add(5, _recipe("계란 샐러드", ["계란 2개", "양상추"], ["다이어트"], cooking_time=10))
+    index.add(6, _recipe("닭가슴살 계란 덮밥", ["닭가슴살", "계란 1개", "밥"], ["다이어트"], cooking_time=15))
+    return index
+
+
+def test_common_include_ingredient_alone_does_not_answer_other_goals():
+    index = _index()
+    # 계란이 들어간 레시피는 많지만 '다이어트'에 맞는 것은 둘뿐 -> 로컬로 답하지 않음
+    assert index.search(RecommendationRequest(include_ingredients=["계란"], meal_goal="다이어트")) == []
+
+
+def test_answers_when_other_conditions_are_covered():
+    index = _index()
+    # 조건 4개(반찬, 대파, 새우젓, 밥) 중 절반 이상 맞는 계란 레시피: 계란말이(반찬, 대파), 계란찜(반찬, 새우젓), 계란볶음밥(밥)은 1/4
+    assert index.search(RecommendationRequest(include_ingredients=["계란"], preference_keywords=["반찬"],
+                                              available_ingredients=["대파", "새우젓", "밥"])) == []
+    index.add(7, _recipe("계란국", ["계란 2개", "대파", "새우젓"], ["국"]))
+    results = index.search(RecommendationRequest(include_ingredients=["계란"], preference_keywords=["반찬"],
+                                                 available_ingredients=["대파", "새우젓", "밥"]))
+    assert {recipe["name"] for recipe in results} == {"계란말이", "계란찜", "계란국"}
+    results = index.search(RecommendationRequest(meal_goal="다이어트", cooking_time=15))
+    assert {recipe["name"] for recipe in results} == {"닭가슴살 샐러드", "계란 샐러드", "닭가슴살 계란 덮밥"}
+
+
+def test_include_only_request_and_filters():
+    index = _index()
+    assert len(index.search(RecommendationRequest(include_ingredients=["계란"]))) == 3
+    assert index.search(RecommendationRequest(include_ingredients=["계란"], avoid_keywords=["밥", "반찬"])) == []
+    assert index.search(RecommendationRequest(include_ingredients=["계란"], cooking_time=5)) == []
+
+
+def test_postings_stay_sorted_for_out_of_order_ids():
+    index = RecipeIndex()
+    for recipe_id in (10, 30, 20, 5):
+        index.add(recipe_id, _recipe(f"두부조림{recipe_id}", ["두부 1모", "간장"]))
+    assert list(index._postings["두부"]) == [5, 10, 20, 30]
+    assert index._match("두부 간장") == {5, 10, 20, 30}
+    assert index._match("두부 고추장") == set()
@@ -0,0 +1,36 @@
+import pytest
+
+from backend.benchmarks.bench_extract import MALFORMED_FIXTURES, legacy_extract
+from backend.benchmarks.sample_pages import generate_page
+from backend.services.recipe_extractor import NO_INGREDIENTS, NO_TITLE, extract_recipe_fields
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_beautifulsoup_on_synthetic_pages(seed):
+    content = generate_page(seed, script_kb=5).encode("utf-8")
+    assert extract_recipe_fields(content) == legacy_extract(content)
+
+
+@pytest.mark.parametrize("content", [
+    b"<html><body><p>nothing</p></body></html>",
+    b"<h3> a \r\n b </h3><div class='ready_ingre3'> x <!-- c --> y <script>z</script></div>",
+    "<h3>김치찌개 &amp; 밥</h3><div class='view_step_cont'>볶기<br>끓이기</div>".encode("utf-8"),
+])
+def test_matches_beautifulsoup_on_edge_cases(content):
+    assert extract_recipe_fields(content) == legacy_extract(content)
+
+
+@pytest.mark.parametrize("name", MALFORMED_FIXTURES)
+def test_malformed_fixtures(name):
+    content, expected_same = MALFORMED_FIXTURES[name]
+    assert (extract_recipe_fields(content) == legacy_extract(content)) is expected_same
+
+
+def test_known_differences_are_stable():
+    # 문서로 남긴 차이가 바뀌면 recipe_extractor 상단 설명도 함께 고쳐야 함
+    assert extract_recipe_fields(b"<p><h3>x</p>y</h3>")[0] == "xy"
+    assert extract_recipe_fields(b"<h3>a<p>b</h3>c")[0] == "a"
+
+
+def test_missing_sections_use_placeholders():
+    assert extract_recipe_fields(b"<div>empty</div>") == (NO_TITLE, NO_INGREDIENTS, "")
@@ -0,0 +1,37 @@
+from backend.routers.recommend import RecommendationRequest
+from backend.services.recommend_cache import canonicalize_request, request_cache_key
+
+
+def _key(**fields):
+    return request_cache_key(canonicalize_request(RecommendationRequest(**fields)))
+
+
+def test_equivalent_requests_share_a_key():
+    base = _key(meal_goal="다이어트", include_ingredients=["두부", "계란"], avoid_keywords=None)
+    assert _key(meal_goal=" 다이어트 ", include_ingredients=["계란", "두부", "계란", " "], avoid_keywords=[]) == base
+    assert _key(meal_goal="다이어트", include_ingredients=["계란", "두부"], cooking_time=0) == base
+    assert _key(meal_goal="Diet") == _key(meal_goal="diet")
+
+
+def test_fields_are_not_interchangeable():
+    assert _key(include_ingredients=["두부"]) != _key(available_ingredients=["두부"])
+    assert _key(meal_goal="") == _key()
+
+
+def test_time_and_cost_round_down_to_buckets():
+    canonical = canonicalize_request(RecommendationRequest(cooking_time=25, cost=8000))
+    assert (canonical.cooking_time, canonical.cost) == (20, 7000)
+    assert _key(cooking_time=25) == _key(cooking_time=29) != _key(cooking_time=30)
+    # 가장 작은 구간보다 작은 값은 그대로 (더 느슨한 조건으로 바꾸지 않음)
+    assert canonicalize_request(RecommendationRequest(cooking_time=3, cost=500)).cooking_time == 3
+    assert canonicalize_request(RecommendationRequest(cost=500)).cost == 500
+
+
+def test_canonical_request_lists_are_sorted_and_normalized():
+    canonical = canonicalize_request(RecommendationRequest(
+        meal_goal="  점심   도시락 ", preference_keywords=["매운", "Easy", "매운"], avoid_keywords=None,
+    ))
+    assert canonical.meal_goal == "점심 도시락"
+    assert canonical.preference_keywords == ["easy", "매운"]
+    assert canonical.avoid_keywords == []
+    assert canonicalize_request(canonical) == canonical
@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+import pytest
+
+from backend.core.deadline import Deadline
+from backend.routers import recommend
+from backend.routers.recommend import parse_recipes, repair_recipes, salvage_recipes
+from backend.services.google_clients import reset_google_clients
+from backend.services.prompt_builder import build_repair_prompt
+
+CRAWLED = ["URL: https://www.10000recipe.com/recipe/1\n제목: 김치찌개\n재료: 김치 1컵, 돼지고기 200g\n조리법:\n1. 김치를 볶는다.\n2. 물을 붓고 끓인다."]
+COMPLETE = {"name": "김치찌개", "description": "", "ingredients": ["김치 1컵"], "cooking_time": 20, "cost": 8000,
+            "tags": ["한식"], "instructions": ["김치를 볶는다."], "source_url": "https://www.10000recipe.com/recipe/1"}
+HOLLOW = {**COMPLETE, "ingredients": [], "instructions": []}
+
+
+class RecordingModel:
+    def __init__(self, reply: str):
+        self.reply = reply
+        self.prompts = []
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+
+        class Response:
+            text = self.reply
+            usage_metadata = None
+        return Response()
+
+
+@pytest.fixture(autouse=True)
+def structured_output(monkeypatch):
+    monkeypatch.setattr(recommend, "GEMINI_STRUCTURED_OUTPUT", True)
+    yield
+    reset_google_clients(None, None)
+
+
+def test_repair_prompt_carries_crawled_recipes_and_broken_output():
+    prompt = build_repair_prompt("식사 목표: 저녁", CRAWLED, '[{"name": "김치찌개", "ingr', "Unterminated string")
+    assert "김치를 볶는다." in prompt
+    assert '[{"name": "김치찌개", "ingr' in prompt
+    assert "빈 값" not in prompt
+
+
+def test_parse_recipes_drops_hollow_recipes():
+    assert [recipe.name for recipe in parse_recipes(json.dumps([COMPLETE, HOLLOW]))] == ["김치찌개"]
+    with pytest.raises(ValueError):
+        parse_recipes(json.dumps([HOLLOW]))
+
+
+def test_repair_call_uses_crawled_texts():
+    model = RecordingModel(json.dumps([COMPLETE]))
+    reset_google_clients(model, None)
+    broken = '[{"name": "김치찌개", "ingredients": ["김치'
+    recipes = asyncio.run(repair_recipes(broken, ValueError("truncated"), "식사 목표: 저녁", CRAWLED, Deadline(5)))
+    assert [recipe.name for recipe in recipes] == ["김치찌개"]
+    assert len(model.prompts) == 1 and "김치를 볶는다." in model.prompts[0] and broken in model.prompts[0]
+
+
+def test_repair_rejects_hollow_reply():
+    reset_google_clients(RecordingModel(json.dumps([HOLLOW])), None)
+    with pytest.raises(ValueError):
+        asyncio.run(repair_recipes('[{"name": "김', ValueError("truncated"), "식사 목표: 저녁", CRAWLED, Deadline(5)))
+
+
+def _recipe(name, **fields):
+    return {**COMPLETE, "name": name, **fields}
+
+
+def test_salvage_truncated_array():
+    text = json.dumps([_recipe("첫째"), _recipe("둘째"), _recipe("셋째")], ensure_ascii=False)
+    truncated = text[:text.index("셋째") + 10]
+    assert [recipe.name for recipe in salvage_recipes(truncated)] == ["첫째", "둘째"]
+
+
+def test_salvage_nested_objects_and_broken_neighbour():
+    nested = _recipe("중첩", extra={"meta": {"source": "crawl"}})
+    text = "```json\n[" + json.dumps(nested, ensure_ascii=False) + ', {"name": "깨짐", "extra": {"a": 1}, "cost": }, ' \
+        + json.dumps(_recipe("다음"), ensure_ascii=False) + "]\n```"
+    assert [recipe.name for recipe in salvage_recipes(text)] == ["중첩", "다음"]
+
+
+def test_salvage_string_containing_object_separator():
+    tricky = _recipe("괄호", description='설명에 "},"와 {중괄호}가 들어감', instructions=['양념장 {간장},', "끓인다."])
+    text = json.dumps([tricky, _recipe("보통")], ensure_ascii=False)
+    recipes = salvage_recipes(text[:-1])  # 닫는 ']'가 잘린 응답
+    assert [recipe.name for recipe in recipes] == ["괄호", "보통"]
+    assert recipes[0].instructions[0] == "양념장 {간장},"
+
+
+def test_salvage_skips_hollow_and_non_array():
+    assert salvage_recipes(json.dumps([HOLLOW])) == []
+    assert salvage_recipes("응답 없음") == []
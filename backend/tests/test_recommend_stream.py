@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+import pytest
+
+from backend.routers import recommend
+from backend.routers.recommend import RecommendationRequest, stream_pipeline
+from backend.services.google_clients import reset_google_clients
+
+
+def _recipe(name):
+    return {"name": name, "description": "", "ingredients": [f"{name} 재료"], "cooking_time": 20, "cost": 8000,
+            "tags": ["한식"], "instructions": [f"{name} 만들기"], "source_url": f"https://www.10000recipe.com/recipe/{name}"}
+
+
+class StreamingModel:
+    def __init__(self, chunks, repair_reply=None):
+        self.chunks = chunks
+        self.repair_reply = repair_reply
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        chunks, reply = self.chunks, self.repair_reply
+
+        class Chunk:
+            def __init__(self, text):
+                self.text = text
+
+        class Response:
+            usage_metadata = None
+            text = reply
+
+            async def __aiter__(self):
+                for chunk in chunks:
+                    yield Chunk(chunk)
+        return Response()
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    saved = []
+
+    async def pick_keywords(request, request_block, deadline):
+        return ["김치찌개"]
+
+    async def iter_recipe_texts(keywords, deadline):
+        yield "URL: https://www.10000recipe.com/recipe/1\n제목: 김치찌개\n재료: 김치\n조리법:\n1. 끓인다."
+
+    monkeypatch.setattr(recommend, "GEMINI_STRUCTURED_OUTPUT", True)
+    monkeypatch.setattr(recommend, "pick_keywords", pick_keywords)
+    monkeypatch.setattr(recommend, "iter_recipe_texts", iter_recipe_texts)
+    monkeypatch.setattr(recommend.recipe_index, "schedule_save", saved.append)
+    recommend.recommend_cache.clear()
+    yield saved
+    recommend.recommend_cache.clear()
+    reset_google_clients(None, None)
+
+
+def _run(cache_key):
+    async def collect():
+        return [event async for event in stream_pipeline(RecommendationRequest(meal_goal="저녁"), cache_key)]
+    return asyncio.run(collect())
+
+
+def test_broken_object_in_the_same_chunk_keeps_its_neighbours(pipeline):
+    first, second = json.dumps(_recipe("첫째"), ensure_ascii=False), json.dumps(_recipe("셋째"), ensure_ascii=False)
+    model = StreamingModel(["[" + first + ', {"name": "둘째", "cost": }', ", " + second + "]"])
+    reset_google_clients(model, None)
+
+    events = _run("stream-broken")
+    assert [event["recipe"]["name"] for event in events if event["event"] == "recipe"] == ["첫째", "셋째"]
+    assert events[-1] == {"event": "done", "count": 2, "cached": False}
+    assert model.calls == 1  # 받은 텍스트에서 건져서 복구 호출은 없음
+    assert [recipe.name for recipe in recommend.recommend_cache.get("stream-broken")] == ["첫째", "셋째"]
+    assert [[recipe["name"] for recipe in batch] for batch in pipeline] == [["첫째", "셋째"]]
+
+
+def test_truncated_stream_goes_through_repair_before_caching(pipeline):
+    # 빈 껍데기 + 잘린 객체: 받은 텍스트에서 건질 것이 없어서 복구 호출로 넘어감
+    hollow = json.dumps({**_recipe("첫째"), "ingredients": []}, ensure_ascii=False)
+    model = StreamingModel(["[" + hollow + ', {"name": "둘째", "ingredients": ["'],
+                           repair_reply=json.dumps([_recipe("첫째"), _recipe("둘째")], ensure_ascii=False))
+    reset_google_clients(model, None)
+
+    events = _run("stream-truncated")
+    assert [event["recipe"]["name"] for event in events if event["event"] == "recipe"] == ["첫째", "둘째"]
+    assert model.calls == 2
+    assert [recipe.name for recipe in recommend.recommend_cache.get("stream-truncated")] == ["첫째", "둘째"]
@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from backend.schema import ensure_schema
+
+
+@pytest.fixture
+def bind(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.sqlite3'}")
+    yield engine
+    engine.dispose()
+
+
+def _index_names(bind, table):
+    return {index["name"] for index in inspect(bind).get_indexes(table)}
+
+
+def test_second_run_creates_nothing(bind):
+    assert ensure_schema(bind) == ["table recipe_corpus", "table users", "table recipe_tips"]
+    # MySQL 전용 FULLTEXT 인덱스는 SQLite에서 매번 건너뛰지만, 만든 것으로 보고하지 않음
+    assert ensure_schema(bind) == []
+    assert "ft_recipe_tips_title_content" not in _index_names(bind, "recipe_tips")
+
+
+def test_missing_index_is_added_to_an_existing_table(bind):
+    ensure_schema(bind)
+    with bind.begin() as conn:
+        conn.execute(text("INSERT INTO users (email, name) VALUES ('schema@test', '기존 사용자')"))
+        conn.execute(text("DROP INDEX ix_recipe_tips_created_at_id"))
+    assert "ix_recipe_tips_created_at_id" not in _index_names(bind, "recipe_tips")
+
+    assert ensure_schema(bind) == ["index ix_recipe_tips_created_at_id"]
+    assert "ix_recipe_tips_created_at_id" in _index_names(bind, "recipe_tips")
+    with bind.connect() as conn:  # 기존 테이블과 데이터는 그대로
+        assert conn.execute(text("SELECT name FROM users WHERE email = 'schema@test'")).scalar_one() == "기존 사용자"
+    assert ensure_schema(bind) == []
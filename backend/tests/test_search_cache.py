@@ -0,0 +1,59 @@
+import sqlite3
+
+from backend.core.cache import TTLCache
+from backend.services.search_cache import QuotaAccountant, normalize_query
+
+
+def test_ttl_cache_expiry_and_stale_reads():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("fresh", 1)
+    cache.set("expired", 2, ttl=0)  # 빈 결과처럼 항목별 TTL
+    assert cache.get("fresh") == 1
+    assert cache.get("expired", "default") == "default"
+    assert cache.get("expired", allow_stale=True) == 2
+    assert cache.get("missing") is None
+    assert cache.expires_in("expired") <= 0 < cache.expires_in("fresh")
+    assert cache.expires_in("missing") is None
+    assert (cache.hits, cache.misses, cache.stale_hits) == (1, 2, 1)
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # a를 최근에 사용
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1 and len(cache) == 2
+    cache.delete("a")
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_normalize_query():
+    assert normalize_query(" 초간단  김치찌개\n") == normalize_query("초간단 김치찌개")
+    assert normalize_query("Easy KIMCHI") == "easy kimchi"
+
+
+def test_quota_accountant_stops_at_reserve(tmp_path):
+    path = str(tmp_path / "quota" / "quota.sqlite3")
+    quota = QuotaAccountant("customsearch", daily_limit=5, reserve=2, path=path)
+    assert [quota.try_acquire() for _ in range(4)] == [True, True, True, False]
+    assert quota.stats() == {"daily_limit": 5, "reserve": 2, "used_today": 3, "remaining": 0, "denied": 1}
+
+    # 다른 프로세스(같은 파일)에서도 같은 사용량을 봄
+    other = QuotaAccountant("customsearch", daily_limit=5, reserve=2, path=path)
+    assert other.used_today() == 3 and not other.try_acquire()
+    assert QuotaAccountant("other-api", 5, 2, path).remaining() == 3
+
+
+def test_quota_accountant_counts_per_day(tmp_path, monkeypatch):
+    path = str(tmp_path / "quota.sqlite3")
+    quota = QuotaAccountant("customsearch", daily_limit=1, reserve=0, path=path)
+    monkeypatch.setattr(QuotaAccountant, "_today", staticmethod(lambda: "2026-01-01"))
+    assert quota.try_acquire() and not quota.try_acquire()
+    monkeypatch.setattr(QuotaAccountant, "_today", staticmethod(lambda: "2026-01-02"))
+    assert quota.try_acquire()
+    rows = sqlite3.connect(path).execute("SELECT day, used FROM api_quota ORDER BY day").fetchall()
+    assert rows == [("2026-01-01", 1), ("2026-01-02", 1)]
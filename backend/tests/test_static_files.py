@@ -0,0 +1,94 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.core.static_files import STATIC_IMMUTABLE_MAX_AGE, STATIC_MAX_AGE, CachedStaticFiles
+
+BODY = "body { color: #333; }\n" * 50
+GZIPPED = gzip.compress(BODY.encode(), mtime=0)
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    root = tmp_path / "static"
+    (root / "profile").mkdir(parents=True)
+    (root / "app.css").write_text(BODY)
+    (root / "app.css.gz").write_bytes(GZIPPED)
+    (root / "app.css.br").write_bytes(b"fake brotli payload")
+    (root / "plain.css").write_text(BODY)
+    (root / "profile" / "0123456789abcdef0123_256.webp").write_bytes(b"RIFF....WEBP")
+    (tmp_path / "secret.txt").write_text("outside the static directory")
+    return root
+
+
+@pytest.fixture
+def client(static_dir):
+    app = FastAPI()
+    app.mount("/static", CachedStaticFiles(directory=static_dir), name="static")
+    return TestClient(app)
+
+
+def test_200_with_content_etag_and_short_cache(client):
+    response = client.get("/static/plain.css")
+    assert response.status_code == 200 and response.text == BODY
+    assert response.headers["cache-control"] == f"public, max-age={STATIC_MAX_AGE}"
+    assert response.headers["etag"].startswith('"') and len(response.headers["etag"]) == 34
+    assert response.headers["vary"] == "Accept-Encoding"
+    # 같은 내용이면 같은 ETag (요청마다 다시 계산하지 않고 보관한 값)
+    assert client.get("/static/plain.css").headers["etag"] == response.headers["etag"]
+
+
+def test_hashed_names_are_immutable(client):
+    response = client.get("/static/profile/0123456789abcdef0123_256.webp")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == f"public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable"
+    assert response.headers["etag"] == '"0123456789abcdef0123_256.webp"'
+    assert "vary" not in response.headers  # 압축 대상이 아님
+
+
+def test_if_none_match_returns_304(client):
+    etag = client.get("/static/plain.css").headers["etag"]
+    response = client.get("/static/plain.css", headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.content == b""
+    assert response.headers["etag"] == etag
+    assert client.get("/static/plain.css", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_range_request_returns_206(client):
+    response = client.get("/static/plain.css", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.text == BODY[:10]
+    assert response.headers["content-range"] == f"bytes 0-9/{len(BODY)}"
+
+
+def test_missing_file_is_404(client):
+    assert client.get("/static/missing.css").status_code == 404
+    assert client.get("/static/missing.css", headers={"Accept-Encoding": "gzip, br"}).status_code == 404
+
+
+def test_path_traversal_is_rejected(client, static_dir):
+    app = client.app.routes[-1].app
+    for path in ("../secret.txt", "profile/../../secret.txt"):
+        full_path, stat_result = app.lookup_path(path)
+        assert stat_result is None
+    response = client.get("/static/%2e%2e/secret.txt")
+    assert response.status_code == 404 and "outside" not in response.text
+
+
+@pytest.mark.parametrize("accept_encoding, encoding, body", [
+    ("gzip, deflate, br", "br", b"fake brotli payload"),
+    ("gzip", "gzip", GZIPPED),
+    ("br;q=0, gzip", "gzip", GZIPPED),
+    ("identity", None, BODY.encode()),
+    ("", None, BODY.encode()),
+])
+def test_precompressed_variant_follows_accept_encoding(client, static_dir, accept_encoding, encoding, body):
+    with client.stream("GET", "/static/app.css", headers={"Accept-Encoding": accept_encoding}) as response:
+        raw = b"".join(response.iter_raw())  # httpx가 압축을 풀기 전의 바이트
+    assert response.status_code == 200
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["content-type"].startswith("text/css")
+    assert response.headers.get("content-encoding") == encoding
+    assert raw == body
@@ -0,0 +1,91 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.auth.auth import SessionLocal, User, get_current_user
+from backend.routers import tips
+from backend.routers.tips import RecipeTip
+from backend.schema import ensure_schema
+
+
+@pytest.fixture
+def owner_id():
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        db.query(RecipeTip).delete()
+        db.query(User).filter(User.email == "cache@test").delete()
+        owner = User(email="cache@test", name="작성자")
+        db.add(owner)
+        db.flush()
+        db.add_all([RecipeTip(title=f"팁 {i}", content="내용", owner_id=owner.id) for i in range(3)])
+        db.commit()
+        return owner.id
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def client(owner_id):
+    tips.tips_cache.clear()
+    app = FastAPI()
+    app.include_router(tips.router, prefix="/api/tips")
+    app.dependency_overrides[get_current_user] = lambda: User(id=owner_id, email="cache@test", name="작성자")
+    return TestClient(app)
+
+
+def test_if_none_match_returns_304(client):
+    first = client.get("/api/tips/feed")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.headers["cache-control"] == "no-cache"
+
+    not_modified = client.get("/api/tips/feed", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert not_modified.status_code == 304 and not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    assert client.get("/api/tips/feed", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_create_and_delete_change_the_etag(client):
+    etag = client.get("/api/tips/").headers["etag"]
+    created = client.post("/api/tips/", json={"title": "새 팁", "content": "내용"}).json()
+
+    after_create = client.get("/api/tips/", headers={"If-None-Match": etag})
+    assert after_create.status_code == 200 and after_create.headers["etag"] != etag
+    assert "새 팁" in [tip["title"] for tip in after_create.json()]
+
+    assert client.delete(f"/api/tips/{created['id']}").json() == {"ok": True}
+    after_delete = client.get("/api/tips/", headers={"If-None-Match": after_create.headers["etag"]})
+    assert after_delete.status_code == 200
+    assert "새 팁" not in [tip["title"] for tip in after_delete.json()]
+    assert client.get(f"/api/tips/{created['id']}").status_code == 404
+
+
+def test_versioned_entry_is_not_served_after_bump(client):
+    first = client.get("/api/tips/feed").json()
+    # DB를 직접 바꾸면(다른 워커의 쓰기처럼) 같은 버전에서는 캐시된 응답이 그대로 나감
+    db = SessionLocal()
+    try:
+        db.query(RecipeTip).filter(RecipeTip.id == first["items"][0]["id"]).update({"title": "바뀐 제목"})
+        db.commit()
+    finally:
+        db.close()
+    assert client.get("/api/tips/feed").json() == first
+
+    tips.bump_tips_version()
+    assert client.get("/api/tips/feed").json()["items"][0]["title"] == "바뀐 제목"
+
+
+def test_nickname_change_is_served_stale_until_bump_or_ttl(client, owner_id):
+    # 알려진 차이: 작성자 닉네임 변경은 팁 캐시 버전을 올리지 않아서 TIPS_CACHE_TTL 동안 예전 이름이 나감
+    tip_id = client.get("/api/tips/feed").json()["items"][0]["id"]
+    assert client.get(f"/api/tips/{tip_id}").json()["owner"]["name"] == "작성자"
+    db = SessionLocal()
+    try:
+        db.query(User).filter(User.id == owner_id).update({"name": "새 닉네임"})
+        db.commit()
+    finally:
+        db.close()
+    assert client.get(f"/api/tips/{tip_id}").json()["owner"]["name"] == "작성자"
+
+    tips.tips_cache.clear()  # TTL이 지난 것과 같음
+    assert client.get(f"/api/tips/{tip_id}").json()["owner"]["name"] == "새 닉네임"
@@ -0,0 +1,47 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.auth.auth import SessionLocal, User
+from backend.routers import tips
+from backend.routers.tips import RecipeTip, decode_cursor, encode_cursor
+from backend.schema import ensure_schema
+
+
+@pytest.fixture
+def client():
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        db.query(RecipeTip).delete()
+        db.query(User).filter(User.email == "feed@test").delete()
+        owner = User(email="feed@test", name="피드")
+        db.add(owner)
+        db.flush()
+        # server_default로 같은 초에 저장됨 -> id로만 순서가 갈림
+        db.add_all([RecipeTip(title=f"팁 {i}", content="내용", owner_id=owner.id) for i in range(5)])
+        db.commit()
+    finally:
+        db.close()
+    tips.tips_cache.clear()
+    app = FastAPI()
+    app.include_router(tips.router, prefix="/api/tips")
+    return TestClient(app)
+
+
+def test_feed_pages_are_disjoint(client):
+    first = client.get("/api/tips/feed", params={"limit": 2}).json()
+    second = client.get("/api/tips/feed", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    third = client.get("/api/tips/feed", params={"limit": 2, "cursor": second["next_cursor"]}).json()
+
+    pages = [[tip["id"] for tip in page["items"]] for page in (first, second, third)]
+    ids = [tip_id for page in pages for tip_id in page]
+    assert len(ids) == 5 and len(set(ids)) == 5
+    assert ids == sorted(ids, reverse=True)
+    assert third["next_cursor"] is None
+
+
+def test_cursor_round_trip_and_invalid_cursor(client):
+    assert decode_cursor(encode_cursor("2024-01-01T10:00:00", 7), str, int) == ("2024-01-01T10:00:00", 7)
+    assert client.get("/api/tips/feed", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/api/tips/feed", params={"cursor": encode_cursor(1)}).status_code == 400
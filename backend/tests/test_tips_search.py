@@ -0,0 +1,95 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import mysql
+
+from backend.auth.auth import SessionLocal, User
+from backend.routers import tips
+from backend.routers.tips import RecipeTip, _search_expressions, encode_cursor
+from backend.schema import ensure_schema
+
+# (제목, 내용): '김치'가 제목에 있으면 2점, 내용에 있으면 1점
+TIPS = [
+    ("김치 보관법", "김치는 냉장"),  # 3
+    ("김치 볶음", "기름"),           # 2
+    ("찌개 팁", "김치를 먼저"),      # 1
+    ("김치전", "바삭하게"),          # 2
+    ("계란말이", "약불"),            # 0 (결과에 없음)
+    ("묵은지", "김치 대신"),         # 1
+    ("김치찜", "김치 한 포기"),      # 3
+]
+
+
+@pytest.fixture
+def client():
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        db.query(RecipeTip).delete()
+        db.query(User).filter(User.email == "search@test").delete()
+        owner = User(email="search@test", name="검색")
+        db.add(owner)
+        db.flush()
+        db.add_all([RecipeTip(title=title, content=content, owner_id=owner.id) for title, content in TIPS])
+        db.commit()
+    finally:
+        db.close()
+    tips.tips_cache.clear()
+    app = FastAPI()
+    app.include_router(tips.router, prefix="/api/tips")
+    return TestClient(app)
+
+
+def _all_pages(client, q, limit):
+    pages, cursor = [], None
+    while True:
+        params = {"q": q, "limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/tips/search", params=params).json()
+        pages.append([tip["title"] for tip in page["items"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4])
+def test_pages_have_no_duplicates_or_gaps(client, limit):
+    everything = _all_pages(client, "김치", 100)[0]
+    # (점수, id) 내림차순: 같은 점수는 나중에 쓴 팁이 먼저
+    assert everything == ["김치찜", "김치 보관법", "김치전", "김치 볶음", "묵은지", "찌개 팁"]
+    pages = _all_pages(client, "김치", limit)
+    assert [title for page in pages for title in page] == everything
+    assert all(len(page) <= limit for page in pages)
+
+
+def test_single_character_term_uses_like(client):
+    titles = _all_pages(client, "전", 100)[0]
+    assert titles == ["김치전"]
+    assert _all_pages(client, "계란 약불", 100)[0] == ["계란말이"]
+
+
+def test_malformed_cursor_is_rejected(client):
+    for cursor in ("not-a-cursor", encode_cursor(1.0), encode_cursor("high", 3)):
+        assert client.get("/api/tips/search", params={"q": "김치", "cursor": cursor}).status_code == 400
+    assert client.get("/api/tips/search", params={"q": "   "}).status_code == 400
+
+
+class _MySQLSession:
+    class _Bind:
+        class dialect:
+            name = "mysql"
+
+    def get_bind(self):
+        return self._Bind()
+
+
+def _compiled(expression):
+    return str(expression.compile(dialect=mysql.dialect()))
+
+
+def test_mysql_uses_fulltext_match_unless_a_term_is_shorter_than_ngram():
+    condition, score = _search_expressions(_MySQLSession(), "김치 보관", ["김치", "보관"])
+    assert "MATCH (recipe_tips.title, recipe_tips.content) AGAINST" in _compiled(condition)
+    assert "round(MATCH" in _compiled(score)
+
+    condition, _ = _search_expressions(_MySQLSession(), "김치 전", ["김치", "전"])
+    assert "MATCH" not in _compiled(condition) and "LIKE" in _compiled(condition)